@@ -0,0 +1,90 @@
+"""Benchmark de inicialização do dashboard (estilo `python -X importtime`).
+
+Importa o roteador (`streamlit_app`) ou outro módulo (ex.: uma página) em
+um processo novo com `-X importtime`, mostra o tempo cumulativo e lista
+os imports diretos mais caros. Também verifica que as
+dependências pesadas não são carregadas só por abrir o roteador.
+
+Uso::
+
+    python benchmarks/startup_importtime.py
+    python benchmarks/startup_importtime.py --module src.ui.pages.types --top 15
+    python benchmarks/startup_importtime.py --max-ms 1500   # falha se passar do limite
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Não devem ser importados apenas pelo roteador (carregam sob demanda)
+LAZY_MODULES = ("sklearn", "scipy", "plotly.express", "src.ui.pages", "src.analysis.metrics")
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def measure(module: str) -> tuple[float, list[tuple[str, float]], list[str]]:
+    """Importa `module` num processo novo com `-X importtime`.
+
+    Retorna (tempo cumulativo em ms, [(import direto, ms)], módulos carregados).
+    """
+    code = f"import sys, {module}; print('\\n'.join(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_ms = 0.0
+    children: list[tuple[str, float]] = []
+    pending: list[tuple[str, float]] = []
+    # O importtime imprime os filhos antes do pai; nível 1 = 1 espaço, nível 2 = 3
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        depth = (len(m.group(3)) + 1) // 2
+        name, cumulative_ms = m.group(4), int(m.group(2)) / 1000
+        if depth == 2:
+            pending.append((name, cumulative_ms))
+        elif depth == 1:
+            if name == module:
+                total_ms, children = cumulative_ms, pending
+            pending = []
+    return total_ms, children, proc.stdout.split()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="streamlit_app", help="módulo a importar (padrão: streamlit_app)")
+    parser.add_argument("--top", type=int, default=10, help="quantos imports mais caros listar")
+    parser.add_argument("--max-ms", type=float, default=None, help="falha se o total passar deste limite")
+    args = parser.parse_args()
+
+    total_ms, children, loaded = measure(args.module)
+    print(f"Import de {args.module}: {total_ms:.0f} ms ({len(loaded)} módulos carregados)")
+    print(f"{'import direto':<40} {'cumulativo (ms)':>16}")
+    for name, ms in sorted(children, key=lambda r: r[1], reverse=True)[: args.top]:
+        print(f"{name:<40} {ms:>16.1f}")
+
+    status = 0
+    if args.module == "streamlit_app":
+        eager = [m for m in loaded if any(m == lazy or m.startswith(lazy + ".") for lazy in LAZY_MODULES)]
+        if eager:
+            print("Carregados na inicialização (deveriam ser sob demanda):", ", ".join(sorted(eager)[:10]))
+            status = 1
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"Acima do limite: {total_ms:.0f} ms > {args.max_ms:.0f} ms")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+"""Cache de artefatos derivados (memória + disco).
+
+As chaves são impressões digitais do conteúdo dos dados de entrada, então
+chamadas repetidas com os mesmos dados reaproveitam o resultado salvo em
+vez de recalcular (modelos, importâncias, agregados etc.).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CACHE_DIR = Path("data") / "cache"
+
+
+def fingerprint(*parts: Any) -> str:
+    """Hash estável (blake2b, 16 bytes) de DataFrames, arrays e valores simples."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            h.update(repr(list(part.columns) if isinstance(part, pd.DataFrame) else part.name).encode())
+            h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        elif isinstance(part, np.ndarray):
+            h.update(str((part.dtype, part.shape)).encode())
+            if part.dtype == object:
+                h.update(pd.util.hash_array(part.ravel()).tobytes())
+            else:
+                h.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, bytes):
+            h.update(part)
+        else:
+            h.update(repr(part).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+class ArtifactCache:
+    """Cache LRU em memória com persistência opcional em disco (pickle).
+
+    `namespace` separa os arquivos de cada tipo de artefato dentro de
+    `cache_dir`; com `cache_dir=None` o cache fica só em memória.
+    """
+
+    def __init__(self, namespace: str, cache_dir: Optional[Path | str] = DEFAULT_CACHE_DIR, max_entries: int = 16):
+        self.namespace = namespace
+        self.cache_dir = Path(cache_dir) / namespace if cache_dir is not None else None
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.cache_dir / f"{key}.pkl" if self.cache_dir is not None else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        path = self._path(key)
+        if path is not None and path.exists():
+            try:
+                with path.open("rb") as fh:
+                    value = pickle.load(fh)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+                return default
+            self._remember(key, value)
+            return value
+        return default
+
+    def put(self, key: str, value: Any) -> None:
+        self._remember(key, value)
+        path = self._path(key)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Escrita atômica: arquivo temporário + os.replace
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,172 @@
+"""Índice invertido dos combates (CSR): pokémon -> posições no log.
+
+Cada combate entra duas vezes: nas vitórias do vencedor e nas derrotas do
+perdedor. As listas ficam num único array `rows`, agrupadas por (pokémon,
+resultado) e em ordem do log dentro de cada grupo; `offsets[2p]`,
+`offsets[2p + 1]` e `offsets[2p + 2]` delimitam as vitórias e as derrotas
+do pokémon de código `p`. Com isso:
+
+- contagens por pokémon e resultado são diferenças de offsets (O(1));
+- uma página de vitórias ou de derrotas é uma fatia de `rows`;
+- uma página com todos os combates de `p` intercala as duas listas
+  ordenadas, com o ponto de corte achado por busca binária (O(log k));
+- o filtro por adversário só olha os k combates de `p` (O(k)).
+
+Só as linhas da página viram nomes/DataFrame. O índice sai de um
+`argsort` estável sobre chaves pequenas (radix sort do numpy), O(n) nos
+combates, e precisa do log completo (não da forma compactada).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.encoding import COMBAT_COLUMNS, CombatCodes
+
+
+OUTCOMES = ("all", "wins", "losses")
+ROW_COLUMN = "combate"
+
+
+@dataclass
+class CombatPage:
+    frame: pd.DataFrame    # combates da página (nº no log + colunas de COMBAT_COLUMNS)
+    total: int             # combates que passam no filtro
+    page: int              # página (a partir de 0), limitada à última
+    n_pages: int
+
+
+@dataclass
+class CombatIndex:
+    codes: CombatCodes
+    offsets: np.ndarray    # (2 * n_pokemon + 1,) início de cada grupo (pokémon, resultado)
+    rows: np.ndarray       # (2 * n_combats,) posições no log
+    _lookup: pd.Index = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._lookup = pd.Index(self.codes.names)
+
+    def code(self, pokemon) -> int:
+        """Código do pokémon (aceita nome ou código)."""
+        if isinstance(pokemon, (int, np.integer)):
+            return int(pokemon)
+        code = int(self._lookup.get_indexer([pokemon])[0])
+        if code < 0:
+            raise KeyError(f"Pokémon sem combates: {pokemon!r}")
+        return code
+
+    def _group(self, code: int, outcome: str) -> np.ndarray:
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Resultado inválido: {outcome!r} (use um de {OUTCOMES})")
+        lo = self.offsets[2 * code + (outcome == "losses")]
+        hi = self.offsets[2 * code + 1 + (outcome != "wins")]
+        return self.rows[lo:hi]
+
+    def _opponent_rows(self, code: int, outcome: str, opponent) -> np.ndarray:
+        other_code = self.code(opponent)
+        parts = []
+        for part in (("wins", "losses") if outcome == "all" else (outcome,)):
+            rows = self._group(code, part)
+            first, second = self.codes.first[rows], self.codes.second[rows]
+            parts.append(rows[np.where(first == code, second, first) == other_code])
+        return np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+
+    def count(self, pokemon=None, outcome: str = "all", opponent=None) -> int:
+        """Nº de combates do filtro; sem adversário, direto dos offsets."""
+        if pokemon is None:
+            self._check_unfiltered(outcome, opponent)
+            return len(self.codes)
+        code = self.code(pokemon)
+        if opponent is not None:
+            return len(self._opponent_rows(code, outcome, opponent))
+        return len(self._group(code, outcome))
+
+    def positions(self, pokemon=None, outcome: str = "all", opponent=None) -> np.ndarray:
+        """Todas as posições no log que passam no filtro, em ordem."""
+        if pokemon is None:
+            self._check_unfiltered(outcome, opponent)
+            return np.arange(len(self.codes))
+        code = self.code(pokemon)
+        if opponent is not None:
+            return self._opponent_rows(code, outcome, opponent)
+        if outcome != "all":
+            return self._group(code, outcome)
+        return np.sort(self._group(code, "all"))
+
+    def page(
+        self,
+        pokemon=None,
+        outcome: str = "all",
+        opponent=None,
+        *,
+        page: int = 0,
+        page_size: int = 50,
+    ) -> CombatPage:
+        """Uma página do filtro: só as linhas dela são lidas e convertidas em nomes."""
+        total = self.count(pokemon, outcome, opponent)
+        n_pages = max(1, -(-total // page_size))
+        page = min(max(page, 0), n_pages - 1)
+        start, stop = page * page_size, min((page + 1) * page_size, total)
+
+        if pokemon is None:
+            rows = np.arange(start, stop)
+        elif opponent is not None:
+            rows = self._opponent_rows(self.code(pokemon), outcome, opponent)[start:stop]
+        elif outcome != "all":
+            rows = self._group(self.code(pokemon), outcome)[start:stop]
+        else:
+            code = self.code(pokemon)
+            wins, losses = self._group(code, "wins"), self._group(code, "losses")
+            i0, i1 = _merge_split(wins, losses, start), _merge_split(wins, losses, stop)
+            rows = np.sort(np.concatenate([wins[i0:i1], losses[start - i0:stop - i1]]))
+        return CombatPage(frame=self.frame(rows), total=total, page=page, n_pages=n_pages)
+
+    def frame(self, rows: np.ndarray) -> pd.DataFrame:
+        """Combates das posições `rows` (nº no log a partir de 1 e nomes)."""
+        names = self.codes.names
+        df = pd.DataFrame({ROW_COLUMN: np.asarray(rows, dtype=np.int64) + 1})
+        for col, attr in zip(COMBAT_COLUMNS, ("first", "second", "winner")):
+            df[col] = names[getattr(self.codes, attr)[rows]]
+        return df
+
+    @staticmethod
+    def _check_unfiltered(outcome: str, opponent) -> None:
+        if outcome != "all" or opponent is not None:
+            raise ValueError("Resultado e adversário só valem com um pokémon selecionado.")
+
+
+def _merge_split(a: np.ndarray, b: np.ndarray, k: int) -> int:
+    """Quantos elementos de `a` estão entre os `k` primeiros da intercalação de `a` e `b` (ordenados)."""
+    lo, hi = max(0, k - len(b)), min(k, len(a))
+    while lo < hi:
+        i = (lo + hi) // 2
+        if a[i] < b[k - i - 1]:
+            lo = i + 1
+        else:
+            hi = i
+    return lo
+
+
+def build_combat_index(codes: CombatCodes) -> CombatIndex:
+    """Monta o índice CSR a partir do log de combates codificado (não compactado)."""
+    if codes.count is not None:
+        raise ValueError("O índice de combates precisa do log completo, não da forma compactada.")
+    n, n_groups = len(codes), 2 * codes.n_pokemon
+    key_dtype = np.int16 if n_groups < np.iinfo(np.int16).max else np.int32
+    # Grupo 2p = vitórias de p, 2p + 1 = derrotas; o sort estável mantém a ordem do log
+    key = np.concatenate([
+        codes.winner.astype(key_dtype) * 2,
+        codes.loser.astype(key_dtype) * 2 + 1,
+    ])
+    order = np.argsort(key, kind="stable")
+    rows = order - np.where(order >= n, n, 0)
+    offsets = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(key, minlength=n_groups), out=offsets[1:])
+    return CombatIndex(
+        codes=codes,
+        offsets=offsets,
+        rows=rows.astype(np.int32 if n < np.iinfo(np.int32).max else np.int64),
+    )
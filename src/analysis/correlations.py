@@ -0,0 +1,160 @@
+"""Motor de correlações vetorizado (Pearson e Spearman).
+
+Calcula a matriz completa de correlações entre atributos numéricos e
+`win_rate` numa única passada em numpy (produtos de matrizes com máscara
+de valores presentes, equivalente ao "pairwise complete" do pandas), com
+p-valores, recortes por grupo (geração, tipo) e cache por versão dos dados.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.cache import ArtifactCache, fingerprint
+
+
+METHODS = ("pearson", "spearman")
+
+EXCLUDED_COLUMNS = ("id", "wins", "losses", "total")
+
+_cache = ArtifactCache("correlations", cache_dir=None, max_entries=64)
+
+
+def numeric_columns(df: pd.DataFrame, exclude: Iterable[str] = EXCLUDED_COLUMNS) -> List[str]:
+    cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    return [c for c in cols if c not in set(exclude)]
+
+
+def _pairwise_pearson(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Correlação de Pearson entre todas as colunas, ignorando NaN por par.
+
+    Retorna (r, n), onde n[i, j] é o nº de linhas com ambas as colunas presentes.
+    """
+    mask = ~np.isnan(values)
+    m = mask.astype(float)
+    x = np.where(mask, values, 0.0)
+
+    n = m.T @ m
+    sx = x.T @ m            # soma de x_i onde x_j também está presente
+    sxx = (x * x).T @ m
+    sxy = x.T @ x
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sxy - sx * sx.T
+        var_i = n * sxx - sx * sx
+        var_j = var_i.T
+        r = cov / np.sqrt(var_i * var_j)
+    r[n < 2] = np.nan
+    return np.clip(r, -1.0, 1.0), n
+
+
+def _pvalues(r: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """p-valor bicaudal do teste t para r com n-2 graus de liberdade."""
+    from scipy.special import stdtr
+
+    df = n - 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = r * np.sqrt(df / np.clip(1.0 - r * r, 1e-300, None))
+        p = 2.0 * stdtr(np.where(df > 0, df, np.nan), -np.abs(t))
+    return p
+
+
+def correlation_matrix(
+    df: pd.DataFrame,
+    columns: Optional[Sequence[str]] = None,
+    *,
+    method: str = "pearson",
+    with_pvalues: bool = False,
+):
+    """Matriz de correlação entre `columns` (padrão: todas as numéricas).
+
+    Para Spearman as colunas são convertidas em postos (empates pela média)
+    antes do cálculo. Com `with_pvalues=True` retorna (r, p, n) como DataFrames.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método inválido: {method!r} (use um de {METHODS})")
+    cols = list(columns) if columns is not None else numeric_columns(df, exclude=())
+    data = df[cols].apply(pd.to_numeric, errors="coerce")
+    if method == "spearman":
+        data = data.rank(method="average")
+    values = data.to_numpy(dtype=float)
+
+    r, n = _pairwise_pearson(values)
+    r_df = pd.DataFrame(r, index=cols, columns=cols)
+    if not with_pvalues:
+        return r_df
+    p_df = pd.DataFrame(_pvalues(r, n), index=cols, columns=cols)
+    n_df = pd.DataFrame(n.astype(int), index=cols, columns=cols)
+    return r_df, p_df, n_df
+
+
+def correlate_with_target(
+    df: pd.DataFrame,
+    target: str = "win_rate",
+    columns: Optional[Sequence[str]] = None,
+    *,
+    version: Optional[str] = None,
+) -> pd.DataFrame:
+    """Correlações Pearson e Spearman (com p-valor) de cada atributo com `target`.
+
+    Colunas: attribute, pearson, pearson_p, spearman, spearman_p, n.
+    `version` (ex.: hash do manifesto de dados) evita recalcular a chave de cache.
+    """
+    empty = pd.DataFrame(columns=["attribute", "pearson", "pearson_p", "spearman", "spearman_p", "n"])
+    if df is None or df.empty or target not in df.columns:
+        return empty
+    cols = list(columns) if columns is not None else numeric_columns(df)
+    attrs = [c for c in cols if c != target]
+    if not attrs:
+        return empty
+
+    key = fingerprint("target", target, attrs, version if version is not None else df[[target] + attrs])
+
+    def compute() -> pd.DataFrame:
+        out = {"attribute": attrs}
+        for method in METHODS:
+            r, p, n = correlation_matrix(df, [target] + attrs, method=method, with_pvalues=True)
+            out[method] = r.loc[target, attrs].to_numpy()
+            out[f"{method}_p"] = p.loc[target, attrs].to_numpy()
+            out["n"] = n.loc[target, attrs].to_numpy()
+        res = pd.DataFrame(out)[list(empty.columns)]
+        return res.sort_values("pearson", ascending=False, ignore_index=True)
+
+    return _cache.get_or_compute(key, compute).copy()
+
+
+def grouped_correlations(
+    df: pd.DataFrame,
+    by: str,
+    target: str = "win_rate",
+    columns: Optional[Sequence[str]] = None,
+    *,
+    min_rows: int = 5,
+    version: Optional[str] = None,
+) -> pd.DataFrame:
+    """`correlate_with_target` para cada valor de `by` (ex.: generation, tipo).
+
+    Se `by` contiver listas (vários tipos por pokémon), as linhas são
+    explodidas para que cada tipo receba o pokémon. Grupos com menos de
+    `min_rows` linhas são ignorados.
+    """
+    if df is None or df.empty or by not in df.columns:
+        return pd.DataFrame(columns=[by, "attribute", "pearson", "pearson_p", "spearman", "spearman_p", "n"])
+    cols = list(columns) if columns is not None else numeric_columns(df)
+    data = df.explode(by) if df[by].map(lambda v: isinstance(v, list)).any() else df
+    data = data.dropna(subset=[by])
+
+    frames = []
+    for group, part in data.groupby(by, sort=True):
+        if len(part) < min_rows:
+            continue
+        part_version = f"{version}:{by}={group}" if version is not None else None
+        res = correlate_with_target(part, target, cols, version=part_version)
+        res.insert(0, by, group)
+        frames.append(res)
+    if not frames:
+        return pd.DataFrame(columns=[by, "attribute", "pearson", "pearson_p", "spearman", "spearman_p", "n"])
+    return pd.concat(frames, ignore_index=True)
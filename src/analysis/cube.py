@@ -0,0 +1,186 @@
+"""Cubo de desempenho: geração × lendário × tipo principal × tipo secundário.
+
+Cada célula guarda, somado sobre os pokémons daquela combinação: nº de
+pokémons, vitórias, derrotas e a soma (e a contagem) de cada atributo.
+Como todas as medidas são aditivas, qualquer recorte (gerações, só
+lendários, tipos...) é a soma das células selecionadas: uma máscara
+booleana sobre um array denso de poucos milhares de células, sem voltar
+aos combates nem refazer merge e groupby. Médias e taxa de vitória saem
+das somas no final.
+
+O cubo é montado uma vez por versão dos dados (um `np.bincount` por
+medida sobre o índice achatado da célula) e fica em `data/cache/stats_cube/`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.cache import ArtifactCache, DEFAULT_CACHE_DIR, fingerprint
+from src.analysis.encoding import CombatCodes
+from src.analysis.type_stats import OFFICIAL_TYPES_EN, _types_long
+
+
+DIMENSIONS = ("generation", "legendary", "primary_type", "secondary_type")
+NO_TYPE = "Nenhum"
+STAT_COLUMNS = ("hp", "attack", "defense", "sp_attack", "sp_defense", "speed", "overall")
+COUNTS = ("n_pokemon", "wins", "losses")
+
+_cache = ArtifactCache("stats_cube", cache_dir=DEFAULT_CACHE_DIR, max_entries=4)
+
+
+@dataclass
+class StatsCube:
+    generations: np.ndarray        # rótulos do eixo 0
+    legendary: np.ndarray          # [False, True]
+    primary_types: List[str]       # 18 tipos oficiais
+    secondary_types: List[str]     # 18 tipos + NO_TYPE
+    measures: List[str]            # COUNTS, sum_<stat> e n_<stat>
+    cells: np.ndarray              # (gerações, 2, 18, 19, medidas)
+    n_excluded: int                # pokémons sem geração ou tipo principal reconhecido
+
+    @property
+    def axes(self) -> Dict[str, list]:
+        return {
+            "generation": self.generations.tolist(),
+            "legendary": self.legendary.tolist(),
+            "primary_type": list(self.primary_types),
+            "secondary_type": list(self.secondary_types),
+        }
+
+    def _axis_mask(self, dim: str, values) -> np.ndarray:
+        labels = self.axes[dim]
+        if values is None:
+            return np.ones(len(labels), dtype=bool)
+        if isinstance(values, (str, bool, int, np.integer, np.bool_)):
+            values = [values]
+        return np.isin(np.asarray(labels, dtype=object), list(values))
+
+    def mask(
+        self,
+        *,
+        generation: Optional[Sequence] = None,
+        legendary: Optional[bool | Sequence[bool]] = None,
+        primary_type: Optional[Sequence[str]] = None,
+        secondary_type: Optional[Sequence[str]] = None,
+        any_type: Optional[Sequence[str]] = None,
+    ) -> np.ndarray:
+        """Células do recorte (array booleano gerações × 2 × 18 × 19).
+
+        `None` não filtra a dimensão; `any_type` aceita o tipo em qualquer
+        posição (principal ou secundário).
+        """
+        types = self._axis_mask("primary_type", primary_type)[:, None] & self._axis_mask("secondary_type", secondary_type)[None, :]
+        if any_type is not None:
+            types &= self._axis_mask("primary_type", any_type)[:, None] | self._axis_mask("secondary_type", any_type)[None, :]
+        g = self._axis_mask("generation", generation)
+        l = self._axis_mask("legendary", legendary)
+        return g[:, None, None, None] & l[None, :, None, None] & types[None, None, :, :]
+
+    def totals(self, **filters) -> pd.Series:
+        """Medidas somadas do recorte, com taxa de vitória e médias dos atributos."""
+        sums = np.einsum("glpsm,glps->m", self.cells, self.mask(**filters))
+        return derive(pd.DataFrame([sums], columns=self.measures)).iloc[0]
+
+    def rollup(self, by: str, **filters) -> pd.DataFrame:
+        """Uma linha por valor de `by` (dimensão) dentro do recorte; valores sem pokémons ficam de fora."""
+        if by not in DIMENSIONS:
+            raise ValueError(f"Dimensão inválida: {by!r} (use uma de {DIMENSIONS})")
+        axis = DIMENSIONS.index(by)
+        masked = self.cells * self.mask(**filters)[..., None]
+        sums = masked.sum(axis=tuple(a for a in range(4) if a != axis))
+        out = derive(pd.DataFrame(sums, columns=self.measures))
+        out.insert(0, by, self.axes[by])
+        return out[out["n_pokemon"] > 0].reset_index(drop=True)
+
+
+def derive(sums: pd.DataFrame) -> pd.DataFrame:
+    """Somas do cubo -> contagens, batalhas, taxa de vitória e médias dos atributos."""
+    out = sums[list(COUNTS)].astype(np.int64)
+    battles = out["wins"] + out["losses"]
+    out["battles"] = battles
+    out["win_rate"] = (out["wins"] / battles.where(battles > 0)).round(4)
+    for stat in STAT_COLUMNS:
+        if f"sum_{stat}" in sums.columns:
+            n = sums[f"n_{stat}"]
+            out[f"mean_{stat}"] = (sums[f"sum_{stat}"] / n.where(n > 0)).round(1)
+    return out
+
+
+def _legendary(values: pd.Series) -> np.ndarray:
+    return values.astype(str).str.strip().str.lower().isin(("true", "1", "yes")).to_numpy()
+
+
+def build_stats_cube(codes: CombatCodes, attrs: pd.DataFrame, *, version: Optional[str] = None) -> Optional[StatsCube]:
+    """Monta o cubo a partir dos combates (completos ou compactados) e dos atributos (com `overall`).
+
+    Devolve `None` sem atributos. Resultado em cache por versão dos dados
+    (`version`, do manifesto) ou hash dos combates e atributos.
+    """
+    if attrs is None or attrs.empty or "name" not in attrs.columns or "generation" not in attrs.columns:
+        return None
+    data_key = (
+        (version,)
+        if version is not None
+        else (codes.names, codes.first, codes.second, codes.winner, codes.count if codes.count is not None else "-", attrs)
+    )
+    return _cache.get_or_compute(fingerprint("cube", *data_key), lambda: _build(codes, attrs))
+
+
+def _build(codes: CombatCodes, attrs: pd.DataFrame) -> StatsCube:
+    df = attrs.dropna(subset=["name"]).drop_duplicates("name").reset_index(drop=True)
+
+    # Tipos: slot 0 = principal, slot 1 = secundário (NO_TYPE se não houver)
+    long = _types_long(df)
+    type_index = pd.Index(OFFICIAL_TYPES_EN)
+    primary = np.full(len(df), -1, dtype=np.int64)
+    secondary = np.full(len(df), len(OFFICIAL_TYPES_EN), dtype=np.int64)
+    for slot, target in ((0, primary), (1, secondary)):
+        part = long[long["slot"] == slot]
+        idx = type_index.get_indexer(part["type"])
+        ok = idx >= 0
+        target[part["row"].to_numpy(dtype=np.int64)[ok]] = idx[ok]
+
+    generation = pd.to_numeric(df["generation"], errors="coerce").to_numpy()
+    keep = ~np.isnan(generation) & (primary >= 0)
+    generations = np.unique(generation[keep]).astype(np.int64)
+    g = np.searchsorted(generations, generation[keep])
+    legendary = _legendary(df["legendary"])[keep].astype(np.int64) if "legendary" in df.columns else np.zeros(keep.sum(), dtype=np.int64)
+
+    # Vitórias e derrotas por pokémon (0 para quem não lutou)
+    pos = pd.Index(codes.names).get_indexer(df["name"])[keep]
+    fought = pos >= 0
+    wins = np.zeros(len(pos), dtype=np.float64)
+    losses = np.zeros(len(pos), dtype=np.float64)
+    wins[fought] = codes.wins()[pos[fought]]
+    losses[fought] = codes.losses()[pos[fought]]
+
+    n_types, n_secondary = len(OFFICIAL_TYPES_EN), len(OFFICIAL_TYPES_EN) + 1
+    shape = (len(generations), 2, n_types, n_secondary)
+    cell = np.ravel_multi_index((g, legendary, primary[keep], secondary[keep]), shape)
+    size = int(np.prod(shape))
+
+    measures = list(COUNTS)
+    columns = [np.ones(len(cell)), wins, losses]
+    for stat in STAT_COLUMNS:
+        if stat not in df.columns:
+            continue
+        values = pd.to_numeric(df[stat], errors="coerce").to_numpy(dtype=np.float64)[keep]
+        present = ~np.isnan(values)
+        measures += [f"sum_{stat}", f"n_{stat}"]
+        columns += [np.where(present, values, 0.0), present.astype(np.float64)]
+    cells = np.stack([np.bincount(cell, weights=w, minlength=size) for w in columns], axis=-1)
+
+    return StatsCube(
+        generations=generations,
+        legendary=np.array([False, True]),
+        primary_types=list(OFFICIAL_TYPES_EN),
+        secondary_types=list(OFFICIAL_TYPES_EN) + [NO_TYPE],
+        measures=measures,
+        cells=cells.reshape(shape + (len(measures),)),
+        n_excluded=int((~keep).sum()),
+    )
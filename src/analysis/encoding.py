@@ -0,0 +1,164 @@
+"""Codificação inteira dos combates.
+
+Converte as colunas de nomes (first_pokemon, second_pokemon, winner) em
+códigos inteiros com um único `get_indexer`, para que as análises usem
+`np.bincount`/indexação em vez de merges por string. Quando a lista de
+pokémons é informada, o código de cada nome é a posição dele nessa lista
+(nomes que só aparecem nos combates recebem códigos ao final).
+
+Forma compactada: como as métricas só precisam de contagens, `compact()`
+junta os combates repetidos em triplas únicas (first, second, winner) com
+uma coluna `count`. Vitórias, derrotas e participações passam a ser somas
+ponderadas, e o custo fica limitado ao nº de confrontos distintos, não ao
+nº de combates. A ordem dos combates se perde (o Elo precisa do log).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.cache import fingerprint
+
+
+COMBAT_COLUMNS = ("first_pokemon", "second_pokemon", "winner")
+COUNT_COLUMN = "count"
+
+
+@dataclass
+class CombatCodes:
+    names: np.ndarray
+    first: np.ndarray
+    second: np.ndarray
+    winner: np.ndarray
+    count: Optional[np.ndarray] = None  # combates por linha (forma compactada); None = 1 cada
+
+    def __len__(self) -> int:
+        return len(self.winner)
+
+    @property
+    def n_pokemon(self) -> int:
+        return len(self.names)
+
+    @property
+    def n_combats(self) -> int:
+        """Nº de combates representados (soma de `count` na forma compactada)."""
+        return int(self.count.sum()) if self.count is not None else len(self)
+
+    @property
+    def loser(self) -> np.ndarray:
+        return np.where(self.winner == self.first, self.second, self.first)
+
+    def bincount(self, codes: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """`np.bincount` por código de pokémon, ponderado por `count` quando houver."""
+        if weights is None:
+            weights = self.count
+        counts = np.bincount(codes, weights=weights, minlength=self.n_pokemon)
+        return counts.astype(np.int64) if weights is not None else counts
+
+    def wins(self) -> np.ndarray:
+        return self.bincount(self.winner)
+
+    def losses(self) -> np.ndarray:
+        return self.bincount(self.loser)
+
+    def participations(self) -> np.ndarray:
+        return self.bincount(self.first) + self.bincount(self.second)
+
+    def compact(self) -> "CombatCodes":
+        """Triplas únicas (first, second, winner) com `count`, ordenadas."""
+        n = np.int64(max(self.n_pokemon, 1))
+        key = (self.first.astype(np.int64) * n + self.second) * n + self.winner
+        uniq, inverse = np.unique(key, return_inverse=True)
+        count = np.bincount(inverse.ravel(), weights=self.count, minlength=len(uniq)).astype(np.int64)
+        return CombatCodes(
+            names=self.names,
+            first=(uniq // (n * n)).astype(np.int32),
+            second=(uniq // n % n).astype(np.int32),
+            winner=(uniq % n).astype(np.int32),
+            count=count,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Combates com nomes (e a coluna `count`, se compactados)."""
+        df = pd.DataFrame({col: self.names[getattr(self, attr)] for col, attr in zip(COMBAT_COLUMNS, ("first", "second", "winner"))})
+        if self.count is not None:
+            df[COUNT_COLUMN] = self.count
+        return df
+
+
+PREFIX_CHUNK_ROWS = 1 << 20
+
+
+def prefix_signatures(codes: CombatCodes, *stops: tuple[int, int]) -> List[str]:
+    """Hash exato (blake2b) de `codes[:n]` e `names[:n_names]` para cada `(n, n_names)` de `stops`.
+
+    Serve para conferir se um log novo só anexou combates a um já
+    processado: qualquer edição, remoção ou inserção no prefixo muda o hash.
+    Os combates entram linha a linha (first, second, winner[, count]) em
+    blocos de `PREFIX_CHUNK_ROWS`, sempre no mesmo tipo inteiro, então o
+    store (int16) e a codificação em memória (int32) dão o mesmo hash. Os
+    `stops` (em ordem crescente de `n`) saem de uma única passada: conferir
+    o prefixo antigo e assinar o log novo custa uma leitura do log.
+    """
+    columns = [codes.first, codes.second, codes.winner] + ([codes.count] if codes.count is not None else [])
+    dtype = np.int64 if codes.count is not None else np.int32
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str((len(columns), np.dtype(dtype).str)).encode())
+    out, pos = [], 0
+    for n, n_names in stops:
+        n = min(n, len(codes))
+        for a in range(pos, n, PREFIX_CHUNK_ROWS):
+            b = min(a + PREFIX_CHUNK_ROWS, n)
+            h.update(np.stack([np.asarray(c[a:b], dtype=dtype) for c in columns], axis=1).tobytes())
+        pos = max(pos, n)
+        final = h.copy()
+        final.update(fingerprint(n, codes.names[:n_names]).encode())
+        out.append(final.hexdigest())
+    return out
+
+
+def prefix_signature(codes: CombatCodes, n: int, n_names: int) -> str:
+    """`prefix_signatures` de um único prefixo."""
+    return prefix_signatures(codes, (n, n_names))[0]
+
+
+def encode_combats(combats: pd.DataFrame, names: Optional[pd.Series | np.ndarray] = None) -> CombatCodes:
+    """Codifica os combates em inteiros (int32).
+
+    `names` (ex.: `pokemons["name"]`) fixa a ordem dos códigos; linhas com
+    valores ausentes são descartadas. Uma coluna `count` (forma compactada)
+    é preservada como peso.
+    """
+    weighted = COUNT_COLUMN in combats.columns
+    cols = combats[list(COMBAT_COLUMNS) + ([COUNT_COLUMN] if weighted else [])].dropna()
+    values = cols[list(COMBAT_COLUMNS)].to_numpy(dtype=object).ravel(order="F")
+
+    base = pd.Index(pd.unique(np.asarray(names, dtype=object))) if names is not None else pd.Index([], dtype=object)
+    # Uma única passada de hash sobre os combates; o resto é sobre os nomes distintos
+    local, uniq = pd.factorize(values)
+    uniq = np.asarray(uniq, dtype=object)
+    extra = uniq[~pd.Index(uniq).isin(base)]
+    categories = base.append(pd.Index(extra, dtype=object))
+
+    remap = categories.get_indexer(uniq).astype(np.int32)
+    codes = remap[local].reshape(len(COMBAT_COLUMNS), -1)
+    return CombatCodes(
+        names=np.asarray(categories, dtype=object),
+        first=codes[0],
+        second=codes[1],
+        winner=codes[2],
+        count=cols[COUNT_COLUMN].to_numpy(dtype=np.int64) if weighted else None,
+    )
+
+
+def compact_combats(combats: pd.DataFrame, names: Optional[pd.Series | np.ndarray] = None) -> pd.DataFrame:
+    """Colapsa os combates em (first_pokemon, second_pokemon, winner, count).
+
+    Aceita também uma tabela já compactada (as contagens são somadas).
+    """
+    return encode_combats(combats, names).compact().to_frame()
@@ -0,0 +1,118 @@
+"""Intervalos de confiança para a taxa de vitória, vetorizados.
+
+Com `min_battles=1`, quem venceu 1 de 1 combate aparece acima de quem tem
+95% em 200 combates. Ordenar pelo limite inferior do intervalo corrige
+isso. Dois métodos, ambos sobre os arrays inteiros de vitórias/total de
+todos os pokémons de uma vez:
+
+- Wilson (fórmula fechada);
+- bootstrap paramétrico: as réplicas de cada pokémon seguem
+  `binomial(total, p̂)`; em vez de sortear réplica por réplica, o histograma
+  das `n_boot` réplicas é sorteado de uma vez como uma multinomial sobre o
+  suporte 0..total (mesma distribuição, custo proporcional ao suporte e não
+  ao nº de réplicas). Nada de reamostrar o DataFrame.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _z(confidence: float) -> float:
+    from statistics import NormalDist
+
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(wins: np.ndarray, total: np.ndarray, confidence: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+    """Intervalo de Wilson para wins/total (arrays); total 0 vira (0, 1)."""
+    wins = np.asarray(wins, dtype=float)
+    total = np.asarray(total, dtype=float)
+    z = _z(confidence)
+    n = np.where(total > 0, total, 1.0)
+    p = wins / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    lo = np.where(total > 0, np.clip(center - half, 0, 1), 0.0)
+    hi = np.where(total > 0, np.clip(center + half, 0, 1), 1.0)
+    return lo, hi
+
+
+def bootstrap_interval(
+    wins: np.ndarray,
+    total: np.ndarray,
+    *,
+    n_boot: int = 10_000,
+    confidence: float = 0.95,
+    seed: int = 42,
+    max_cells: int = 1_000_000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Intervalo percentil de `n_boot` réplicas binomiais, em lote.
+
+    Para cada pokémon sorteia as contagens das réplicas em cada valor
+    0..total (multinomial com as probabilidades binomiais) e lê os
+    percentis na soma acumulada. `max_cells` limita cada bloco
+    (pokémons x tamanho do suporte, medido pelo maior total do bloco);
+    o pico de memória fica em ~80 bytes por célula (temporários do
+    `binom.pmf` e da multinomial).
+    """
+    from scipy.stats import binom
+
+    wins = np.asarray(wins, dtype=np.int64)
+    total = np.asarray(total, dtype=np.int64)
+    n = len(total)
+    rng = np.random.default_rng(seed)
+    p_hat = np.where(total > 0, wins / np.maximum(total, 1), 0.0)
+    alpha = (1 - confidence) / 2
+    k_lo = int(np.floor(alpha * (n_boot - 1)))
+    k_hi = int(np.ceil((1 - alpha) * (n_boot - 1)))
+
+    lo = np.zeros(n)
+    hi = np.ones(n)
+    # Blocos de pokémons com totais parecidos (menos suporte desperdiçado)
+    order = np.argsort(total, kind="stable")
+    sorted_total = total[order]
+    start = 0
+    while start < n:
+        # Ordem crescente: o suporte do bloco é o do último (maior) total
+        cells = np.arange(1, n - start + 1) * (sorted_total[start:] + 1)
+        rows = max(1, int(np.searchsorted(cells, max_cells, side="right")))
+        idx = order[start:start + rows]
+        support = int(sorted_total[start + len(idx) - 1]) + 1
+        start += len(idx)
+
+        values = np.arange(support)
+        pmf = binom.pmf(values[None, :], total[idx, None], p_hat[idx, None])
+        pmf /= pmf.sum(axis=1, keepdims=True)
+        counts = rng.multinomial(n_boot, pmf)
+        cdf = counts.cumsum(axis=1)
+        # k-ésima réplica ordenada = nº de valores com acumulado <= k
+        t = np.maximum(total[idx], 1)
+        has = total[idx] > 0
+        lo[idx] = np.where(has, (cdf <= k_lo).sum(axis=1) / t, 0.0)
+        hi[idx] = np.where(has, (cdf <= k_hi).sum(axis=1) / t, 1.0)
+    return lo, hi
+
+
+def add_winrate_intervals(
+    perf: pd.DataFrame,
+    *,
+    confidence: float = 0.95,
+    n_boot: int = 10_000,
+    seed: int = 42,
+    bootstrap: bool = True,
+) -> pd.DataFrame:
+    """Acrescenta `wilson_lo/wilson_hi` (e `boot_lo/boot_hi`) a uma tabela de `compute_winrate`."""
+    out = perf.copy()
+    wins = out["wins"].to_numpy()
+    total = out["total"].to_numpy()
+    out["wilson_lo"], out["wilson_hi"] = (np.round(a, 4) for a in wilson_interval(wins, total, confidence))
+    if bootstrap:
+        out["boot_lo"], out["boot_hi"] = (
+            np.round(a, 4) for a in bootstrap_interval(wins, total, n_boot=n_boot, confidence=confidence, seed=seed)
+        )
+    return out
@@ -0,0 +1,238 @@
+"""Manifesto de versão dos dados: hash de conteúdo por tabela e por coluna.
+
+O ETL grava `manifest.json` junto dos CSVs com, para cada tabela
+(pokemons, combats, attributes), o nº de linhas, o hash de cada coluna e o
+hash da tabela; a versão dos dados é o hash das tabelas. Os artefatos
+derivados (ratings, modelo de confrontos, índice de similaridade, figuras
+do dashboard, respostas do serviço HTTP) usam essa versão como chave, em
+vez de recalcular um hash dos dados a cada carga. Como o hash é do
+conteúdo, um snapshot novo com os mesmos dados reaproveita o que já está
+em `data/cache/`.
+
+Hashes: xxh3-128 (pacote `xxhash`, opcional) ou blake2b-128, sobre os
+bytes crus das colunas numéricas e, nas demais, sobre os códigos de
+`pd.factorize` + hash dos valores distintos (mesmo resultado com dtype
+object ou str, ou seja, antes de gravar e depois de ler o CSV).
+
+O manifesto guarda também tamanho e mtime de cada arquivo; se algum CSV
+mudar por fora do ETL, `read_manifest` o descarta e quem usa volta ao hash
+dos dados em memória.
+
+Uso avulso (grava o manifesto de CSVs já existentes)::
+
+    python -m src.analysis.manifest [data_dir]
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - dependência opcional
+    xxhash = None
+
+
+MANIFEST_FILE = "manifest.json"
+TABLE_FILES = {
+    "pokemons": "pokemons.csv",
+    "combats": "combats.csv",
+    "attributes": "pokemon_attributes.csv",
+}
+HASH_ALGORITHM = "xxh3_128" if xxhash is not None else "blake2b_128"
+
+
+def _hasher():
+    return xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+
+def _combine(*parts: str) -> str:
+    h = _hasher()
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+def column_hash(values: pd.Series) -> str:
+    """Hash do conteúdo de uma coluna (sem o índice)."""
+    h = _hasher()
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+        arr = np.ascontiguousarray(values.to_numpy())
+        h.update(f"{arr.dtype.str}:{len(arr)}|".encode())
+        h.update(arr.view(np.uint8))
+        return h.hexdigest()
+    try:
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    except TypeError:
+        # Valores não hasheáveis (ex.: listas): compara pela forma em texto, como no CSV
+        codes, uniques = pd.factorize(values.astype(str), use_na_sentinel=True)
+    h.update(f"factor:{len(codes)}:{len(uniques)}|".encode())
+    h.update(pd.util.hash_array(np.asarray(uniques, dtype=object)).tobytes())
+    h.update(codes.astype(np.int32 if len(uniques) < np.iinfo(np.int32).max else np.int64).tobytes())
+    return h.hexdigest()
+
+
+@dataclass
+class TableVersion:
+    file: str
+    rows: int
+    hash: str
+    columns: Dict[str, str]       # coluna -> hash
+    size: int = 0                 # tamanho e mtime do arquivo gravado
+    mtime_ns: int = 0
+
+
+@dataclass
+class DataManifest:
+    algorithm: str
+    tables: Dict[str, TableVersion]
+    created_at: str = field(default_factory=lambda: time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+
+    @property
+    def version(self) -> str:
+        """Versão dos dados: hash de todas as tabelas."""
+        return self.key(*TABLE_FILES)
+
+    def key(self, *tables: str, columns: Optional[Mapping[str, Sequence[str]]] = None) -> str:
+        """Hash só das tabelas (ou colunas, por tabela em `columns`) de que um artefato depende."""
+        columns = columns or {}
+        parts = [self.algorithm]
+        for name in sorted(set(tables) | set(columns)):
+            table = self.tables.get(name)
+            if table is None:
+                parts.append(f"{name}:-")
+            elif name in columns:
+                parts.append(f"{name}:{table.rows}:" + ",".join(
+                    f"{c}={table.columns.get(c, '-')}" for c in columns[name]
+                ))
+            else:
+                parts.append(f"{name}:{table.hash}")
+        return _combine(*parts)
+
+    def changed(self, previous: Optional["DataManifest"]) -> Dict[str, List[str]]:
+        """Tabela -> colunas alteradas em relação a `previous` (`["*"]` se a tabela é nova ou mudou de forma)."""
+        out: Dict[str, List[str]] = {}
+        for name, table in self.tables.items():
+            old = previous.tables.get(name) if previous is not None and previous.algorithm == self.algorithm else None
+            if old is None or old.rows != table.rows or set(old.columns) != set(table.columns):
+                out[name] = ["*"]
+                continue
+            cols = [c for c, h in table.columns.items() if old.columns.get(c) != h]
+            if cols:
+                out[name] = cols
+        return out
+
+    def is_current(self, data_dir: Path | str) -> bool:
+        """Os arquivos em `data_dir` ainda são os que o manifesto descreve (tamanho e mtime)?"""
+        data_dir = Path(data_dir)
+        for table in self.tables.values():
+            try:
+                stat = (data_dir / table.file).stat()
+            except OSError:
+                return False
+            if (stat.st_size, stat.st_mtime_ns) != (table.size, table.mtime_ns):
+                return False
+        return True
+
+    def to_dict(self) -> dict:
+        return {"version": self.version, **asdict(self)}
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "DataManifest":
+        tables = {name: TableVersion(**t) for name, t in raw["tables"].items()}
+        return cls(algorithm=raw["algorithm"], tables=tables, created_at=raw.get("created_at", ""))
+
+
+def table_version(df: pd.DataFrame, file: str) -> TableVersion:
+    cols = {str(c): column_hash(df[c]) for c in df.columns}
+    digest = _combine(str(len(df)), *(f"{c}={h}" for c, h in cols.items()))
+    return TableVersion(file=file, rows=len(df), hash=digest, columns=cols)
+
+
+def build_manifest(tables: Mapping[str, Optional[pd.DataFrame]], data_dir: Path | str | None = None) -> DataManifest:
+    """Manifesto das tabelas em memória; com `data_dir`, registra tamanho/mtime dos CSVs já gravados."""
+    versions = {}
+    for name, df in tables.items():
+        if df is None:
+            continue
+        versions[name] = table_version(df, TABLE_FILES.get(name, f"{name}.csv"))
+    manifest = DataManifest(algorithm=HASH_ALGORITHM, tables=versions)
+    if data_dir is not None:
+        stamp_files(manifest, data_dir)
+    return manifest
+
+
+def stamp_files(manifest: DataManifest, data_dir: Path | str) -> DataManifest:
+    """Atualiza tamanho/mtime de cada tabela a partir dos arquivos em `data_dir`."""
+    for table in manifest.tables.values():
+        path = Path(data_dir) / table.file
+        if path.exists():
+            stat = path.stat()
+            table.size, table.mtime_ns = stat.st_size, stat.st_mtime_ns
+    return manifest
+
+
+def write_manifest(manifest: DataManifest, data_dir: Path | str) -> Path:
+    """Grava `data_dir/manifest.json` (arquivo temporário + `os.replace`)."""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / MANIFEST_FILE
+    fd, tmp = tempfile.mkstemp(dir=data_dir, prefix=f"{MANIFEST_FILE}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(manifest.to_dict(), fh, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def read_manifest(data_dir: Path | str, *, check: bool = True) -> Optional[DataManifest]:
+    """Manifesto de `data_dir`, ou `None` se não existir, estiver corrompido ou (com `check`) desatualizado."""
+    path = Path(data_dir) / MANIFEST_FILE
+    try:
+        manifest = DataManifest.from_dict(json.loads(path.read_text(encoding="utf-8")))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if manifest.algorithm != HASH_ALGORITHM:
+        return None
+    if check and not manifest.is_current(data_dir):
+        return None
+    return manifest
+
+
+def manifest_from_csvs(data_dir: Path | str) -> DataManifest:
+    """Calcula o manifesto lendo os CSVs de `data_dir` (dados gerados antes do manifesto)."""
+    data_dir = Path(data_dir)
+    tables = {}
+    for name, file in TABLE_FILES.items():
+        path = data_dir / file
+        if path.exists():
+            tables[name] = pd.read_csv(path, sep=";", encoding="utf-8-sig")
+    return build_manifest(tables, data_dir)
+
+
+if __name__ == "__main__":
+    import sys
+
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data")
+    start = time.perf_counter()
+    manifest = manifest_from_csvs(target)
+    path = write_manifest(manifest, target)
+    print(f"Manifesto gerado: {path} ({time.perf_counter() - start:.2f}s)")
+    print("versão:", manifest.version)
+    for name, table in manifest.tables.items():
+        print(f"- {name}: {table.rows} linhas, {table.hash}")
@@ -2,52 +2,111 @@
 
 Carrega CSVs, calcula participações, taxa de vitória e integra com
 atributos para visualizações e análises no Streamlit.
+
+As métricas de combates aceitam também a forma compactada (ver
+`src.analysis.encoding.compact_combats`): com uma coluna `count`, cada
+linha vale `count` combates.
 """
 
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Iterator, Tuple, Optional
 
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
 
 
-def load_data(data_dir: Path | str = "data") -> Tuple[pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame]]:
+def load_data(
+    data_dir: Path | str = "data", *, combats: bool = True
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+    """pokemons, combats e attrs; `combats=False` não lê o log (devolve `None` no lugar)."""
     data_dir = Path(data_dir)
     pokemons = pd.read_csv(data_dir / "pokemons.csv", sep=";", encoding="utf-8-sig")
-    combats = pd.read_csv(data_dir / "combats.csv", sep=";", encoding="utf-8-sig")
+    if combats:
+        combats = pd.read_csv(data_dir / "combats.csv", sep=";", encoding="utf-8-sig")
+    else:
+        combats = None
     attrs_path = data_dir / "pokemon_attributes.csv"
     attrs = pd.read_csv(attrs_path, sep=";", encoding="utf-8-sig") if attrs_path.exists() else None
     return pokemons, combats, attrs
 
 
+def iter_combat_chunks(data_dir: Path | str = "data", chunksize: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """Lê `combats.csv` em blocos (memória limitada), para as análises aproximadas."""
+    path = Path(data_dir) / "combats.csv"
+    yield from pd.read_csv(
+        path,
+        sep=";",
+        encoding="utf-8-sig",
+        usecols=["first_pokemon", "second_pokemon", "winner"],
+        chunksize=chunksize,
+    )
+
+
+def ensure_overall(attrs: pd.DataFrame) -> pd.DataFrame:
+    """Garante colunas numericas e calcula overall (inteiro)."""
+    df = attrs.copy()
+    stats = ["hp", "attack", "defense", "sp_attack", "sp_defense", "speed"]
+    for col in stats:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    if "overall" not in df.columns and all(c in df.columns for c in stats):
+        df["overall"] = (
+            df["hp"]
+            + df["attack"]
+            + df["defense"]
+            + df["sp_attack"]
+            + df["sp_defense"]
+            + df["speed"]
+        )
+    if "overall" in df.columns:
+        df["overall"] = pd.to_numeric(df["overall"], errors="coerce").round(0).astype("Int64")
+    if "types" not in df.columns:
+        df["types"] = None
+    return df
+
+
 # ---------------------
 # Métricas básicas
 # ---------------------
 
+def _counts(combats: pd.DataFrame, keys: pd.Series | np.ndarray, dropna: bool = True) -> pd.Series:
+    """Contagem por valor de `keys`, ponderada por `count` na forma compactada."""
+    if "count" not in combats.columns:
+        return pd.Series(keys).value_counts(dropna=dropna)
+    return combats["count"].groupby(np.asarray(keys), dropna=dropna).sum().sort_values(ascending=False)
+
+
 def compute_participations(combats: pd.DataFrame) -> pd.DataFrame:
-    first_counts = combats["first_pokemon"].value_counts(dropna=False)
-    second_counts = combats["second_pokemon"].value_counts(dropna=False)
-    total = (first_counts.add(second_counts, fill_value=0)).rename("participations").reset_index()
-    total = total.rename(columns={"index": "name"})
+    first_counts = _counts(combats, combats["first_pokemon"], dropna=False)
+    second_counts = _counts(combats, combats["second_pokemon"], dropna=False)
+    total = first_counts.add(second_counts, fill_value=0).rename("participations")
+    total.index.name = "name"
+    total = total.reset_index()
     total = total.sort_values("participations", ascending=False, ignore_index=True)
     return total
 
 
 def compute_winrate(combats: pd.DataFrame, min_battles: int = 1) -> pd.DataFrame:
-    winners = combats["winner"].value_counts().rename("wins")
-
-    losers = (
-        pd.concat([
-            combats[["first_pokemon", "winner"]].rename(columns={"first_pokemon": "p"}),
-            combats[["second_pokemon", "winner"]].rename(columns={"second_pokemon": "p"}),
-        ])
-        .query("p != winner")
-        ["p"].value_counts()
-        .rename("losses")
-    )
+    winners = _counts(combats, combats["winner"]).rename("wins")
+
+    if "count" in combats.columns:
+        # Forma compactada: perdedor por linha, somando `count`
+        first_lost = combats["first_pokemon"] != combats["winner"]
+        loser = combats["first_pokemon"].where(first_lost, combats["second_pokemon"])
+        valid = combats["winner"].notna() & (first_lost | (combats["second_pokemon"] != combats["winner"]))
+        losers = _counts(combats[valid], loser[valid]).rename("losses")
+    else:
+        losers = (
+            pd.concat([
+                combats[["first_pokemon", "winner"]].rename(columns={"first_pokemon": "p"}),
+                combats[["second_pokemon", "winner"]].rename(columns={"second_pokemon": "p"}),
+            ])
+            .query("p != winner")
+            ["p"].value_counts()
+            .rename("losses")
+        )
 
     perf = pd.DataFrame({"wins": winners}).join(losers, how="outer").fillna(0)
     perf.index.name = "name"
@@ -61,58 +120,28 @@ def compute_winrate(combats: pd.DataFrame, min_battles: int = 1) -> pd.DataFrame
     return perf
 
 
-# ---------------------
-# Integração com atributos
-# ---------------------
-
-def _extract_types_column(attrs: pd.DataFrame) -> pd.DataFrame:
-    """Cria linhas por tipo (explode) e padroniza a coluna 'type'.
-    Tenta suportar formatos comuns: 'types' como lista de strings, string com vírgulas,
-    lista de dicts com chave 'name', ou campos 'type'/'primary_type'/'secondary_type'.
-    """
-    if attrs is None or attrs.empty:
-        return pd.DataFrame(columns=["id", "type"])  # vazio
+def participations_from_codes(codes) -> pd.DataFrame:
+    """`compute_participations` sobre combates codificados (`CombatCodes`, ex.: store memmap)."""
+    counts = codes.participations()
+    seen = counts > 0
+    total = pd.DataFrame({"name": codes.names[seen], "participations": counts[seen]})
+    return total.sort_values("participations", ascending=False, ignore_index=True, kind="stable")
 
-    df = attrs.copy()
 
-    # Preferência: coluna 'types'
-    if "types" in df.columns:
-        series = df["types"].copy()
-
-        def normalize_cell(v):
-            if isinstance(v, list):
-                if not v:
-                    return []
-                if all(isinstance(x, str) for x in v):
-                    return v
-                if all(isinstance(x, dict) for x in v):
-                    out = []
-                    for d in v:
-                        name = d.get("name") or d.get("type") or d.get("Type")
-                        if name:
-                            out.append(str(name))
-                    return out
-                return [str(x) for x in v]
-            if isinstance(v, str):
-                # separa por vírgula
-                return [s.strip() for s in v.split(",") if s.strip()]
-            return []
-
-        types_norm = series.apply(normalize_cell)
-        exploded = df[["id"]].join(types_norm.rename("type")).explode("type")
-        exploded = exploded.dropna(subset=["type"])  # remove vazios
-        return exploded[["id", "type"]].reset_index(drop=True)
-
-    # Alternativas por colunas separadas
-    for col in ("type", "Type", "primary_type", "secondary_type"):
-        if col in df.columns:
-            tmp = df[["id", col]].rename(columns={col: "type"}).copy()
-            tmp = tmp.dropna(subset=["type"])  # remove vazios
-            return tmp.reset_index(drop=True)
+def winrate_from_codes(codes, min_battles: int = 1) -> pd.DataFrame:
+    """`compute_winrate` sobre combates codificados (`CombatCodes`, ex.: store memmap)."""
+    wins = codes.wins()
+    losses = codes.losses()
+    perf = pd.DataFrame({"name": codes.names, "wins": wins, "losses": losses, "total": wins + losses})
+    perf = perf[(perf["total"] > 0) & (perf["total"] >= min_battles)].copy()
+    perf["win_rate"] = (perf["wins"] / perf["total"]).round(4)
+    perf = perf.sort_values(["win_rate", "total", "wins"], ascending=[False, False, False], ignore_index=True)
+    return perf
 
-    # Sem colunas de tipo
-    return pd.DataFrame(columns=["id", "type"])  # vazio
 
+# ---------------------
+# Integração com atributos
+# ---------------------
 
 def compute_type_winrate(
     winrate: pd.DataFrame, pokemons: pd.DataFrame, attrs: Optional[pd.DataFrame]
@@ -121,28 +150,39 @@ def compute_type_winrate(
 
     - Explode pokémons com dois tipos: cada tipo recebe o registro (sem categoria combinada).
     - Retorna apenas média simples e contagem de pokémons, para visual mais claro.
+    - Usa a matriz de pertinência pokémon × tipo de `src.analysis.type_stats`
+      (um produto de matrizes em vez de explode + merges).
     """
+    from src.analysis.type_stats import type_membership
+
     if attrs is None or attrs.empty:
         return pd.DataFrame(columns=["type", "taxa_media_vitoria", "qtd_pokemons"])
 
-    types_df = _extract_types_column(attrs)
-    wr = winrate.merge(pokemons, on="name", how="left")
-    wr_types = wr.merge(types_df, on="id", how="left").dropna(subset=["type"])
-
-    if wr_types.empty:
+    attrs = attrs.drop_duplicates("id").reset_index(drop=True)
+    type_list, membership = type_membership(attrs)
+    name_to_id = pokemons.drop_duplicates("name").set_index("name")["id"]
+    rows = pd.Index(attrs["id"]).get_indexer(winrate["name"].map(name_to_id))
+    keep = rows >= 0
+    if not type_list or not keep.any():
         return pd.DataFrame(columns=["type", "taxa_media_vitoria", "qtd_pokemons"])
 
-    grouped = wr_types.groupby("type", as_index=False).agg(
-        taxa_media_vitoria=("win_rate", "mean"),
-        qtd_pokemons=("name", "nunique"),
-    )
+    values = np.column_stack([np.ones(keep.sum()), winrate["win_rate"].to_numpy(dtype=float)[keep]])
+    sums = membership[rows[keep]].T @ values
+    grouped = pd.DataFrame({"type": type_list, "qtd_pokemons": sums[:, 0].astype(int), "soma": sums[:, 1]})
+    grouped = grouped[grouped["qtd_pokemons"] > 0]
+    grouped["taxa_media_vitoria"] = grouped["soma"] / grouped["qtd_pokemons"]
+    grouped = grouped[["type", "taxa_media_vitoria", "qtd_pokemons"]]
     return grouped.sort_values("taxa_media_vitoria", ascending=False, ignore_index=True)
 
 
 def build_winrate_with_attrs(
-    combats: pd.DataFrame, pokemons: pd.DataFrame, attrs: Optional[pd.DataFrame], min_battles: int = 5
+    combats, pokemons: pd.DataFrame, attrs: Optional[pd.DataFrame], min_battles: int = 5
 ) -> pd.DataFrame:
-    wr = compute_winrate(combats, min_battles=min_battles)
+    """Taxa de vitória unida aos atributos; `combats` pode ser o DataFrame ou `CombatCodes`."""
+    if isinstance(combats, pd.DataFrame):
+        wr = compute_winrate(combats, min_battles=min_battles)
+    else:
+        wr = winrate_from_codes(combats, min_battles=min_battles)
     if attrs is None or attrs.empty:
         return wr
     wr_id = wr.merge(pokemons, on="name", how="left")  # adiciona id
@@ -150,42 +190,31 @@ def build_winrate_with_attrs(
     return merged
 
 
-def compute_numeric_correlations(wr_attrs: pd.DataFrame) -> pd.DataFrame:
-    """Retorna correlações Pearson entre colunas numéricas de atributos e win_rate."""
+def compute_numeric_correlations(wr_attrs: pd.DataFrame, method: str = "pearson") -> pd.DataFrame:
+    """Retorna correlações (Pearson ou Spearman) entre colunas numéricas de atributos e win_rate.
+
+    Usa o motor vetorizado de `src.analysis.correlations`; para p-valores e
+    recortes por geração/tipo use `correlate_with_target`/`grouped_correlations`.
+    """
+    from src.analysis.correlations import correlate_with_target
+
     if wr_attrs is None or wr_attrs.empty or "win_rate" not in wr_attrs.columns:
         return pd.DataFrame(columns=["attribute", "corr"])
-    numeric_cols = wr_attrs.select_dtypes(include=[np.number]).columns.tolist()
-    numeric_cols = [c for c in numeric_cols if c not in ("id", "wins", "losses", "total")]
-    out = []
-    for col in numeric_cols:
-        try:
-            corr = wr_attrs["win_rate"].corr(wr_attrs[col])
-        except Exception:
-            corr = np.nan
-        if pd.notna(corr):
-            out.append({"attribute": col, "corr": float(corr)})
-    return pd.DataFrame(out).sort_values("corr", ascending=False, ignore_index=True)
-
-
-def compute_feature_importance(wr_attrs: pd.DataFrame, max_features: int = 12) -> pd.DataFrame:
-    """Treina um RandomForestRegressor simples para estimar importâncias de atributos numéricos."""
-    if wr_attrs is None or wr_attrs.empty or "win_rate" not in wr_attrs.columns:
-        return pd.DataFrame(columns=["attribute", "importance"])
-    numeric_cols = wr_attrs.select_dtypes(include=[np.number]).columns.tolist()
-    feature_cols = [c for c in numeric_cols if c not in ("id", "wins", "losses", "total", "win_rate")]
-    feature_cols = feature_cols[:max_features]
-    if not feature_cols:
-        return pd.DataFrame(columns=["attribute", "importance"])
-    X = wr_attrs[feature_cols].fillna(0.0).values
-    y = wr_attrs["win_rate"].values
-    try:
-        model = RandomForestRegressor(n_estimators=200, random_state=42)
-        model.fit(X, y)
-        imp = model.feature_importances_
-        df = pd.DataFrame({"attribute": feature_cols, "importance": imp})
-        return df.sort_values("importance", ascending=False, ignore_index=True)
-    except Exception:
-        return pd.DataFrame(columns=["attribute", "importance"])
+    res = correlate_with_target(wr_attrs, "win_rate")
+    out = res[["attribute", method]].rename(columns={method: "corr"}).dropna(subset=["corr"])
+    out["corr"] = out["corr"].astype(float)
+    return out.sort_values("corr", ascending=False, ignore_index=True)
+
+
+def compute_feature_importance(wr_attrs: pd.DataFrame, max_features: int = 12, mode: str = "full") -> pd.DataFrame:
+    """Estima importâncias de atributos numéricos com um RandomForestRegressor.
+
+    Delegado a `src.analysis.models`: treino paralelo, cache por hash dos
+    dados e `mode="fast"` (aproximado) para uso interativo.
+    """
+    from src.analysis.models import get_feature_importance_service
+
+    return get_feature_importance_service().feature_importance(wr_attrs, max_features=max_features, mode=mode)
 
 
 def suggest_team(wr_attrs: pd.DataFrame, team_size: int = 6) -> pd.DataFrame:
@@ -239,30 +268,25 @@ def suggest_team(wr_attrs: pd.DataFrame, team_size: int = 6) -> pd.DataFrame:
 def compute_h2h(combats: pd.DataFrame, top_n: int = 20) -> pd.DataFrame:
     """Matriz de vitórias do A (linhas) sobre B (colunas) para os Top N por participações."""
     # Top N por participação total
-    first_counts = combats["first_pokemon"].value_counts()
-    second_counts = combats["second_pokemon"].value_counts()
+    first_counts = _counts(combats, combats["first_pokemon"])
+    second_counts = _counts(combats, combats["second_pokemon"])
     total = (first_counts.add(second_counts, fill_value=0)).sort_values(ascending=False)
-    top = set(total.head(top_n).index.tolist())
-
-    # Constrói pares (winner, loser) por combate
-    rows = []
-    for _, row in combats.iterrows():
-        w = row["winner"]
-        a = row["first_pokemon"]
-        b = row["second_pokemon"]
-        loser = b if w == a else a
-        rows.append((w, loser))
-
-    df_pairs = pd.DataFrame(rows, columns=["winner", "loser"])
-    df_pairs = df_pairs[df_pairs["winner"].isin(top) & df_pairs["loser"].isin(top)]
-
-    # Pivot (contagem) e ordenação consistente
-    pivot = pd.pivot_table(
-        df_pairs, index="winner", columns="loser", values="loser", aggfunc="count", fill_value=0
+    top = total.head(top_n).index
+
+    # Pares (winner, loser) por combate, vetorizado
+    w = combats["winner"]
+    loser = combats["second_pokemon"].where(w == combats["first_pokemon"], combats["first_pokemon"])
+    weights = combats["count"] if "count" in combats.columns else pd.Series(1, index=combats.index)
+    keep = w.isin(top) & loser.isin(top) & (w != loser)
+
+    # Contagem por par e ordenação consistente (diagonal zerada)
+    ordered = sorted(top.tolist())
+    pivot = (
+        weights[keep]
+        .groupby([w[keep].rename("winner"), loser[keep].rename("loser")])
+        .sum()
+        .unstack("loser", fill_value=0)
+        .reindex(index=ordered, columns=ordered, fill_value=0)
+        .astype(np.int64)
     )
-    ordered = sorted(top)
-    pivot = pivot.reindex(index=ordered, columns=ordered, fill_value=0)
-    for n in pivot.index:
-        if n in pivot.columns:
-            pivot.loc[n, n] = 0
     return pivot
@@ -0,0 +1,137 @@
+"""Serviço de modelos: importância de atributos com treino paralelo e cache.
+
+Envolve o RandomForestRegressor usado em `compute_feature_importance`:
+treina com todos os núcleos (`n_jobs=-1`), guarda modelo e importâncias
+chaveados pelo hash dos dados de entrada e oferece um modo rápido
+(menos árvores + importância por permutação numa subamostra) para uso
+interativo no dashboard.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.cache import ArtifactCache, DEFAULT_CACHE_DIR, fingerprint
+
+
+EXCLUDED_COLUMNS = ("id", "wins", "losses", "total", "win_rate")
+
+MODES = ("full", "fast")
+
+
+@dataclass
+class ImportanceResult:
+    importances: pd.DataFrame
+    model: Any
+    features: List[str]
+    mode: str
+    key: str
+    fit_seconds: float
+
+
+def select_features(wr_attrs: pd.DataFrame, max_features: int = 12) -> List[str]:
+    """Colunas numéricas usadas como atributos (sem ids e contagens de combate)."""
+    numeric_cols = wr_attrs.select_dtypes(include=[np.number]).columns.tolist()
+    feature_cols = [c for c in numeric_cols if c not in EXCLUDED_COLUMNS]
+    return feature_cols[:max_features]
+
+
+class FeatureImportanceService:
+    """Treina e guarda modelos de importância de atributos.
+
+    - `mode="full"`: 200 árvores, importância por impureza (comportamento original).
+    - `mode="fast"`: 50 árvores em subamostras e importância por permutação
+      calculada sobre no máximo `fast_sample` linhas.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path | str] = DEFAULT_CACHE_DIR,
+        *,
+        n_jobs: int = -1,
+        random_state: int = 42,
+        fast_sample: int = 500,
+    ):
+        self.cache = ArtifactCache("feature_importance", cache_dir=cache_dir)
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.fast_sample = fast_sample
+
+    def fit(self, wr_attrs: pd.DataFrame, *, max_features: int = 12, mode: str = "full") -> Optional[ImportanceResult]:
+        """Retorna o resultado em cache ou treina um novo modelo.
+
+        Devolve `None` quando não há dados ou atributos numéricos para treinar.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Modo inválido: {mode!r} (use um de {MODES})")
+        if wr_attrs is None or wr_attrs.empty or "win_rate" not in wr_attrs.columns:
+            return None
+        feature_cols = select_features(wr_attrs, max_features)
+        if not feature_cols:
+            return None
+
+        X = wr_attrs[feature_cols].fillna(0.0).to_numpy(dtype=float)
+        y = wr_attrs["win_rate"].to_numpy(dtype=float)
+        key = fingerprint("rf", mode, self.random_state, self.fast_sample, feature_cols, X, y)
+        return self.cache.get_or_compute(key, lambda: self._train(X, y, feature_cols, mode, key))
+
+    def feature_importance(self, wr_attrs: pd.DataFrame, *, max_features: int = 12, mode: str = "full") -> pd.DataFrame:
+        result = self.fit(wr_attrs, max_features=max_features, mode=mode)
+        if result is None:
+            return pd.DataFrame(columns=["attribute", "importance"])
+        return result.importances.copy()
+
+    def _train(self, X: np.ndarray, y: np.ndarray, feature_cols: List[str], mode: str, key: str) -> ImportanceResult:
+        from sklearn.ensemble import RandomForestRegressor
+
+        start = time.perf_counter()
+        if mode == "full":
+            model = RandomForestRegressor(n_estimators=200, random_state=self.random_state, n_jobs=self.n_jobs)
+            model.fit(X, y)
+            imp = model.feature_importances_
+        else:
+            from sklearn.inspection import permutation_importance
+
+            model = RandomForestRegressor(
+                n_estimators=50,
+                max_samples=min(1.0, 2000 / max(len(y), 1)),
+                random_state=self.random_state,
+                n_jobs=self.n_jobs,
+            )
+            model.fit(X, y)
+            rng = np.random.default_rng(self.random_state)
+            idx = rng.choice(len(y), size=min(self.fast_sample, len(y)), replace=False)
+            perm = permutation_importance(
+                model, X[idx], y[idx], n_repeats=5, random_state=self.random_state, n_jobs=self.n_jobs
+            )
+            imp = np.clip(perm.importances_mean, 0.0, None)
+            if imp.sum() > 0:
+                imp = imp / imp.sum()
+
+        df = pd.DataFrame({"attribute": feature_cols, "importance": imp})
+        df = df.sort_values("importance", ascending=False, ignore_index=True)
+        return ImportanceResult(
+            importances=df,
+            model=model,
+            features=feature_cols,
+            mode=mode,
+            key=key,
+            fit_seconds=time.perf_counter() - start,
+        )
+
+
+_default_service: Optional[FeatureImportanceService] = None
+
+
+def get_feature_importance_service() -> FeatureImportanceService:
+    """Instância compartilhada do serviço (cache em `data/cache/`)."""
+    global _default_service
+    if _default_service is None:
+        _default_service = FeatureImportanceService()
+    return _default_service
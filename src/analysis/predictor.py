@@ -0,0 +1,221 @@
+"""Previsão de confrontos A x B a partir de atributos e tipos.
+
+Regressão logística treinada nos combates históricos sobre diferenças
+entre os lutadores:
+
+- atributos padronizados (z-score) e `legendary`: f(A) - f(B);
+- tipos: pertinência de A menos a de B, e as interações tipo de A × tipo
+  de B na forma antissimétrica (t_A[a]·t_B[b] - t_A[b]·t_B[a]).
+
+Sem intercepto, o modelo é antissimétrico: P(A vence B) = 1 - P(B vence A).
+Por isso o logit de todos os pares sai de uma só conta vetorizada,
+s[:, None] - s[None, :] + T W T', com s = F w (força de cada pokémon) e W
+(18 x 18) a matriz antissimétrica das interações. Com ~800 pokémons são
+~640 mil pares em poucos milissegundos, e a matriz fica em cache por
+versão dos dados. Pares que nunca lutaram também recebem probabilidade.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.cache import ArtifactCache, DEFAULT_CACHE_DIR, fingerprint
+from src.analysis.encoding import CombatCodes
+from src.analysis.type_stats import OFFICIAL_TYPES_EN, type_membership
+
+
+STAT_FEATURES = ("hp", "attack", "defense", "sp_attack", "sp_defense", "speed")
+
+_cache = ArtifactCache("matchup_model", cache_dir=DEFAULT_CACHE_DIR, max_entries=4)
+
+
+@dataclass
+class MatchupModel:
+    names: np.ndarray
+    features: List[str]          # atributos (padronizados) + tipos
+    coef: np.ndarray             # peso de cada feature na diferença A - B
+    type_names: List[str]
+    type_interactions: np.ndarray  # 18 x 18, antissimétrica
+    z: np.ndarray                # features por pokémon (n x p, tipos incluídos)
+    types: np.ndarray            # pertinência por pokémon (n x 18)
+    probs: np.ndarray            # P(linha vence coluna), float32 (n x n)
+    accuracy: float              # em combates fora do treino
+    log_loss: float
+    n_train: int
+    fit_seconds: float
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def position(self, name: str) -> int:
+        hits = np.flatnonzero(self.names == name)
+        if len(hits) == 0:
+            raise KeyError(f"Pokémon sem atributos para o modelo: {name!r}")
+        return int(hits[0])
+
+    def probability(self, a: str, b: str) -> float:
+        """P(`a` vence `b`), lida da matriz pronta."""
+        return float(self.probs[self.position(a), self.position(b)])
+
+    def probabilities(self, first: Sequence[str], second: Sequence[str]) -> np.ndarray:
+        """P(first[k] vence second[k]) para vários pares; NaN quando falta algum pokémon."""
+        index = pd.Index(self.names)
+        i = index.get_indexer(pd.Index(first))
+        j = index.get_indexer(pd.Index(second))
+        ok = (i >= 0) & (j >= 0)
+        out = np.full(len(i), np.nan)
+        out[ok] = self.probs[i[ok], j[ok]]
+        return out
+
+    def explain(self, a: str, b: str) -> pd.DataFrame:
+        """Contribuição (em logit) de cada feature e das interações de tipo para `a` x `b`."""
+        i, j = self.position(a), self.position(b)
+        contrib = self.coef * (self.z[i] - self.z[j])
+        out = pd.DataFrame({"feature": self.features, "contribution": contrib})
+        cross = float(self.types[i] @ self.type_interactions @ self.types[j])
+        out = pd.concat(
+            [out, pd.DataFrame({"feature": ["type_matchup"], "contribution": [cross]})], ignore_index=True
+        )
+        out = out[out["contribution"] != 0]
+        return out.sort_values("contribution", key=np.abs, ascending=False, ignore_index=True)
+
+    def best_matchups(self, name: str, k: int = 10, *, worst: bool = False) -> pd.DataFrame:
+        """Adversários com maior (ou menor, `worst=True`) P(`name` vence)."""
+        i = self.position(name)
+        row = self.probs[i].astype(np.float64)
+        row[i] = np.nan
+        order = np.argsort(row if worst else -row, kind="stable")
+        order = order[~np.isnan(row[order])][:k]
+        return pd.DataFrame({"opponent": self.names[order], "win_prob": np.round(row[order], 4)})
+
+
+def pokemon_features(attrs: pd.DataFrame):
+    """Uma linha por nome: (nomes, z-scores + legendary, nomes das features, pertinência a tipos)."""
+    df = attrs.dropna(subset=["name"]).drop_duplicates("name").reset_index(drop=True)
+    stats = [c for c in STAT_FEATURES if c in df.columns]
+    raw = df[stats].apply(pd.to_numeric, errors="coerce")
+    raw = raw.fillna(raw.mean()).to_numpy(dtype=np.float64)
+    std = raw.std(axis=0)
+    z = (raw - raw.mean(axis=0)) / np.where(std > 0, std, 1.0)
+    names = list(stats)
+    if "legendary" in df.columns:
+        legendary = df["legendary"].astype(str).str.strip().str.lower().isin(("true", "1", "yes"))
+        z = np.column_stack([z, legendary.to_numpy(dtype=np.float64)])
+        names.append("legendary")
+    _, types = type_membership(df, OFFICIAL_TYPES_EN)
+    return df["name"].to_numpy(dtype=object), z, names, types
+
+
+def _pair_features(z: np.ndarray, types: np.ndarray, a: np.ndarray, b: np.ndarray, iu) -> np.ndarray:
+    ta, tb = types[a], types[b]
+    cross = np.einsum("ma,mb->mab", ta, tb)
+    cross = cross - cross.transpose(0, 2, 1)
+    return np.hstack([z[a] - z[b], ta - tb, cross[:, iu[0], iu[1]]])
+
+
+def fit_matchup_model(
+    codes: CombatCodes,
+    attrs: pd.DataFrame,
+    *,
+    version: Optional[str] = None,
+    C: float = 1.0,
+    holdout: float = 0.2,
+    seed: int = 42,
+) -> Optional[MatchupModel]:
+    """Treina o modelo nos combates (`codes`, completo ou compactado) e monta a matriz de pares.
+
+    Combates com algum pokémon sem atributos ficam de fora. A acurácia e o
+    log-loss vêm de `holdout` dos combates; o modelo final usa todos.
+    Devolve `None` sem combates utilizáveis. Resultado em cache por versão
+    dos dados (`version`, do manifesto) ou hash dos combates e atributos.
+    """
+    if attrs is None or attrs.empty or "name" not in attrs.columns or len(codes) == 0:
+        return None
+    data_key = (
+        (version,)
+        if version is not None
+        else (codes.names, codes.first, codes.second, codes.winner, codes.count if codes.count is not None else "-", attrs)
+    )
+    key = fingerprint("matchup", C, holdout, seed, *data_key)
+    return _cache.get_or_compute(key, lambda: _fit(codes, attrs, C, holdout, seed))
+
+
+def _fit(codes: CombatCodes, attrs: pd.DataFrame, C: float, holdout: float, seed: int) -> Optional[MatchupModel]:
+    from sklearn.linear_model import LogisticRegression
+
+    start = time.perf_counter()
+    names, z, feature_names, types = pokemon_features(attrs)
+    # Código do combate -> linha das features (-1 sem atributos)
+    row_of = np.append(pd.Index(names).get_indexer(codes.names), -1)
+    first = row_of[np.asarray(codes.first, dtype=np.int64)]
+    second = row_of[np.asarray(codes.second, dtype=np.int64)]
+    keep = (first >= 0) & (second >= 0) & (first != second)
+    if not keep.any():
+        return None
+    first, second = first[keep], second[keep]
+    y = (np.asarray(codes.winner)[keep] == np.asarray(codes.first)[keep]).astype(np.int8)
+    weight = (
+        np.asarray(codes.count, dtype=np.float64)[keep] if codes.count is not None else np.ones(len(y))
+    )
+
+    n_types = types.shape[1]
+    iu = np.triu_indices(n_types, 1)
+    X = _pair_features(z, types, first, second, iu)
+
+    def model() -> "LogisticRegression":
+        return LogisticRegression(C=C, fit_intercept=False, max_iter=1000)
+
+    accuracy = log_loss = float("nan")
+    rng = np.random.default_rng(seed)
+    test = rng.random(len(y)) < holdout
+    if 0 < test.sum() < len(y) and len(np.unique(y[~test])) == 2:
+        m = model().fit(X[~test], y[~test], sample_weight=weight[~test])
+        p = np.clip(m.predict_proba(X[test])[:, 1], 1e-12, 1 - 1e-12)
+        w = weight[test]
+        accuracy = float(np.average((p >= 0.5) == y[test], weights=w))
+        log_loss = float(-np.average(y[test] * np.log(p) + (1 - y[test]) * np.log(1 - p), weights=w))
+
+    if len(np.unique(y)) < 2:
+        return None
+    coef = model().fit(X, y, sample_weight=weight).coef_[0]
+
+    p = z.shape[1]
+    coef_main = np.concatenate([coef[:p], coef[p : p + n_types]])
+    interactions = np.zeros((n_types, n_types))
+    interactions[iu] = coef[p + n_types :]
+    interactions -= interactions.T
+
+    features = np.hstack([z, types])
+    return MatchupModel(
+        names=names,
+        features=feature_names + [f"type_{t}" for t in OFFICIAL_TYPES_EN],
+        coef=coef_main,
+        type_names=list(OFFICIAL_TYPES_EN),
+        type_interactions=interactions,
+        z=features,
+        types=types,
+        probs=pair_probability_matrix(features, coef_main, types, interactions),
+        accuracy=accuracy,
+        log_loss=log_loss,
+        n_train=int(weight.sum()),
+        fit_seconds=time.perf_counter() - start,
+    )
+
+
+def pair_probability_matrix(
+    features: np.ndarray,
+    coef: np.ndarray,
+    types: np.ndarray,
+    interactions: np.ndarray,
+) -> np.ndarray:
+    """P(i vence j) para todos os pares ordenados numa chamada (float32, diagonal 0,5)."""
+    strength = features @ coef
+    logits = strength[:, None] - strength[None, :] + types @ interactions @ types.T
+    probs = (1.0 / (1.0 + np.exp(-logits))).astype(np.float32)
+    np.fill_diagonal(probs, 0.5)
+    return probs
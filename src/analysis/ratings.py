@@ -0,0 +1,210 @@
+"""Ratings de força: Elo incremental e Bradley-Terry em lote.
+
+A taxa de vitória bruta ignora a força dos adversários. Aqui há duas
+alternativas sobre os combates codificados em inteiros (`encoding`):
+
+- `EloRatings`: atualização O(1) por combate, ideal para anexar combates
+  novos do ETL sem reprocessar o histórico;
+- `bradley_terry`: ajuste em lote pelo algoritmo MM (Hunter, 2004) sobre a
+  matriz esparsa de vitórias (i venceu j), O(pares distintos) por iteração.
+
+`compute_ratings` junta os dois numa tabela e persiste o resultado por
+versão dos dados em `data/cache/ratings/`. O estado do Elo (ratings, jogos
+e nº de combates aplicados) fica em `data/cache/elo_state/` com uma
+assinatura do prefixo do log: uma versão nova que só anexou combates
+retoma a partir de `start=n_combats` em vez de refazer o histórico.
+"""
+
+from __future__ import annotations
+
+import copy
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.cache import ArtifactCache, DEFAULT_CACHE_DIR, fingerprint
+from src.analysis.encoding import CombatCodes, prefix_signatures
+
+
+ELO_INITIAL = 1500.0
+ELO_K = 24.0
+ELO_SCALE = 400.0 / math.log(10.0)  # converte log-força em pontos estilo Elo
+
+
+class EloRatings:
+    """Ratings Elo mantidos em memória e atualizados combate a combate."""
+
+    def __init__(self, names: Optional[Iterable[str]] = None, *, k: float = ELO_K, initial: float = ELO_INITIAL):
+        self.k = k
+        self.initial = initial
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.ratings: List[float] = []
+        self.games: List[int] = []
+        self.n_combats = 0
+        for name in (names if names is not None else ()):
+            self._code(name)
+
+    def _code(self, name: str) -> int:
+        code = self.index.get(name)
+        if code is None:
+            code = len(self.names)
+            self.index[name] = code
+            self.names.append(name)
+            self.ratings.append(self.initial)
+            self.games.append(0)
+        return code
+
+    def update(self, winner: str, loser: str) -> None:
+        """Aplica um combate (O(1))."""
+        self._update_codes(self._code(winner), self._code(loser))
+
+    def _update_codes(self, w: int, l: int) -> None:
+        r = self.ratings
+        expected = 1.0 / (1.0 + 10.0 ** ((r[l] - r[w]) / 400.0))
+        delta = self.k * (1.0 - expected)
+        r[w] += delta
+        r[l] -= delta
+        self.games[w] += 1
+        self.games[l] += 1
+        self.n_combats += 1
+
+    def update_from_codes(self, codes: CombatCodes, start: int = 0) -> None:
+        """Aplica os combates `codes[start:]` na ordem em que aparecem.
+
+        Os códigos de `codes` são traduzidos pelos nomes, então o mesmo
+        objeto pode receber lotes de codificações diferentes (ETL incremental).
+        Combates compactados não servem: o Elo depende da ordem.
+        """
+        if codes.count is not None:
+            raise ValueError("Elo precisa do log de combates em ordem (não da forma compactada).")
+        local = np.array([self._code(n) for n in codes.names], dtype=np.int64)
+        winners = local[codes.winner[start:]].tolist()
+        losers = local[codes.loser[start:]].tolist()
+
+        # Laço com variáveis locais: o Elo é sequencial por natureza
+        r = self.ratings
+        g = self.games
+        k = self.k
+        for w, l in zip(winners, losers):
+            delta = k / (1.0 + 10.0 ** ((r[w] - r[l]) / 400.0))
+            r[w] += delta
+            r[l] -= delta
+            g[w] += 1
+            g[l] += 1
+        self.n_combats += len(winners)
+
+    def copy(self) -> "EloRatings":
+        return copy.deepcopy(self)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"name": self.names, "elo": self.ratings, "games": self.games})
+
+
+def bradley_terry(
+    codes: CombatCodes,
+    *,
+    prior: float = 1.0,
+    max_iter: int = 500,
+    tol: float = 1e-8,
+) -> np.ndarray:
+    """Forças Bradley-Terry (escala log, média zero) por código de pokémon.
+
+    `prior` adiciona pseudo-combates (uma vitória e uma derrota) contra um
+    adversário de força 1, o que mantém finitas as forças de quem nunca
+    venceu ou nunca perdeu.
+    """
+    from scipy.sparse import coo_matrix
+
+    n = codes.n_pokemon
+    weights = codes.count.astype(np.float64) if codes.count is not None else np.ones(len(codes), dtype=np.float64)
+    wins_matrix = coo_matrix((weights, (codes.winner, codes.loser)), shape=(n, n)).tocsr()
+    games = (wins_matrix + wins_matrix.T).tocoo()  # n_ij simétrico, duplicatas somadas
+    rows, cols, n_ij = games.row, games.col, games.data
+    wins = np.asarray(wins_matrix.sum(axis=1)).ravel() + prior
+
+    p = np.ones(n)
+    for _ in range(max_iter):
+        denom = np.bincount(rows, weights=n_ij / (p[rows] + p[cols]), minlength=n)
+        denom += 2.0 * prior / (p + 1.0)
+        new_p = wins / denom
+        new_p /= np.exp(np.mean(np.log(new_p)))
+        if np.max(np.abs(np.log(new_p) - np.log(p))) < tol:
+            p = new_p
+            break
+        p = new_p
+    return np.log(p)
+
+
+_cache = ArtifactCache("ratings", cache_dir=DEFAULT_CACHE_DIR, max_entries=4)
+_state_cache = ArtifactCache("elo_state", cache_dir=DEFAULT_CACHE_DIR, max_entries=2)
+
+
+def latest_elo(codes: CombatCodes, *, k: float = ELO_K) -> EloRatings:
+    """Elo de todo o log `codes`, retomado do último estado gravado quando possível.
+
+    O estado guarda `n_combats`, o nº de nomes e o hash exato
+    (`prefix_signatures`) do log que o gerou. Se o log novo começa por
+    aquele (mesmos nomes e combates, conferidos inteiros), só a cauda `codes[n_combats:]` é aplicada; senão o Elo é refeito do zero.
+    O estado atualizado substitui o anterior; o objeto devolvido pode ser o
+    do cache, então não deve ser alterado.
+    """
+    key = fingerprint("latest", k)
+    state = _state_cache.get(key)
+    elo = None
+    stops = [(len(codes), len(codes.names))]
+    if state is not None and len(codes) >= state["elo"].n_combats and len(codes.names) >= state["n_names"]:
+        # Uma passada pelo log confere o prefixo antigo e já assina o novo
+        old_key, new_key = prefix_signatures(codes, (state["elo"].n_combats, state["n_names"]), *stops)
+        if old_key == state["prefix_key"]:
+            if new_key == old_key:
+                return state["elo"]
+            elo = state["elo"].copy()  # o cache em memória devolve o mesmo objeto
+    else:
+        new_key = prefix_signatures(codes, *stops)[0]
+    if elo is None:
+        elo = EloRatings(codes.names, k=k)
+    elo.update_from_codes(codes, start=elo.n_combats)
+    _state_cache.put(key, {"elo": elo, "n_names": len(codes.names), "prefix_key": new_key})
+    return elo
+
+
+def compute_ratings(codes: CombatCodes, *, version: Optional[str] = None, k: float = ELO_K) -> pd.DataFrame:
+    """Tabela de ratings por pokémon: name, elo, bt_rating, bt_strength, wins, losses, games.
+
+    `bt_rating` é a força Bradley-Terry em pontos estilo Elo (1500 = média).
+    O resultado é persistido por versão dos dados (ou hash dos combates).
+    Com combates compactados (`count`) só o Bradley-Terry é calculado; a
+    coluna `elo` fica vazia (NaN), pois o Elo depende da ordem. Com o log
+    completo o Elo vem de `latest_elo` (retomado quando só houve anexos).
+    """
+    data_key = (
+        (version,)
+        if version is not None
+        else (codes.names, codes.first, codes.second, codes.winner, codes.count if codes.count is not None else "-")
+    )
+    key = fingerprint("ratings", k, *data_key)
+
+    def compute() -> pd.DataFrame:
+        if codes.count is None:
+            elo = latest_elo(codes, k=k)
+            elo_ratings = pd.Series(elo.ratings, index=elo.names).reindex(codes.names).to_numpy()
+        else:
+            elo_ratings = np.full(codes.n_pokemon, np.nan)
+        strength = bradley_terry(codes)
+        wins = codes.wins()
+        losses = codes.losses()
+        df = pd.DataFrame({
+            "name": codes.names,
+            "elo": np.round(elo_ratings, 1),
+            "bt_rating": np.round(ELO_INITIAL + ELO_SCALE * strength, 1),
+            "bt_strength": strength,
+            "wins": wins,
+            "losses": losses,
+            "games": wins + losses,
+        })
+        return df.sort_values("bt_rating", ascending=False, ignore_index=True)
+
+    return _cache.get_or_compute(key, compute).copy()
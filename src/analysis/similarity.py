@@ -0,0 +1,182 @@
+"""Busca de pokémons parecidos (k vizinhos mais próximos) por atributos.
+
+O índice é uma matriz pokémon × (hp, attack, defense, sp_attack,
+sp_defense, speed, overall) padronizada (z-score por coluna), montada uma
+vez por versão dos dados. Uma consulta é um produto matriz-vetor
+(||a - b||² = ||a||² + ||b||² - 2 a·b) seguido de `np.argpartition`; os
+filtros por tipo/geração são máscaras booleanas sobre as linhas, o que uma
+árvore KD não permitiria sem reconstruir. Com dezenas de milhares de
+pokémons a consulta continua na casa do milissegundo.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.cache import ArtifactCache, DEFAULT_CACHE_DIR, fingerprint
+from src.analysis.type_stats import type_membership
+
+
+STAT_COLUMNS = ("hp", "attack", "defense", "sp_attack", "sp_defense", "speed", "overall")
+
+METRICS = ("euclidean", "cosine")
+
+_cache = ArtifactCache("similarity", cache_dir=DEFAULT_CACHE_DIR, max_entries=4)
+
+
+@dataclass
+class SimilarityIndex:
+    names: np.ndarray
+    columns: List[str]
+    raw: np.ndarray          # atributos originais (n x d)
+    matrix: np.ndarray       # atributos padronizados, float32 (n x d)
+    sq_norms: np.ndarray
+    types: List[str]
+    membership: np.ndarray   # n x tipos, bool
+    type_labels: np.ndarray  # células originais de `types`
+    generation: np.ndarray   # float (NaN quando ausente)
+    wins: np.ndarray
+    total: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def win_rate(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.total > 0, self.wins / self.total, np.nan)
+
+    def position(self, name: str) -> int:
+        hits = np.flatnonzero(self.names == name)
+        if len(hits) == 0:
+            raise KeyError(f"Pokémon não encontrado no índice: {name!r}")
+        return int(hits[0])
+
+    def mask(
+        self,
+        types: Optional[Sequence[str]] = None,
+        generations: Optional[Sequence[int]] = None,
+    ) -> np.ndarray:
+        """Linhas que têm algum dos `types` e pertencem a alguma das `generations`."""
+        keep = np.ones(len(self), dtype=bool)
+        if types:
+            cols = [self.types.index(t) for t in types if t in self.types]
+            keep &= self.membership[:, cols].any(axis=1) if cols else False
+        if generations:
+            keep &= np.isin(self.generation, np.asarray(list(generations), dtype=float))
+        return keep
+
+    def distances(self, vector: np.ndarray, metric: str = "euclidean") -> np.ndarray:
+        """Distância de um vetor padronizado a todas as linhas do índice."""
+        if metric not in METRICS:
+            raise ValueError(f"Métrica inválida: {metric!r} (use {', '.join(METRICS)})")
+        vector = np.asarray(vector, dtype=np.float32)
+        dots = self.matrix @ vector
+        if metric == "cosine":
+            denom = np.sqrt(self.sq_norms * float(vector @ vector))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return 1.0 - np.where(denom > 0, dots / denom, 0.0)
+        return np.sqrt(np.maximum(self.sq_norms + float(vector @ vector) - 2.0 * dots, 0.0))
+
+    def query(
+        self,
+        name: str,
+        k: int = 10,
+        *,
+        types: Optional[Sequence[str]] = None,
+        generations: Optional[Sequence[int]] = None,
+        metric: str = "euclidean",
+    ) -> pd.DataFrame:
+        """Os `k` pokémons mais próximos de `name` (ele próprio excluído)."""
+        pos = self.position(name)
+        dist = self.distances(self.matrix[pos], metric)
+        keep = self.mask(types, generations)
+        keep[pos] = False
+        return self._top(dist, keep, k)
+
+    def _top(self, dist: np.ndarray, keep: np.ndarray, k: int) -> pd.DataFrame:
+        candidates = np.flatnonzero(keep)
+        k = min(k, len(candidates))
+        if k <= 0:
+            return self._frame(np.array([], dtype=np.int64), np.array([]))
+        d = dist[candidates]
+        part = np.argpartition(d, k - 1)[:k] if k < len(d) else np.arange(len(d))
+        order = part[np.lexsort((self.names[candidates[part]].astype(str), d[part]))]
+        return self._frame(candidates[order], d[order])
+
+    def _frame(self, rows: np.ndarray, dist: np.ndarray) -> pd.DataFrame:
+        out = pd.DataFrame({"name": self.names[rows], "distance": np.round(dist, 4)})
+        for j, col in enumerate(self.columns):
+            out[col] = self.raw[rows, j]
+        out["types"] = self.type_labels[rows]
+        out["generation"] = pd.array(self.generation[rows], dtype="Float64").astype("Int64")
+        out["wins"] = self.wins[rows]
+        out["total"] = self.total[rows]
+        out["win_rate"] = np.round(self.win_rate[rows], 4)
+        return out
+
+
+def build_similarity_index(
+    attrs: pd.DataFrame,
+    winrate: Optional[pd.DataFrame] = None,
+    columns: Sequence[str] = STAT_COLUMNS,
+    *,
+    version: Optional[str] = None,
+) -> SimilarityIndex:
+    """Monta o índice a partir de `attrs` (com `overall`) e de uma tabela de `compute_winrate`.
+
+    Linhas sem algum dos atributos ficam de fora. O resultado fica em cache
+    (também em disco) por versão dos dados (`version`, do manifesto) ou
+    hash de `attrs`/`winrate`.
+    """
+    columns = [c for c in columns if c in attrs.columns]
+    if not columns:
+        raise ValueError("attrs não tem nenhuma das colunas de atributos esperadas.")
+    data_key = (version,) if version is not None else (attrs, winrate if winrate is not None else "-")
+    key = fingerprint(*data_key, tuple(columns))
+    return _cache.get_or_compute(key, lambda: _build(attrs, winrate, columns))
+
+
+def _build(attrs: pd.DataFrame, winrate: Optional[pd.DataFrame], columns: List[str]) -> SimilarityIndex:
+    raw = attrs[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    keep = ~np.isnan(raw).any(axis=1)
+    df = attrs.loc[keep].reset_index(drop=True)
+    raw = raw[keep]
+
+    mean = raw.mean(axis=0)
+    std = raw.std(axis=0)
+    matrix = ((raw - mean) / np.where(std > 0, std, 1.0)).astype(np.float32)
+
+    types, membership = type_membership(df)
+    generation = (
+        pd.to_numeric(df["generation"], errors="coerce").to_numpy(dtype=np.float64)
+        if "generation" in df.columns
+        else np.full(len(df), np.nan)
+    )
+
+    wins = np.zeros(len(df), dtype=np.int64)
+    total = np.zeros(len(df), dtype=np.int64)
+    if winrate is not None and not winrate.empty:
+        perf = winrate.drop_duplicates("name").set_index("name")
+        pos = perf.index.get_indexer(df["name"])
+        hit = pos >= 0
+        wins[hit] = perf["wins"].to_numpy()[pos[hit]]
+        total[hit] = perf["total"].to_numpy()[pos[hit]]
+
+    return SimilarityIndex(
+        names=df["name"].to_numpy(dtype=object),
+        columns=list(columns),
+        raw=raw,
+        matrix=matrix,
+        sq_norms=np.einsum("ij,ij->i", matrix, matrix),
+        types=types,
+        membership=membership.astype(bool),
+        type_labels=(df["types"] if "types" in df.columns else pd.Series([None] * len(df))).to_numpy(dtype=object),
+        generation=generation,
+        wins=wins,
+        total=total,
+    )
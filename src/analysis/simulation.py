@@ -0,0 +1,193 @@
+"""Simulador Monte Carlo de torneios entre times de seis pokémons.
+
+1. `win_probability_matrix`: probabilidade de i vencer j para todos os
+   pares, pelo modelo de ratings (Bradley-Terry) ou pelo confronto direto
+   empírico encolhido na direção do modelo (prior Beta).
+2. `team_win_matrix`: probabilidade exata de um time vencer outro. Uma
+   partida entre times tem 36 duelos (todos contra todos); vence quem
+   ganhar mais duelos (empate 18 x 18 decidido na moeda). A soma de
+   Bernoullis com probabilidades diferentes (Poisson-binomial) é calculada
+   por convolução vetorizada para todos os pares de times de uma vez.
+3. `simulate_bracket` / `simulate_round_robin`: milhares de torneios como
+   sorteios numpy em lote (gerador com semente), opcionalmente divididos
+   entre processos.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.encoding import CombatCodes
+
+
+TEAM_SIZE = 6
+
+# Sorteios por bloco (limita a memória: blocos x partidas por rodada)
+CHUNK_SIMS = 20_000
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def win_probability_matrix(
+    codes: CombatCodes,
+    *,
+    method: str = "shrinkage",
+    strengths: Optional[np.ndarray] = None,
+    prior_strength: float = 5.0,
+) -> np.ndarray:
+    """Matriz n x n com P(i vence j); a diagonal é 0,5.
+
+    - `method="rating"`: sigmoid(s_i - s_j) com as forças Bradley-Terry.
+    - `method="shrinkage"`: (vitórias_ij + k * p_modelo) / (jogos_ij + k),
+      isto é, a média a posteriori de uma Beta centrada no modelo com peso
+      `prior_strength` (k) em pseudo-combates.
+    """
+    if method not in ("rating", "shrinkage"):
+        raise ValueError(f"Método inválido: {method!r} (use 'rating' ou 'shrinkage')")
+    if strengths is None:
+        from src.analysis.ratings import bradley_terry
+
+        strengths = bradley_terry(codes)
+    model = _sigmoid(strengths[:, None] - strengths[None, :])
+    if method == "rating":
+        np.fill_diagonal(model, 0.5)
+        return model
+
+    n = codes.n_pokemon
+    pair = codes.winner.astype(np.int64) * n + codes.loser
+    wins = np.bincount(pair, weights=codes.count, minlength=n * n).reshape(n, n).astype(float)
+    games = wins + wins.T
+    probs = (wins + prior_strength * model) / (games + prior_strength)
+    np.fill_diagonal(probs, 0.5)
+    return probs
+
+
+def team_win_matrix(probs: np.ndarray, teams: np.ndarray) -> np.ndarray:
+    """Matriz k x k com P(time a vence time b) numa partida de 36 duelos."""
+    teams = np.asarray(teams, dtype=np.int64)
+    k, size = teams.shape
+    bouts = probs[teams[:, None, :, None], teams[None, :, None, :]].reshape(k, k, size * size)
+
+    # Distribuição Poisson-binomial do nº de duelos vencidos, para todos os pares
+    dist = np.zeros((k, k, size * size + 1))
+    dist[..., 0] = 1.0
+    for b in range(size * size):
+        p = bouts[..., b, None]
+        shifted = np.concatenate([np.zeros((k, k, 1)), dist[..., :-1]], axis=-1)
+        dist = dist * (1.0 - p) + shifted * p
+
+    half = size * size // 2
+    win = dist[..., half + 1:].sum(axis=-1)
+    if (size * size) % 2 == 0:
+        win += 0.5 * dist[..., half]
+    np.fill_diagonal(win, 0.5)
+    return win
+
+
+def _bracket_chunk(team_probs: np.ndarray, n_sims: int, seed, shuffle: bool) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    k = team_probs.shape[0]
+    size = 1 << max(0, (k - 1).bit_length())
+    # Times fictícios ("bye") perdem sempre
+    padded = np.zeros((size, size))
+    padded[:k, :k] = team_probs
+    padded[:k, k:] = 1.0
+
+    titles = np.zeros(k, dtype=np.int64)
+    for start in range(0, n_sims, CHUNK_SIMS):
+        m = min(CHUNK_SIMS, n_sims - start)
+        alive = np.broadcast_to(np.arange(size), (m, size))
+        alive = rng.permuted(alive, axis=1) if shuffle else alive.copy()
+        while alive.shape[1] > 1:
+            a, b = alive[:, ::2], alive[:, 1::2]
+            a_wins = rng.random(a.shape) < padded[a, b]
+            alive = np.where(a_wins, a, b)
+        titles += np.bincount(alive[:, 0], minlength=size)[:k]
+    return titles
+
+
+def _round_robin_chunk(team_probs: np.ndarray, n_sims: int, seed) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    k = team_probs.shape[0]
+    i, j = np.triu_indices(k, 1)
+    p = team_probs[i, j]
+    first = np.zeros((len(i), k))
+    first[np.arange(len(i)), i] = 1.0
+    second = np.zeros((len(i), k))
+    second[np.arange(len(i)), j] = 1.0
+
+    titles = np.zeros(k, dtype=np.int64)
+    for start in range(0, n_sims, CHUNK_SIMS):
+        m = min(CHUNK_SIMS, n_sims - start)
+        a_wins = (rng.random((m, len(i))) < p).astype(float)
+        points = a_wins @ first + (1.0 - a_wins) @ second
+        # Desempate aleatório entre times com a mesma pontuação
+        points += rng.random(points.shape) * 1e-3
+        titles += np.bincount(points.argmax(axis=1), minlength=k)
+    return titles
+
+
+def _run(worker, team_probs: np.ndarray, n_sims: int, seed: int, n_jobs: int, *args) -> np.ndarray:
+    n_jobs = max(1, int(n_jobs))
+    seeds = np.random.SeedSequence(seed).spawn(n_jobs)
+    if n_jobs == 1:
+        return worker(team_probs, n_sims, seeds[0], *args)
+    sizes = [n_sims // n_jobs + (1 if r < n_sims % n_jobs else 0) for r in range(n_jobs)]
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        futures = [pool.submit(worker, team_probs, s, sd, *args) for s, sd in zip(sizes, seeds) if s > 0]
+        return sum(f.result() for f in futures)
+
+
+def _results(titles: np.ndarray, n_sims: int, labels: Optional[Sequence[str]]) -> pd.DataFrame:
+    labels = list(labels) if labels is not None else [f"Time {i + 1}" for i in range(len(titles))]
+    df = pd.DataFrame({"team": labels, "titles": titles, "title_prob": titles / max(n_sims, 1)})
+    return df.sort_values("titles", ascending=False, ignore_index=True)
+
+
+def simulate_bracket(
+    team_probs: np.ndarray,
+    n_sims: int = 10_000,
+    *,
+    seed: int = 42,
+    shuffle: bool = True,
+    n_jobs: int = 1,
+    labels: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Mata-mata simples; com `shuffle=True` o chaveamento é sorteado a cada torneio."""
+    titles = _run(_bracket_chunk, team_probs, n_sims, seed, n_jobs, shuffle)
+    return _results(titles, n_sims, labels)
+
+
+def simulate_round_robin(
+    team_probs: np.ndarray,
+    n_sims: int = 10_000,
+    *,
+    seed: int = 42,
+    n_jobs: int = 1,
+    labels: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Pontos corridos (todos contra todos, 1 ponto por vitória)."""
+    titles = _run(_round_robin_chunk, team_probs, n_sims, seed, n_jobs)
+    return _results(titles, n_sims, labels)
+
+
+def sample_teams(
+    pool: Sequence[int],
+    n_teams: int,
+    *,
+    seed: int = 42,
+    team_size: int = TEAM_SIZE,
+) -> List[List[int]]:
+    """Sorteia `n_teams` times sem repetição de pokémon a partir de `pool` (códigos)."""
+    pool = np.asarray(pool, dtype=np.int64)
+    if len(pool) < n_teams * team_size:
+        raise ValueError(f"Pool com {len(pool)} pokémons não forma {n_teams} times de {team_size}.")
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(pool, size=n_teams * team_size, replace=False)
+    return chosen.reshape(n_teams, team_size).tolist()
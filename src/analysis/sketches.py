@@ -0,0 +1,277 @@
+"""Análises aproximadas com sketches para logs de combate que não cabem na memória.
+
+Alimentadas pelo leitor em blocos (`metrics.iter_combat_chunks`), com
+memória limitada e erro configurável:
+
+- `CountMinSketch`: contagens por pokémon (participações e vitórias);
+  superestima no máximo `epsilon * N` com probabilidade `1 - delta`;
+- `SpaceSaving`: top-K participantes e vencedores (heavy hitters);
+- `HyperLogLog`: nº de confrontos distintos (erro padrão ~1,04/sqrt(2^p));
+- `ReservoirSample`: amostra uniforme de combates para a Visão Geral.
+
+`CombatSketches` junta tudo e devolve DataFrames no mesmo formato de
+`compute_participations` e `compute_winrate`.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def hash_keys(values) -> np.ndarray:
+    """Hash uint64 estável de strings/valores (vetorizado pelo pandas)."""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def _mix64(h: np.ndarray) -> np.ndarray:
+    """Finalizador splitmix64: espalha os bits de um hash uint64."""
+    with np.errstate(over="ignore"):
+        h = h ^ (h >> np.uint64(30))
+        h = h * np.uint64(0xBF58476D1CE4E5B9)
+        h = h ^ (h >> np.uint64(27))
+        h = h * np.uint64(0x94D049BB133111EB)
+        return h ^ (h >> np.uint64(31))
+
+
+class CountMinSketch:
+    """Count-Min com largura potência de 2 e hashing multiply-shift por linha."""
+
+    def __init__(self, epsilon: float = 1e-3, delta: float = 1e-3, *, seed: int = 42):
+        self.width_bits = max(4, math.ceil(math.log2(math.e / epsilon)))
+        self.width = 1 << self.width_bits
+        self.depth = max(1, math.ceil(math.log(1.0 / delta)))
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**63, size=self.depth, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=self.depth, dtype=np.uint64)
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.total = 0
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        with np.errstate(over="ignore"):
+            mixed = self._a[:, None] * hashes[None, :] + self._b[:, None]
+        return (mixed >> np.uint64(64 - self.width_bits)).astype(np.int64)
+
+    def update(self, hashes: np.ndarray, counts: Optional[np.ndarray] = None) -> None:
+        counts = np.ones(len(hashes), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        cols = self._columns(hashes)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(cols[row], weights=counts, minlength=self.width).astype(np.int64)
+        self.total += int(counts.sum())
+
+    def query(self, hashes: np.ndarray) -> np.ndarray:
+        cols = self._columns(hashes)
+        return self.table[np.arange(self.depth)[:, None], cols].min(axis=0)
+
+
+class SpaceSaving:
+    """Top-K aproximado com atualização em lote.
+
+    Cada item monitorado tem uma estimativa que nunca subestima a contagem
+    real e superestima no máximo `threshold` (maior estimativa já descartada).
+    """
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.counts = pd.Series(dtype=np.int64)
+        self.threshold = 0
+
+    def update(self, keys: pd.Series | np.ndarray) -> None:
+        batch = pd.Series(np.asarray(keys, dtype=object)).value_counts()
+        tracked = batch.index.isin(self.counts.index)
+        # Itens novos podem ter aparecido antes e sido descartados: soma o limiar
+        new = batch[~tracked] + self.threshold
+        merged = self.counts.add(batch[tracked], fill_value=0)
+        merged = pd.concat([merged, new]).astype(np.int64)
+        if len(merged) > self.k:
+            merged = merged.sort_values(ascending=False, kind="stable")
+            self.threshold = max(self.threshold, int(merged.iloc[self.k]))
+            merged = merged.iloc[: self.k]
+        self.counts = merged
+
+    def top(self, n: Optional[int] = None) -> pd.Series:
+        out = self.counts.sort_values(ascending=False, kind="stable")
+        return out if n is None else out.head(n)
+
+
+class HyperLogLog:
+    """Cardinalidade aproximada com 2^p registradores de 8 bits."""
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision deve estar entre 4 e 18")
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @staticmethod
+    def _bit_length(x: np.ndarray) -> np.ndarray:
+        # Exato: separa em metades de 32 bits (float64 representa cada uma sem perda)
+        hi = (x >> np.uint64(32)).astype(np.float64)
+        lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        with np.errstate(divide="ignore"):
+            bl_hi = np.where(hi > 0, np.floor(np.log2(np.maximum(hi, 1))) + 1 + 32, 0)
+            bl_lo = np.where(lo > 0, np.floor(np.log2(np.maximum(lo, 1))) + 1, 0)
+        return np.where(hi > 0, bl_hi, bl_lo).astype(np.int64)
+
+    def update(self, hashes: np.ndarray) -> None:
+        h = _mix64(np.asarray(hashes, dtype=np.uint64))
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = h & (_MASK64 >> np.uint64(self.p))
+        rank = (64 - self.p) - self._bit_length(rest) + 1
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+
+    def estimate(self) -> float:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # correção para cardinalidades pequenas
+        return float(raw)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+
+class ReservoirSample:
+    """Amostra uniforme de tamanho fixo (algoritmo R, vetorizado por bloco)."""
+
+    def __init__(self, size: int = 20, *, seed: int = 42):
+        self.size = size
+        self.seen = 0
+        self.rows: Optional[pd.DataFrame] = None
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        chunk = chunk.reset_index(drop=True)
+        if self.rows is None:
+            self.rows = chunk.iloc[:0].copy()
+        fill = max(0, min(self.size - len(self.rows), len(chunk)))
+        if fill:
+            self.rows = pd.concat([self.rows, chunk.iloc[:fill]], ignore_index=True)
+        rest = chunk.iloc[fill:]
+        if len(rest):
+            # O j-ésimo item (contagem global) entra com prob. size/j numa posição uniforme
+            positions = self.seen + fill + np.arange(1, len(rest) + 1)
+            slots = (self._rng.random(len(rest)) * positions).astype(np.int64)
+            accepted = np.flatnonzero(slots < self.size)
+            if len(accepted):
+                # Se dois itens caem na mesma posição, o último vence
+                rev = accepted[::-1]
+                _, first = np.unique(slots[rev], return_index=True)
+                winners = rev[first]
+                self.rows.iloc[slots[winners]] = rest.iloc[winners].to_numpy()
+        self.seen += len(chunk)
+
+    def sample(self) -> pd.DataFrame:
+        return self.rows.copy() if self.rows is not None else pd.DataFrame()
+
+
+@dataclass
+class SketchConfig:
+    epsilon: float = 1e-4        # erro relativo ao total no Count-Min
+    delta: float = 1e-3          # probabilidade de exceder o erro
+    top_k: int = 500             # itens monitorados pelo Space-Saving
+    hll_precision: int = 14      # 2^14 registradores (~0,8% de erro padrão)
+    sample_size: int = 20        # linhas da amostra (Visão Geral)
+    seed: int = 42
+
+
+class CombatSketches:
+    """Sketches de um log de combates processado em blocos."""
+
+    def __init__(self, config: Optional[SketchConfig] = None):
+        self.config = config or SketchConfig()
+        c = self.config
+        self.participants = CountMinSketch(c.epsilon, c.delta, seed=c.seed)
+        self.winners = CountMinSketch(c.epsilon, c.delta, seed=c.seed)
+        self.top_participants = SpaceSaving(c.top_k)
+        self.top_winners = SpaceSaving(c.top_k)
+        self.matchups = HyperLogLog(c.hll_precision)
+        self.reservoir = ReservoirSample(c.sample_size, seed=c.seed)
+        self.n_combats = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        chunk = chunk.dropna(subset=["first_pokemon", "second_pokemon", "winner"])
+        first = chunk["first_pokemon"].to_numpy(dtype=object)
+        second = chunk["second_pokemon"].to_numpy(dtype=object)
+        winner = chunk["winner"].to_numpy(dtype=object)
+        h_first, h_second = hash_keys(first), hash_keys(second)
+
+        self.participants.update(np.concatenate([h_first, h_second]))
+        self.winners.update(hash_keys(winner))
+        self.top_participants.update(np.concatenate([first, second]))
+        self.top_winners.update(winner)
+        # Confronto sem ordem: (A, B) == (B, A)
+        lo, hi = np.minimum(h_first, h_second), np.maximum(h_first, h_second)
+        with np.errstate(over="ignore"):
+            self.matchups.update(_mix64(lo) ^ (hi * np.uint64(0x9E3779B97F4A7C15)))
+        self.reservoir.update(chunk)
+        self.n_combats += len(chunk)
+
+    def _names(self) -> np.ndarray:
+        names = pd.Index(self.top_participants.counts.index).union(pd.Index(self.top_winners.counts.index))
+        return np.asarray(names, dtype=object)
+
+    def participations(self) -> pd.DataFrame:
+        """Top-K por participações (mesmas colunas de `compute_participations`)."""
+        top = self.top_participants.counts
+        names = np.asarray(top.index, dtype=object)
+        est = np.minimum(top.to_numpy(), self.participants.query(hash_keys(names)))
+        df = pd.DataFrame({"name": names, "participations": est})
+        return df.sort_values("participations", ascending=False, ignore_index=True)
+
+    def winrate(self, min_battles: int = 1) -> pd.DataFrame:
+        """Taxa de vitória estimada dos pokémons monitorados (colunas de `compute_winrate`)."""
+        names = self._names()
+        hashes = hash_keys(names)
+        total = self.participants.query(hashes)
+        wins = np.minimum(self.winners.query(hashes), total)
+        tracked = self.top_participants.counts.reindex(names).to_numpy()
+        total = np.where(np.isnan(tracked), total, np.minimum(total, np.nan_to_num(tracked))).astype(np.int64)
+        wins = np.minimum(wins, total)
+        perf = pd.DataFrame({"name": names, "wins": wins, "losses": total - wins, "total": total})
+        perf = perf[(perf["total"] > 0) & (perf["total"] >= min_battles)].copy()
+        perf["win_rate"] = (perf["wins"] / perf["total"]).round(4)
+        return perf.sort_values(["win_rate", "total", "wins"], ascending=[False, False, False], ignore_index=True)
+
+    def distinct_matchups(self) -> int:
+        return int(round(self.matchups.estimate()))
+
+    def sample(self) -> pd.DataFrame:
+        return self.reservoir.sample()
+
+    def error_bounds(self) -> dict:
+        c = self.config
+        return {
+            "count_abs_error": c.epsilon * 2 * self.n_combats,
+            "count_confidence": 1 - c.delta,
+            "top_k_threshold": max(self.top_participants.threshold, self.top_winners.threshold),
+            "distinct_rel_error": self.matchups.relative_error,
+        }
+
+    @property
+    def memory_bytes(self) -> int:
+        return (
+            self.participants.table.nbytes
+            + self.winners.table.nbytes
+            + self.matchups.registers.nbytes
+            + 2 * self.config.top_k * 64  # ordem de grandeza dos contadores do Space-Saving
+        )
+
+
+def sketch_combats(chunks: Iterable[pd.DataFrame], config: Optional[SketchConfig] = None) -> CombatSketches:
+    """Consome os blocos de combates e devolve os sketches preenchidos."""
+    sketches = CombatSketches(config)
+    for chunk in chunks:
+        sketches.update(chunk)
+    return sketches
@@ -0,0 +1,218 @@
+"""Armazenamento binário dos combates para leitura com `np.memmap`.
+
+O ETL grava, além do CSV, os combates como colunas inteiras de largura
+fixa em `data/combats_int/`:
+
+- `first.npy`, `second.npy`, `winner.npy`: códigos int16 (int32 se houver
+  mais de 32 mil nomes), um por combate;
+- `names.json`: dicionário código -> nome/id e a assinatura do CSV de origem.
+
+Os códigos são a posição do pokémon em `pokemons.csv` (nomes que só aparecem
+nos combates, como o ID 63, ficam ao final).
+
+Publicação: cada gravação vai para um subdiretório novo
+(`combats_int/v<ns>-<pid>/`) e só então o arquivo `combats_int/CURRENT`
+passa a apontar para ele (arquivo temporário + `os.replace`, atômico, como
+em `src.etl.snapshots`). A versão anterior fica no disco até a gravação
+seguinte, para quem já leu o ponteiro antigo; se mesmo assim um arquivo
+sumir no meio da abertura, `open_combat_store` relê o ponteiro.
+
+Opcionalmente (`compact=True`) grava também `data/combats_compact/`: as
+triplas únicas (first, second, winner) e `count.npy`, com o nº de combates
+de cada uma (ver `CombatCodes.compact`). As métricas de contagem leem
+esse store, limitado ao nº de confrontos distintos. A leitura usa `mmap_mode="r"`:
+todos os processos do dashboard compartilham as mesmas páginas do page cache,
+sem cópia e sem parsing de CSV na inicialização.
+
+Uso avulso (gera o store a partir dos CSVs já existentes)::
+
+    python -m src.analysis.store [--compact]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.encoding import CombatCodes, encode_combats
+
+
+STORE_DIR = "combats_int"
+COMPACT_STORE_DIR = "combats_compact"
+COLUMNS = ("first", "second", "winner")
+CURRENT_FILE = "CURRENT"
+META_FILE = "names.json"
+OPEN_ATTEMPTS = 3
+
+
+def _csv_signature(path: Path) -> Optional[list]:
+    if not path.exists():
+        return None
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def write_combat_store(
+    combats: pd.DataFrame,
+    pokemons: pd.DataFrame,
+    data_dir: Path | str,
+    *,
+    compact: bool = False,
+    codes: Optional[CombatCodes] = None,
+) -> Path:
+    """Grava o store binário em `data_dir/combats_int` (versão nova + ponteiro `CURRENT`).
+
+    Com `compact=True` grava a forma compactada em `data_dir/combats_compact`.
+    `codes` evita recodificar quando os combates já foram codificados.
+    """
+    data_dir = Path(data_dir)
+    if codes is None:
+        codes = encode_combats(combats, pokemons["name"] if "name" in pokemons.columns else None)
+    if compact:
+        codes = codes.compact()
+    dtype = np.int16 if codes.n_pokemon <= np.iinfo(np.int16).max else np.int32
+
+    ids = [None] * codes.n_pokemon
+    if {"id", "name"}.issubset(pokemons.columns):
+        id_by_name = dict(zip(pokemons["name"], pokemons["id"]))
+        ids = [int(id_by_name[n]) if n in id_by_name else None for n in codes.names]
+
+    root = data_dir / (COMPACT_STORE_DIR if compact else STORE_DIR)
+    version = _new_version_dir(root)
+    for col in COLUMNS:
+        np.save(version / f"{col}.npy", getattr(codes, col).astype(dtype))
+    if codes.count is not None:
+        np.save(version / "count.npy", codes.count.astype(np.int64))
+    meta = {
+        "names": [str(n) for n in codes.names],
+        "ids": ids,
+        "n_combats": codes.n_combats,
+        "n_rows": len(codes),
+        "dtype": np.dtype(dtype).name,
+        "source": _csv_signature(data_dir / "combats.csv"),
+    }
+    (version / META_FILE).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    return _publish(root, version)
+
+
+def reuse_combat_store(src_dir: Path | str, data_dir: Path | str, *, compact: bool = False) -> Optional[Path]:
+    """Publica em `data_dir` o store atual de `src_dir` por hardlinks (sem recodificar).
+
+    Retorna `None` se `src_dir` não tiver store. A assinatura do CSV de
+    origem é regravada com a do `combats.csv` de `data_dir`.
+    """
+    store_dir = COMPACT_STORE_DIR if compact else STORE_DIR
+    source = store_version_dir(src_dir, compact=compact)
+    if source is None:
+        return None
+    root = Path(data_dir) / store_dir
+    version = _new_version_dir(root)
+    for path in source.iterdir():
+        if path.name != META_FILE:
+            link_or_copy(path, version / path.name)
+    meta = json.loads((source / META_FILE).read_text(encoding="utf-8"))
+    meta["source"] = _csv_signature(Path(data_dir) / "combats.csv")
+    (version / META_FILE).write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    return _publish(root, version)
+
+
+def link_or_copy(src: Path, dst: Path) -> Path:
+    """Hardlink de `src` em `dst` (cópia com mtime preservado se o link falhar)."""
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+
+def _new_version_dir(root: Path) -> Path:
+    root.mkdir(parents=True, exist_ok=True)
+    version = root / f"v{time.time_ns()}-{os.getpid()}"
+    version.mkdir()
+    return version
+
+
+def _publish(root: Path, version: Path) -> Path:
+    """Aponta `CURRENT` para `version` e apaga as versões mais antigas que a anterior."""
+    previous = store_version_dir(root.parent, compact=root.name == COMPACT_STORE_DIR)
+    fd, tmp = tempfile.mkstemp(dir=root, prefix=f"{CURRENT_FILE}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(version.name + "\n")
+        os.replace(tmp, root / CURRENT_FILE)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    keep = {version, previous}
+    for path in root.iterdir():
+        if path.is_dir() and path not in keep:
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.is_file() and (path.suffix == ".npy" or path.name == META_FILE):
+            path.unlink(missing_ok=True)   # layout antigo, direto em combats_int/
+    return version
+
+
+def store_version_dir(data_dir: Path | str, *, compact: bool = False) -> Optional[Path]:
+    """Diretório da versão publicada do store (ou `None` se não houver)."""
+    root = Path(data_dir) / (COMPACT_STORE_DIR if compact else STORE_DIR)
+    try:
+        name = (root / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        # Layout antigo: arquivos direto em combats_int/
+        return root if (root / META_FILE).exists() else None
+    path = root / name
+    return path if name and path.is_dir() else None
+
+
+def open_combat_store(
+    data_dir: Path | str,
+    *,
+    check_source: bool = True,
+    compact: bool = False,
+) -> Optional[CombatCodes]:
+    """Abre o store com `np.load(..., mmap_mode="r")`.
+
+    Retorna `None` se o store não existir ou, com `check_source=True`, se o
+    `combats.csv` tiver mudado depois que o store foi gravado. `compact=True`
+    abre a forma compactada (com `count`).
+    """
+    data_dir = Path(data_dir)
+    for _ in range(OPEN_ATTEMPTS):
+        target = store_version_dir(data_dir, compact=compact)
+        if target is None:
+            return None
+        try:
+            meta = json.loads((target / META_FILE).read_text(encoding="utf-8"))
+            if check_source and meta.get("source") != _csv_signature(data_dir / "combats.csv"):
+                return None
+            arrays = {col: np.load(target / f"{col}.npy", mmap_mode="r") for col in COLUMNS}
+            if compact or (target / "count.npy").exists():
+                arrays["count"] = np.load(target / "count.npy", mmap_mode="r")
+        except FileNotFoundError:
+            # Versão apagada por uma gravação concorrente: relê o ponteiro
+            continue
+        except (OSError, ValueError):
+            return None
+        return CombatCodes(names=np.asarray(meta["names"], dtype=object), **arrays)
+    return None
+
+
+if __name__ == "__main__":
+    from src.analysis.metrics import load_data
+
+    import sys
+
+    pokemons, combats, _ = load_data("data")
+    path = write_combat_store(combats, pokemons, "data")
+    print("Store gerado:", path)
+    if "--compact" in sys.argv[1:]:
+        print("Store compactado:", write_combat_store(combats, pokemons, "data", compact=True))
@@ -0,0 +1,417 @@
+"""Agregações por tipo com matriz de pertinência pokémon × tipo.
+
+Junta combates, pokémons e atributos uma única vez por id inteiro,
+monta a matriz de pertinência (1 quando o pokémon tem o tipo) e calcula
+vitórias, derrotas, taxa média e overall médio dos tipos com um único
+produto de matrizes. O detalhamento de um tipo é só uma máscara booleana
+sobre arrays já prontos.
+
+`TypeMatchups` cruza os combates com os tipos dos dois lutadores (matriz
+18 x 18 e por combinação de tipos) com `np.bincount` sobre índices
+combinados, e aceita combates novos de forma incremental.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.cache import ArtifactCache, DEFAULT_CACHE_DIR, fingerprint
+from src.analysis.encoding import CombatCodes, encode_combats, prefix_signature, prefix_signatures
+
+
+# 18 tipos oficiais (EN) para consistencia
+OFFICIAL_TYPES_EN: List[str] = [
+    "Normal",
+    "Fire",
+    "Water",
+    "Grass",
+    "Flying",
+    "Fighting",
+    "Poison",
+    "Electric",
+    "Ground",
+    "Rock",
+    "Psychic",
+    "Ice",
+    "Bug",
+    "Ghost",
+    "Steel",
+    "Dragon",
+    "Dark",
+    "Fairy",
+]
+
+# Os dados usam "Grass/Poison"; alguns registros vêm como "Normal, Fairy"
+TYPE_SEPARATORS = re.compile(r"\s*[,/]\s*")
+
+_TYPE_FALLBACK_COLUMNS = ("type", "Type", "primary_type", "secondary_type")
+
+
+def split_types(val) -> List[str]:
+    """Normaliza uma célula de tipos em lista de nomes (sem repetição, ordem preservada)."""
+    if isinstance(val, str):
+        parts = [s.strip() for s in TYPE_SEPARATORS.split(val)]
+    elif isinstance(val, (list, tuple)):
+        parts = []
+        for x in val:
+            if isinstance(x, dict):
+                x = x.get("name") or x.get("type") or x.get("Type")
+            if x:
+                parts.extend(split_types(str(x)))
+    else:
+        return []
+    return list(dict.fromkeys(p for p in parts if p))
+
+
+def _types_long(attrs: pd.DataFrame) -> pd.DataFrame:
+    """Tabela longa (row, type, slot) com uma linha por tipo de cada linha de `attrs`."""
+    if "types" in attrs.columns:
+        parts = attrs["types"].reset_index(drop=True).map(split_types)
+        long = parts.explode().dropna().rename("type").to_frame()
+        long["row"] = long.index.to_numpy()
+        long["slot"] = long.groupby("row").cumcount()
+        return long.reset_index(drop=True)[["row", "type", "slot"]]
+
+    frames = []
+    for slot, col in enumerate(c for c in _TYPE_FALLBACK_COLUMNS if c in attrs.columns):
+        tmp = pd.DataFrame({"row": np.arange(len(attrs)), "type": attrs[col].to_numpy(), "slot": slot})
+        frames.append(tmp.dropna(subset=["type"]))
+    if not frames:
+        return pd.DataFrame(columns=["row", "type", "slot"])
+    return pd.concat(frames, ignore_index=True).drop_duplicates(["row", "type"])
+
+
+def type_membership(
+    attrs: pd.DataFrame,
+    types: Optional[Sequence[str]] = None,
+    *,
+    primary_only: bool = False,
+) -> Tuple[List[str], np.ndarray]:
+    """Matriz (linhas de `attrs` × tipos) com 1.0 onde o pokémon tem o tipo.
+
+    `types=None` usa os tipos encontrados (ordenados); caso contrário, tipos
+    fora da lista são ignorados. Com `primary_only=True` só o 1º tipo conta.
+    """
+    long = _types_long(attrs)
+    if primary_only:
+        long = long[long["slot"] == 0]
+    type_list = list(types) if types is not None else sorted(long["type"].unique().tolist())
+    col = pd.Index(type_list).get_indexer(long["type"])
+    keep = col >= 0
+    matrix = np.zeros((len(attrs), len(type_list)), dtype=np.float64)
+    matrix[long["row"].to_numpy(dtype=np.int64)[keep], col[keep]] = 1.0
+    return type_list, matrix
+
+
+@dataclass
+class TypeStats:
+    types: List[str]
+    ids: np.ndarray
+    names: np.ndarray
+    membership: np.ndarray
+    wins: np.ndarray
+    losses: np.ndarray
+    overall: np.ndarray
+    aggregates: pd.DataFrame
+    _members: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+
+    @property
+    def total(self) -> np.ndarray:
+        return self.wins + self.losses
+
+    @property
+    def win_rate(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.total > 0, self.wins / self.total, np.nan)
+
+    def member_rows(self, type_name: str) -> np.ndarray:
+        if type_name not in self._members:
+            j = self.types.index(type_name)
+            self._members[type_name] = np.flatnonzero(self.membership[:, j] > 0)
+        return self._members[type_name]
+
+    def members(self, type_name: str, metric: str = "wins") -> pd.DataFrame:
+        """Pokémons do tipo com a métrica (`wins`, `losses`, `overall`, `win_rate`), em ordem decrescente."""
+        if type_name not in self.types:
+            return pd.DataFrame(columns=["name", metric])
+        rows = self.member_rows(type_name)
+        values = getattr(self, metric)[rows]
+        df = pd.DataFrame({"id": self.ids[rows], "name": self.names[rows], metric: values})
+        return df.dropna(subset=[metric]).sort_values(metric, ascending=False, ignore_index=True)
+
+
+def _names_by_id(pokemons: pd.DataFrame, ids: pd.Series) -> pd.Series:
+    """Nome em `pokemons` de cada id (ids repetidos em `pokemons`: vale a 1ª linha)."""
+    return ids.map(pokemons.drop_duplicates("id").set_index("id")["name"])
+
+
+def build_type_stats(
+    pokemons: pd.DataFrame,
+    combats: pd.DataFrame | CombatCodes,
+    attrs: pd.DataFrame,
+    types: Optional[Sequence[str]] = OFFICIAL_TYPES_EN,
+    *,
+    min_battles: int = 1,
+) -> TypeStats:
+    """Monta `TypeStats` a partir dos três CSVs (ou dos combates já codificados).
+
+    `aggregates` traz, por tipo: taxa_media_vitoria (média simples do
+    win_rate dos pokémons com ao menos `min_battles` combates), qtd_pokemons,
+    wins, losses e overall_medio.
+    """
+    codes = combats if isinstance(combats, CombatCodes) else encode_combats(combats, pokemons["name"])
+    wins_by_code = codes.wins()
+    losses_by_code = codes.losses()
+
+    # Linha de attrs -> código do pokémon (id -> nome em pokemons -> código)
+    attrs = attrs.drop_duplicates("id").reset_index(drop=True)
+    pos = pd.Index(codes.names).get_indexer(_names_by_id(pokemons, attrs["id"]))
+    has_code = pos >= 0
+    safe = np.clip(pos, 0, None)
+    wins = np.where(has_code, wins_by_code[safe], 0).astype(np.int64)
+    losses = np.where(has_code, losses_by_code[safe], 0).astype(np.int64)
+    fallback = attrs["name"].to_numpy(dtype=object) if "name" in attrs.columns else np.full(len(attrs), None, dtype=object)
+    names = np.where(has_code, codes.names[safe], fallback)
+    if "overall" in attrs.columns:
+        overall = pd.to_numeric(attrs["overall"], errors="coerce").to_numpy(dtype=float)
+    else:
+        overall = np.full(len(attrs), np.nan)
+
+    type_list, membership = type_membership(attrs, types)
+
+    total = wins + losses
+    ranked = total >= max(min_battles, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        win_rate = np.where(ranked, wins / np.where(total > 0, total, 1), 0.0)
+    has_overall = ~np.isnan(overall)
+
+    # Uma multiplicação: (tipos × pokémons) @ (pokémons × métricas)
+    values = np.column_stack([
+        ranked.astype(float),
+        win_rate,
+        wins,
+        losses,
+        np.where(has_overall, overall, 0.0),
+        has_overall.astype(float),
+    ])
+    sums = membership.T @ values
+    with np.errstate(invalid="ignore", divide="ignore"):
+        aggregates = pd.DataFrame({
+            "type": type_list,
+            "taxa_media_vitoria": sums[:, 1] / sums[:, 0],
+            "qtd_pokemons": sums[:, 0].astype(int),
+            "wins": sums[:, 2].astype(int),
+            "losses": sums[:, 3].astype(int),
+            "overall_medio": sums[:, 4] / sums[:, 5],
+        })
+    aggregates = aggregates[aggregates["qtd_pokemons"] > 0]
+    aggregates = aggregates.sort_values("taxa_media_vitoria", ascending=False, ignore_index=True)
+
+    return TypeStats(
+        types=type_list,
+        ids=attrs["id"].to_numpy(),
+        names=names,
+        membership=membership,
+        wins=wins,
+        losses=losses,
+        overall=overall,
+        aggregates=aggregates,
+    )
+
+
+# ---------------------
+# Confrontos tipo x tipo
+# ---------------------
+
+_matchups_cache = ArtifactCache("type_matchups", cache_dir=DEFAULT_CACHE_DIR, max_entries=4)
+
+
+@dataclass
+class TypeMatchups:
+    """Vitórias acumuladas entre tipos.
+
+    `wins[a, b]`: combates em que um pokémon com o tipo `a` venceu um com o
+    tipo `b` (pokémons de dois tipos contam para cada um deles).
+    `combo_wins[a, b]`: o mesmo por combinação de tipos ("Fire/Flying").
+    """
+
+    types: List[str]
+    combos: List[str]
+    pokemon_types: np.ndarray   # código do pokémon -> (tipo 1, tipo 2), -1 se ausente
+    pokemon_combo: np.ndarray   # código do pokémon -> índice da combinação, -1 se ausente
+    wins: np.ndarray
+    combo_wins: np.ndarray
+    n_combats: int = 0
+    source_key: str = ""        # hash de pokémons/tipos usados nas tabelas de consulta
+    prefix_key: str = ""        # `prefix_signature` dos combates já acumulados
+
+    @staticmethod
+    def _rates(wins: np.ndarray) -> np.ndarray:
+        games = wins + wins.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(games > 0, wins / games, np.nan)
+
+    @property
+    def win_rate(self) -> pd.DataFrame:
+        return pd.DataFrame(self._rates(self.wins), index=self.types, columns=self.types)
+
+    @property
+    def games(self) -> pd.DataFrame:
+        return pd.DataFrame(self.wins + self.wins.T, index=self.types, columns=self.types)
+
+    def combo_win_rate(self, top: Optional[int] = None) -> pd.DataFrame:
+        """Taxa entre combinações; `top` limita às combinações com mais combates."""
+        rates = pd.DataFrame(self._rates(self.combo_wins), index=self.combos, columns=self.combos)
+        if top is not None:
+            order = np.argsort(-(self.combo_wins.sum(axis=0) + self.combo_wins.sum(axis=1)), kind="stable")[:top]
+            labels = [self.combos[i] for i in order]
+            rates = rates.loc[labels, labels]
+        return rates
+
+    def update(self, codes: CombatCodes, prefix_key: Optional[str] = None) -> "TypeMatchups":
+        """Acumula os combates `codes[n_combats:]` (os anteriores já foram contados).
+
+        `prefix_key` é a `prefix_signature` de `codes` inteiro, se já calculada.
+        """
+        n_new = codes.n_pokemon - len(self.pokemon_types)
+        if n_new > 0:  # nomes novos sem tipo conhecido
+            self.pokemon_types = np.vstack([self.pokemon_types, np.full((n_new, 2), -1)])
+            self.pokemon_combo = np.concatenate([self.pokemon_combo, np.full(n_new, -1)])
+
+        winner = codes.winner[self.n_combats:]
+        loser = codes.loser[self.n_combats:]
+        weight = codes.count[self.n_combats:] if codes.count is not None else None
+
+        def counts(a: np.ndarray, b: np.ndarray, size: int) -> np.ndarray:
+            ok = (a >= 0) & (b >= 0)
+            w = weight[ok] if weight is not None else None
+            return np.bincount(a[ok] * size + b[ok], weights=w, minlength=size * size).astype(np.int64).reshape(size, size)
+
+        k = len(self.types)
+        for sw in range(2):
+            for sl in range(2):
+                self.wins += counts(self.pokemon_types[winner, sw], self.pokemon_types[loser, sl], k)
+
+        c = len(self.combos)
+        self.combo_wins += counts(self.pokemon_combo[winner], self.pokemon_combo[loser], c)
+        self.n_combats = len(codes)
+        self.prefix_key = prefix_key or prefix_signature(codes, self.n_combats, len(self.pokemon_types))
+        return self
+
+
+def _source_key(pokemons: pd.DataFrame, attrs: pd.DataFrame, types: Sequence[str]) -> str:
+    cols = [c for c in ("id", "types", *_TYPE_FALLBACK_COLUMNS) if c in attrs.columns]
+    return fingerprint(pokemons[["id", "name"]], attrs[cols], list(types))
+
+
+def build_type_matchups(
+    codes: CombatCodes,
+    pokemons: pd.DataFrame,
+    attrs: pd.DataFrame,
+    types: Sequence[str] = OFFICIAL_TYPES_EN,
+) -> TypeMatchups:
+    """Monta as tabelas de consulta código -> tipo e acumula todos os combates.
+
+    Os códigos são ligados aos atributos pelo nome (`codes.names`) e pelo id em `pokemons`.
+    """
+    type_list = list(types)
+    long = _types_long(attrs)
+    long = long[long["slot"] < 2]
+    type_idx = pd.Index(type_list).get_indexer(long["type"])
+    long = long.assign(t=type_idx)[type_idx >= 0]
+
+    # Tipos por linha de attrs (slot 0 e 1)
+    by_row = np.full((len(attrs), 2), -1, dtype=np.int64)
+    by_row[long["row"].to_numpy(dtype=np.int64), long["slot"].to_numpy(dtype=np.int64)] = long["t"].to_numpy()
+
+    # Combinação ("Fire" ou "Fire/Flying") por linha de attrs
+    labels = np.array([
+        type_list[a] if b < 0 else f"{type_list[a]}/{type_list[b]}" if a >= 0 else ""
+        for a, b in by_row
+    ], dtype=object)
+    combos = sorted(set(labels) - {""})
+    combo_by_row = pd.Index(combos).get_indexer(labels)
+
+    # Código do pokémon -> linha de attrs (nome -> id em pokemons -> 1ª linha com o id)
+    n = codes.n_pokemon
+    first_rows = np.flatnonzero(~attrs["id"].duplicated().to_numpy())
+    id_by_name = pokemons.drop_duplicates("name").set_index("name")["id"]
+    found = pd.Index(attrs["id"].to_numpy()[first_rows]).get_indexer(pd.Series(codes.names).map(id_by_name))
+    attr_row = np.where(found >= 0, first_rows[np.clip(found, 0, None)], -1)
+    has = attr_row >= 0
+    pokemon_types = np.full((n, 2), -1, dtype=np.int64)
+    pokemon_types[has] = by_row[attr_row[has]]
+    pokemon_combo = np.full(n, -1, dtype=np.int64)
+    pokemon_combo[has] = combo_by_row[attr_row[has]]
+
+    matchups = TypeMatchups(
+        types=type_list,
+        combos=combos,
+        pokemon_types=pokemon_types,
+        pokemon_combo=pokemon_combo,
+        wins=np.zeros((len(type_list), len(type_list)), dtype=np.int64),
+        combo_wins=np.zeros((len(combos), len(combos)), dtype=np.int64),
+        source_key=_source_key(pokemons, attrs, type_list),
+    )
+    return matchups.update(codes)
+
+
+def refresh_type_matchups(
+    previous: Optional[TypeMatchups],
+    codes: CombatCodes,
+    pokemons: pd.DataFrame,
+    attrs: pd.DataFrame,
+    types: Sequence[str] = OFFICIAL_TYPES_EN,
+) -> TypeMatchups:
+    """Reaproveita `previous` quando os combates novos só foram anexados ao final.
+
+    Se pokémons/tipos mudaram ou o histórico já contado não é mais prefixo de
+    `codes`, reconstrói do zero. `previous` não é alterado.
+    """
+    if (
+        previous is not None
+        and previous.source_key == _source_key(pokemons, attrs, types)
+        and len(codes) >= previous.n_combats
+        and codes.n_pokemon >= len(previous.pokemon_types)
+    ):
+        # Uma passada pelo log confere o prefixo antigo e já assina o novo
+        old_key, new_key = prefix_signatures(
+            codes, (previous.n_combats, len(previous.pokemon_types)), (len(codes), codes.n_pokemon)
+        )
+        if old_key == previous.prefix_key:
+            if len(codes) == previous.n_combats and codes.n_pokemon == len(previous.pokemon_types):
+                return previous
+            fresh = replace(
+                previous,
+                pokemon_types=previous.pokemon_types.copy(),
+                pokemon_combo=previous.pokemon_combo.copy(),
+                wins=previous.wins.copy(),
+                combo_wins=previous.combo_wins.copy(),
+            )
+            return fresh.update(codes, prefix_key=new_key)
+    return build_type_matchups(codes, pokemons, attrs, types)
+
+
+def latest_type_matchups(
+    codes: CombatCodes,
+    pokemons: pd.DataFrame,
+    attrs: pd.DataFrame,
+    types: Sequence[str] = OFFICIAL_TYPES_EN,
+) -> TypeMatchups:
+    """`refresh_type_matchups` a partir da última matriz gravada em `data/cache/type_matchups/`.
+
+    A base fica no cache de artefatos sob a chave dos pokémons/tipos: uma
+    versão nova dos dados com combates anexados só soma a cauda, também
+    depois de reiniciar o processo.
+    """
+    key = fingerprint("latest", _source_key(pokemons, attrs, types))
+    previous = _matchups_cache.get(key)
+    matchups = refresh_type_matchups(previous, codes, pokemons, attrs, types)
+    if matchups is not previous:
+        _matchups_cache.put(key, matchups)
+    return matchups
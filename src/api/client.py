@@ -2,6 +2,9 @@
 
 Responsável por autenticar (login), montar URLs, fazer requisições com
 tratamento simples de erros e respeitar rate-limit (429) com backoff.
+Negocia compressão (gzip/brotli) e decodifica JSON via `src.api.codec`.
+Com `stream_json` o corpo é lido em blocos e decodificado à medida que
+chega (`codec.JsonStream`), sem manter a resposta inteira em memória.
 """
 
 import requests
@@ -9,12 +12,14 @@ import time
 import random
 from typing import Optional
 from src.config import Config
+from src.api import codec
 
 
 class JwtApiClient:
     def __init__(self, config: Config):
         self.config = config
         self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": codec.ACCEPT_ENCODING})
         self._token: Optional[str] = None
 
     def url(self, endpoint: str) -> str:
@@ -55,8 +60,21 @@ class JwtApiClient:
         self._token = token
         self.session.headers.update({"Authorization": f"{token_type} {token}"})
 
-    def _request(self, method: str, endpoint: str, *, params=None, json=None, retry_on_401: bool = True):
-        """Requisição com autenticação, retry em 401 e tratamento de 429 (rate limit)."""
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        *,
+        params=None,
+        json=None,
+        retry_on_401: bool = True,
+        stream: bool = False,
+    ):
+        """Requisição com autenticação, retry em 401 e tratamento de 429 (rate limit).
+
+        Com `stream=True` o corpo não é lido aqui; respostas descartadas
+        (401, 429, 5xx) são fechadas para devolver a conexão ao pool.
+        """
         url = self.url(endpoint)
         if not self._token:
             self.login()
@@ -65,12 +83,13 @@ class JwtApiClient:
         base_backoff = 0.5  # segundos
 
         for attempt in range(max_retries):
-            resp = self.session.request(method, url, params=params, json=json, timeout=60)
+            resp = self.session.request(method, url, params=params, json=json, timeout=60, stream=stream)
 
             # 401: tentar renovar o token uma vez neste ciclo
             if resp.status_code == 401 and retry_on_401:
+                resp.close()
                 self.login()
-                resp = self.session.request(method, url, params=params, json=json, timeout=60)
+                resp = self.session.request(method, url, params=params, json=json, timeout=60, stream=stream)
 
             # 429: respeita Retry-After ou aplica backoff exponencial com jitter
             if resp.status_code == 429:
@@ -82,11 +101,13 @@ class JwtApiClient:
                         delay = base_backoff * (2 ** attempt) + random.uniform(0, 0.2)
                 else:
                     delay = base_backoff * (2 ** attempt) + random.uniform(0, 0.2)
+                resp.close()
                 time.sleep(min(delay, 10))
                 continue
 
             # 502/503/504: falhas transitórias
             if resp.status_code in (502, 503, 504):
+                resp.close()
                 delay = base_backoff * (2 ** attempt) + random.uniform(0, 0.2)
                 time.sleep(min(delay, 5))
                 continue
@@ -100,7 +121,25 @@ class JwtApiClient:
 
     def get_json(self, endpoint: str, *, params=None):
         resp = self._request("GET", endpoint, params=params)
-        return resp.json() if resp.content else None
+        return codec.loads(resp.content) if resp.content else None
+
+    def stream_json(self, endpoint: str, *, params=None, key: str = "combats") -> codec.JsonStream:
+        """Resposta decodificada em streaming: itere o resultado (ou `.columns()`) para ler os registros.
+
+        A resposta é fechada ao fim da iteração; `meta` traz os demais campos
+        do topo (page, per_page, total). NDJSON é reconhecido pelo Content-Type.
+        """
+        resp = self._request("GET", endpoint, params=params, stream=True)
+        content_type = resp.headers.get("Content-Type", "")
+        ndjson = "ndjson" in content_type or "jsonl" in content_type
+
+        def chunks():
+            try:
+                yield from resp.iter_content(chunk_size=codec.STREAM_CHUNK_BYTES)
+            finally:
+                resp.close()
+
+        return codec.JsonStream(chunks(), key=key, ndjson=ndjson)
 
     def health(self):
         return self.get_json(self.config.health_endpoint)
@@ -136,6 +175,7 @@ class JwtApiClient:
             data = self.list_pokemon(page=page, per_page=per_page)
             pokemons = data["pokemons"]
             total = data["total"]
+            per_page = int(data.get("per_page") or per_page)  # teto do servidor
             all_pokemons.extend(pokemons)
 
             if page * per_page >= total or len(pokemons) < per_page:
@@ -171,6 +211,33 @@ class JwtApiClient:
             "total": payload.get("total", len(combats)),
         }
 
+    def list_combats_columns(self, *, page: int | None = None, per_page: int | None = None) -> dict:
+        """Como `list_combats`, mas devolve os combates em `codec.CombatColumns`."""
+        qparams: dict = {}
+        if page is not None:
+            qparams["page"] = page
+        if per_page is not None:
+            qparams["per_page"] = per_page
+
+        resp = self._request("GET", self.config.combats_endpoint, params=qparams)
+        payload = codec.decode_combat_page(resp.content) if resp.content else {"combats": codec.CombatColumns()}
+        combats = payload["combats"]
+        return {
+            "combats": combats,
+            "page": payload.get("page") or page or 1,
+            "per_page": payload.get("per_page") or per_page or 10,
+            "total": payload.get("total") or len(combats),
+        }
+
+    def list_combats_stream(self, *, page: int | None = None, per_page: int | None = None) -> codec.JsonStream:
+        """Página de combates em streaming (`codec.JsonStream`), para páginas muito grandes."""
+        qparams: dict = {}
+        if page is not None:
+            qparams["page"] = page
+        if per_page is not None:
+            qparams["per_page"] = per_page
+        return self.stream_json(self.config.combats_endpoint, params=qparams, key="combats")
+
     def list_all_combats(self, *, per_page: int = 50) -> list[dict]:
         page = 1
         all_combats: list[dict] = []
@@ -180,6 +247,7 @@ class JwtApiClient:
             data = self.list_combats(page=page, per_page=per_page)
             combats = data.get("combats", [])
             total = data.get("total", len(combats))
+            per_page = int(data.get("per_page") or per_page)  # teto do servidor
             all_combats.extend(combats)
 
             if page * per_page >= total or len(combats) < per_page:
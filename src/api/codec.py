@@ -0,0 +1,306 @@
+"""Decodificação JSON e negociação de compressão para o cliente da API.
+
+Usa `msgspec` ou `orjson` quando instalados (ambos opcionais) e cai para o
+`json` da biblioteca padrão. Páginas de `/combats` podem ser decodificadas
+direto em colunas (listas por campo) sem montar um dict por linha.
+
+Para páginas muito grandes (ou exportações em massa) há o modo streaming,
+`JsonStream`: os bytes da resposta são decodificados à medida que chegam
+(`json.JSONDecoder.raw_decode` sobre um buffer que só guarda o trecho
+ainda não consumido), e os registros saem um a um ou em blocos de
+colunas. O pico de memória passa a depender do tamanho do bloco, não do
+tamanho da página. Aceita JSON (`{"combats": [...], "total": ...}` ou uma
+lista no topo) e NDJSON (um registro por linha).
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+try:  # decodificador mais rápido e com structs tipadas
+    import msgspec
+except ImportError:  # pragma: no cover - dependência opcional
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+try:  # o urllib3 só descomprime brotli se um destes pacotes existir
+    import brotli  # noqa: F401
+
+    _HAS_BROTLI = True
+except ImportError:  # pragma: no cover - dependência opcional
+    try:
+        import brotlicffi  # noqa: F401
+
+        _HAS_BROTLI = True
+    except ImportError:
+        _HAS_BROTLI = False
+
+
+ACCEPT_ENCODING = "br, gzip, deflate" if _HAS_BROTLI else "gzip, deflate"
+
+COMBAT_FIELDS = ("first_pokemon", "second_pokemon", "winner")
+
+
+def backend() -> str:
+    """Nome do decodificador em uso (para logs)."""
+    if msgspec is not None:
+        return "msgspec"
+    if orjson is not None:
+        return "orjson"
+    return "json"
+
+
+def loads(content: bytes) -> Any:
+    """Decodifica bytes JSON com o backend mais rápido disponível."""
+    if msgspec is not None:
+        return msgspec.json.decode(content)
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+@dataclass
+class CombatColumns:
+    first_pokemon: List[Any] = field(default_factory=list)
+    second_pokemon: List[Any] = field(default_factory=list)
+    winner: List[Any] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.winner)
+
+    def extend(self, other: "CombatColumns") -> None:
+        self.first_pokemon.extend(other.first_pokemon)
+        self.second_pokemon.extend(other.second_pokemon)
+        self.winner.extend(other.winner)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in COMBAT_FIELDS}
+
+
+if msgspec is not None:
+
+    class CombatRecord(msgspec.Struct):
+        first_pokemon: Union[int, str]
+        second_pokemon: Union[int, str]
+        winner: Union[int, str]
+
+    class CombatPage(msgspec.Struct):
+        combats: List[CombatRecord] = []
+        page: Optional[int] = None
+        per_page: Optional[int] = None
+        total: Optional[int] = None
+
+    _combat_page_decoder = msgspec.json.Decoder(CombatPage)
+
+
+def decode_combat_page(content: bytes) -> dict:
+    """Decodifica uma página de combates em `CombatColumns`.
+
+    Com `msgspec` cada combate vira uma struct tipada (sem dict por linha);
+    sem ele, o payload é decodificado normalmente e transposto em colunas.
+    Levanta `ValueError` se os registros não tiverem o formato esperado.
+    """
+    if msgspec is not None:
+        try:
+            page = _combat_page_decoder.decode(content)
+        except msgspec.ValidationError as e:
+            raise ValueError(f"Página de combates fora do formato esperado: {e}") from e
+        records = page.combats
+        cols = CombatColumns(
+            first_pokemon=[r.first_pokemon for r in records],
+            second_pokemon=[r.second_pokemon for r in records],
+            winner=[r.winner for r in records],
+        )
+        meta = {"page": page.page, "per_page": page.per_page, "total": page.total}
+    else:
+        payload = loads(content) or {}
+        records = payload.get("combats", []) if isinstance(payload, dict) else []
+        try:
+            cols = CombatColumns(*([r[name] for r in records] for name in COMBAT_FIELDS))
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Página de combates fora do formato esperado: {e}") from e
+        meta = {k: payload.get(k) for k in ("page", "per_page", "total")} if isinstance(payload, dict) else {}
+    return {"combats": cols, **meta}
+
+
+STREAM_CHUNK_BYTES = 1 << 16
+STREAM_CHUNK_ROWS = 50_000
+
+_WS = re.compile(r"[ \t\n\r]*")
+_KEY = re.compile(r'"((?:[^"\\]|\\.)*)"[ \t\n\r]*:')
+_decoder = json.JSONDecoder()
+
+
+class _NeedMore(Exception):
+    """O buffer terminou no meio de um valor."""
+
+
+class JsonStream:
+    """Registros de uma resposta JSON/NDJSON, decodificados à medida que os bytes chegam.
+
+    `chunks` são os blocos de bytes da resposta (ex.: `resp.iter_content`).
+    Itera sobre os elementos do array `key` (ou da lista no topo); os demais
+    campos do topo (page, per_page, total...) vão para `meta`, que só fica
+    completo ao fim da iteração, pois podem vir depois do array. Levanta
+    `ValueError` se o conteúdo não for JSON válido.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], *, key: str = "combats", ndjson: bool = False):
+        self._chunks = iter(chunks)
+        self.key = key
+        self.ndjson = ndjson
+        self.meta: Dict[str, Any] = {}
+        self.n_records = 0
+        self._consumed = False
+
+    def __iter__(self) -> Iterator[Any]:
+        for batch in self.batches():
+            yield from batch
+
+    def batches(self) -> Iterator[List[Any]]:
+        """Registros em listas, na granularidade em que chegam (um bloco de bytes por vez)."""
+        if self._consumed:
+            raise RuntimeError("JsonStream só pode ser percorrido uma vez.")
+        self._consumed = True
+        for batch in self._iter_ndjson() if self.ndjson else self._iter_json():
+            self.n_records += len(batch)
+            yield batch
+
+    def columns(self, fields=COMBAT_FIELDS, chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[CombatColumns]:
+        """Blocos de ~`chunk_rows` registros (completados até o fim do lote recebido) em `CombatColumns`.
+
+        Valores repetidos (nomes de pokémons) são compartilhados entre as
+        linhas, em vez de um objeto str por célula.
+        """
+        memo: Dict[Any, Any] = {}
+        cols = CombatColumns()
+        for batch in self.batches():
+            for name, target in zip(fields, (cols.first_pokemon, cols.second_pokemon, cols.winner)):
+                try:
+                    values = [r[name] for r in batch]
+                except (KeyError, TypeError) as e:
+                    raise ValueError(f"Registro fora do formato esperado: {e}") from e
+                target.extend(map(memo.setdefault, values, values))
+            if len(cols) >= chunk_rows:
+                yield cols
+                cols = CombatColumns()
+        if len(cols):
+            yield cols
+
+    # --- parsing ---
+
+    def _iter_ndjson(self) -> Iterator[List[Any]]:
+        tail = b""
+        for chunk in self._chunks:
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            yield [loads(line) for line in lines if line.strip()]
+        if tail.strip():
+            yield [loads(tail)]
+
+    def _iter_json(self) -> Iterator[List[Any]]:
+        text = codecs.getincrementaldecoder("utf-8")()
+        buf, pos, done = "", 0, False
+        no_batch_until = 0
+        state = "start"  # start -> key <-> array/item -> end
+
+        def decode(at: int):
+            # Um valor que termina exatamente no fim do buffer pode estar
+            # truncado (ex.: número); só é aceito quando não vem mais nada.
+            try:
+                value, end = _decoder.raw_decode(buf, at)
+            except json.JSONDecodeError as e:
+                if done:
+                    raise ValueError(f"JSON inválido na posição {e.pos}: {e.msg}") from e
+                raise _NeedMore from None
+            if end >= len(buf) and not done:
+                raise _NeedMore
+            return value, end
+
+        while True:
+            pos = _WS.match(buf, pos).end()
+            try:
+                if pos >= len(buf):
+                    raise _NeedMore
+                ch = buf[pos]
+                if state == "start":
+                    if ch == "{":
+                        state = "key"
+                    elif ch == "[":
+                        state, self.key = "array", None
+                    else:
+                        raise ValueError(f"JSON inválido: esperado objeto ou lista, veio {ch!r}")
+                    pos += 1
+                elif state == "key":
+                    if ch == ",":
+                        pos += 1
+                        continue
+                    if ch == "}":
+                        state = "end"
+                        pos += 1
+                        continue
+                    m = _KEY.match(buf, pos)
+                    if m is None:
+                        if done or ch != '"':
+                            raise ValueError(f"JSON inválido: chave esperada na posição {pos}")
+                        raise _NeedMore
+                    name = json.loads(f'"{m.group(1)}"')
+                    after = _WS.match(buf, m.end()).end()
+                    if after >= len(buf):
+                        raise _NeedMore
+                    if name == self.key and buf[after] == "[":
+                        state, pos = "array", after + 1
+                    else:
+                        self.meta[name], pos = decode(after)
+                elif state == "item":
+                    # Depois de um registro: vírgula ou fim do array
+                    if ch == ",":
+                        state = "array"
+                    elif ch == "]":
+                        state = "key" if self.key is not None else "end"
+                    else:
+                        raise ValueError(f"JSON inválido: esperado ',' ou ']', veio {ch!r}")
+                    pos += 1
+                elif state == "array":
+                    if ch == "]":
+                        state = "key" if self.key is not None else "end"
+                        pos += 1
+                        continue
+                    # Todos os registros completos do buffer de uma vez: o trecho
+                    # até o último `}` vira uma lista no backend rápido. Se o corte
+                    # cair dentro de um registro (objeto aninhado, string), o trecho
+                    # não é JSON válido e os registros saem um a um até passar dele.
+                    batch = None
+                    cut = buf.rfind("}", pos) + 1
+                    if cut > max(pos, no_batch_until):
+                        try:
+                            batch = loads("[" + buf[pos:cut] + "]")
+                        except ValueError:
+                            no_batch_until = cut
+                    if batch is None:
+                        record, pos = decode(pos)
+                        batch = [record]
+                    else:
+                        pos = cut
+                    state = "item"
+                    yield batch
+                else:
+                    raise ValueError(f"JSON inválido: conteúdo após o fim: {buf[pos:pos + 20]!r}")
+            except _NeedMore:
+                if done:
+                    if state == "end" or (state == "start" and not buf[pos:].strip()):
+                        return
+                    raise ValueError("JSON truncado: a resposta terminou no meio do conteúdo.") from None
+                chunk = next(self._chunks, None)
+                done = chunk is None
+                # Descarta o que já foi consumido antes de anexar o bloco novo
+                buf, pos = buf[pos:] + text.decode(chunk or b"", final=done), 0
+                no_batch_until = 0
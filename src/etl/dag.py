@@ -0,0 +1,226 @@
+"""Execução do ETL como um pequeno DAG de estágios.
+
+Cada estágio roda na sua própria thread assim que as dependências
+terminam; estágios independentes (ex.: pokémons e combates) rodam ao mesmo
+tempo. Dados podem fluir entre estágios por `Channel` (fila limitada): o
+consumidor começa a trabalhar com o primeiro item, sem esperar o produtor
+terminar, e o limite da fila segura um produtor rápido demais.
+
+Ao final, `DagReport` traz início/fim de cada estágio e o caminho crítico
+(a cadeia de estágios que determinou o tempo total).
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+
+class Channel:
+    """Fila limitada entre um estágio produtor e um consumidor.
+
+    O produtor chama `put` e, ao terminar, `close`; o consumidor itera até
+    o fechamento. `maxsize` limita a memória e aplica contrapressão.
+    """
+
+    _CLOSED = object()
+
+    def __init__(self, name: str, maxsize: int = 256):
+        self.name = name
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._cancelled = threading.Event()
+        self.producer: Optional[str] = None
+
+    def put(self, item: Any) -> None:
+        if not self._offer(item):
+            raise ChannelCancelled(f"Canal {self.name!r} sem consumidor.")
+
+    def put_many(self, items: Sequence[Any]) -> None:
+        for item in items:
+            self.put(item)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def close(self) -> None:
+        self._offer(self._CLOSED)
+
+    def _offer(self, item: Any) -> bool:
+        # Espera com timeout para não travar o produtor se o consumidor morrer
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            item = self._queue.get()
+            if item is self._CLOSED:
+                return
+            yield item
+
+
+class ChannelCancelled(RuntimeError):
+    """O consumidor do canal terminou (ou falhou) antes do produtor."""
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    deps: Sequence[str] = ()
+    produces: Optional[Channel] = None
+    consumes: Optional[Channel] = None
+
+
+@dataclass
+class StageTiming:
+    name: str
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class DagReport:
+    timings: Dict[str, StageTiming]
+    critical_path: List[str]
+    wall_time: float
+    results: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    def format(self) -> str:
+        """Tabela em texto: estágios por início, duração e marca do caminho crítico."""
+        if not self.timings:
+            return "Nenhum estágio executado."
+        t0 = min(t.start for t in self.timings.values())
+        lines = [f"{'estágio':<22} {'início':>8} {'duração':>9}  crítico"]
+        for t in sorted(self.timings.values(), key=lambda t: t.start):
+            mark = "*" if t.name in self.critical_path else ""
+            lines.append(f"{t.name:<22} {t.start - t0:>7.1f}s {t.duration:>8.1f}s  {mark}")
+        lines.append(f"Tempo total: {self.wall_time:.1f}s | caminho crítico: {' -> '.join(self.critical_path)}")
+        return "\n".join(lines)
+
+
+class StageFailed(RuntimeError):
+    """Algum estágio falhou; os demais foram interrompidos quando possível."""
+
+
+class StageGraph:
+    """Grafo de estágios executado por `run()` com uma thread por estágio.
+
+    O valor de retorno de cada estágio fica em `results[nome]`, visível
+    para os estágios que dependem dele.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Stage] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[Dict[str, Any]], Any],
+        *,
+        deps: Sequence[str] = (),
+        produces: Optional[Channel] = None,
+        consumes: Optional[Channel] = None,
+    ) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"Estágio duplicado: {name!r}")
+        if produces is not None:
+            produces.producer = name
+        self.stages[name] = Stage(name, fn, tuple(deps), produces, consumes)
+        return self
+
+    def _validate(self) -> None:
+        for stage in self.stages.values():
+            missing = [d for d in stage.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"Estágio {stage.name!r} depende de estágios inexistentes: {missing}")
+        # Ciclos: ordenação topológica simples
+        pending = {n: set(s.deps) for n, s in self.stages.items()}
+        while pending:
+            ready = [n for n, d in pending.items() if not d]
+            if not ready:
+                raise ValueError(f"Ciclo entre os estágios: {sorted(pending)}")
+            for n in ready:
+                del pending[n]
+            for d in pending.values():
+                d.difference_update(ready)
+
+    def run(self) -> DagReport:
+        self._validate()
+        results: Dict[str, Any] = {}
+        timings: Dict[str, StageTiming] = {}
+        done = {name: threading.Event() for name in self.stages}
+        errors: List[str] = []
+        lock = threading.Lock()
+
+        def worker(stage: Stage) -> None:
+            for dep in stage.deps:
+                done[dep].wait()
+            try:
+                if errors:
+                    return
+                start = time.perf_counter()
+                value = stage.fn(results)
+                end = time.perf_counter()
+                with lock:
+                    results[stage.name] = value
+                    timings[stage.name] = StageTiming(stage.name, start, end)
+            except Exception:
+                with lock:
+                    errors.append(f"[{stage.name}]\n{traceback.format_exc()}")
+            finally:
+                # O consumidor nunca fica esperando um produtor que falhou
+                if stage.produces is not None:
+                    stage.produces.close()
+                # ... e um produtor não fica bloqueado num canal sem consumidor
+                if stage.consumes is not None:
+                    stage.consumes.cancel()
+                done[stage.name].set()
+
+        t0 = time.perf_counter()
+        threads = [
+            threading.Thread(target=worker, args=(stage,), name=f"stage-{stage.name}", daemon=True)
+            for stage in self.stages.values()
+        ]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        wall = time.perf_counter() - t0
+
+        if errors:
+            raise StageFailed("Falha no ETL:\n" + "\n".join(errors))
+        return DagReport(timings, self._critical_path(timings), wall, results)
+
+    def _critical_path(self, timings: Dict[str, StageTiming]) -> List[str]:
+        """Volta do último estágio a terminar pelo predecessor que terminou por último.
+
+        Predecessores são as dependências e o produtor do canal consumido.
+        """
+        if not timings:
+            return []
+        current = max(timings.values(), key=lambda t: t.end).name
+        path = [current]
+        while True:
+            stage = self.stages[current]
+            preds = list(stage.deps)
+            if stage.consumes is not None and stage.consumes.producer:
+                preds.append(stage.consumes.producer)
+            preds = [p for p in preds if p in timings]
+            if not preds:
+                break
+            current = max(preds, key=lambda p: timings[p].end)
+            path.append(current)
+        return path[::-1]
@@ -0,0 +1,147 @@
+"""Autoajuste do tamanho de página (per_page) para extrações paginadas.
+
+Sonda valores crescentes de `per_page` na primeira página de cada recurso,
+mede a latência por item e escolhe o tamanho com melhor vazão aceito pelo
+servidor. Respeita o teto devolvido no campo `per_page` da resposta e
+guarda a escolha em `data/per_page.json` para as próximas execuções.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.api.client import JwtApiClient
+
+
+# Candidatos sondados em ordem crescente (o primeiro é o padrão histórico)
+DEFAULT_CANDIDATES: tuple[int, ...] = (50, 100, 200, 500, 1000, 2000, 5000)
+
+TUNING_FILE = "per_page.json"
+
+
+@dataclass
+class PageProbe:
+    requested: int
+    accepted: int
+    items: int
+    seconds: float
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def seconds_per_item(self) -> float:
+        return self.seconds / self.items if self.items else float("inf")
+
+
+def _fetchers(client: JwtApiClient) -> Dict[str, Callable[..., dict]]:
+    return {
+        "pokemons": client.list_pokemon,
+        "combats": client.list_combats,
+    }
+
+
+def probe_page_sizes(
+    fetch: Callable[..., dict],
+    key: str,
+    candidates: Iterable[int] = DEFAULT_CANDIDATES,
+    *,
+    sleep: float = 0.2,
+) -> List[PageProbe]:
+    """Busca a página 1 com cada candidato e mede o tempo de resposta.
+
+    Para de sondar quando o servidor limita o `per_page` (teto atingido) ou
+    quando a página já contém todos os itens do recurso.
+    """
+    probes: List[PageProbe] = []
+    for requested in sorted(set(int(c) for c in candidates if int(c) > 0)):
+        start = time.perf_counter()
+        payload = fetch(page=1, per_page=requested)
+        elapsed = time.perf_counter() - start
+
+        items = len(payload.get(key, []))
+        accepted = int(payload.get("per_page") or requested)
+        total = int(payload.get("total") or 0)
+        probes.append(PageProbe(requested=requested, accepted=min(accepted, requested), items=items, seconds=elapsed))
+        print(f"Sondagem {key}: per_page={requested} -> {items} itens em {elapsed:.3f}s (aceito: {accepted})")
+
+        if accepted < requested:
+            break  # teto do servidor
+        if items < requested or (total and requested >= total):
+            break  # recurso inteiro coube na página
+        time.sleep(sleep)
+    return probes
+
+
+def choose_per_page(probes: List[PageProbe], default: int = DEFAULT_CANDIDATES[0]) -> int:
+    """Escolhe o tamanho com maior vazão (itens/s) entre os aceitos pelo servidor."""
+    valid = [p for p in probes if p.items > 0]
+    if not valid:
+        return default
+    best = max(valid, key=lambda p: (p.items_per_second, p.accepted))
+    return best.accepted
+
+
+def load_tuned_per_page(data_dir: Path, key: str) -> Optional[int]:
+    path = Path(data_dir) / TUNING_FILE
+    if not path.exists():
+        return None
+    try:
+        saved = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    value = (saved.get(key) or {}).get("per_page")
+    return int(value) if value else None
+
+
+def save_tuned_per_page(data_dir: Path, key: str, per_page: int, probes: List[PageProbe]) -> Path:
+    path = Path(data_dir) / TUNING_FILE
+    saved: dict = {}
+    if path.exists():
+        try:
+            saved = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            saved = {}
+    saved[key] = {
+        "per_page": int(per_page),
+        "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "probes": [
+            {"requested": p.requested, "accepted": p.accepted, "items": p.items, "seconds": round(p.seconds, 4)}
+            for p in probes
+        ],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(saved, indent=2), encoding="utf-8")
+    return path
+
+
+def autotune_per_page(
+    client: JwtApiClient,
+    key: str,
+    data_dir: Path,
+    *,
+    candidates: Iterable[int] = DEFAULT_CANDIDATES,
+    refresh: bool = False,
+) -> int:
+    """Retorna o `per_page` para o recurso (`pokemons` ou `combats`).
+
+    Usa o valor salvo de execuções anteriores; com `refresh=True` (ou sem
+    valor salvo) sonda o servidor novamente e persiste a nova escolha.
+    """
+    if not refresh:
+        saved = load_tuned_per_page(data_dir, key)
+        if saved:
+            print(f"per_page de {key} (salvo): {saved}")
+            return saved
+
+    fetch = _fetchers(client)[key]
+    probes = probe_page_sizes(fetch, key, candidates)
+    chosen = choose_per_page(probes)
+    save_tuned_per_page(data_dir, key, chosen, probes)
+    print(f"per_page de {key} (autoajuste): {chosen}")
+    return chosen
@@ -2,6 +2,15 @@
 
 Extrai dados paginados (pokemons, combats, atributos), trata e salva em
 arquivos CSV sob `data/`, com pequenos sleeps para evitar 429.
+
+`run()` monta as etapas como um DAG (`src.etl.dag`): pokémons e combates
+são extraídos em paralelo, e os atributos começam assim que chega a
+primeira página de pokémons (ids passados por uma fila limitada). Antes
+de gravar, `validate` confere os dados tratados (`src.etl.validation`).
+`save` grava também o manifesto de versão (`src.analysis.manifest`):
+tabelas com o mesmo hash da versão anterior não são regravadas (ou são
+ligadas por hardlink a partir do snapshot anterior), nem os stores
+binários derivados delas. Ao final é impresso o tempo de cada etapa e o caminho crítico.
 """
 
 from __future__ import annotations
@@ -9,12 +18,28 @@ from __future__ import annotations
 import math
 import time
 from pathlib import Path
-from typing import Iterable, List, Dict, Any, Iterable as TIterable
+from typing import Any, Callable, Dict, Iterable, Iterable as TIterable, List, Optional
 
 import pandas as pd
 
+from src.analysis.encoding import encode_combats
+from src.analysis.manifest import MANIFEST_FILE, TABLE_FILES, DataManifest, build_manifest, read_manifest, stamp_files, write_manifest
+from src.analysis.store import link_or_copy, reuse_combat_store, store_version_dir, write_combat_store
 from src.config import load_config
+from src.api import codec
 from src.api.client import JwtApiClient
+from src.etl.dag import Channel, StageGraph
+from src.etl.paging import autotune_per_page
+from src.etl.snapshots import resolve_data_dir
+from src.etl.validation import save_quality_outputs, validate_tables
+
+
+# Ids de pokémons em trânsito entre a extração de pokémons e a de atributos
+ID_QUEUE_SIZE = 256
+
+# A partir deste per_page os combates são lidos em streaming (memória
+# limitada pelo bloco, não pela página)
+STREAM_PER_PAGE = 10_000
 
 
 def _ensure_dir(path: Path) -> None:
@@ -37,8 +62,17 @@ def _extract_list(
     return []
 
 
-def extract_pokemons(client: JwtApiClient, *, per_page: int = 50) -> pd.DataFrame:
-    """Extrai todos os pokémons com feedback de progresso por página."""
+def extract_pokemons(
+    client: JwtApiClient,
+    *,
+    per_page: int = 50,
+    on_page: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> pd.DataFrame:
+    """Extrai todos os pokémons com feedback de progresso por página.
+
+    `on_page` recebe os itens de cada página assim que ela chega (usado
+    para alimentar a extração de atributos em paralelo).
+    """
     page = 1
     all_items: list[dict] = []
     total = None
@@ -47,9 +81,13 @@ def extract_pokemons(client: JwtApiClient, *, per_page: int = 50) -> pd.DataFram
         payload = client.list_pokemon(page=page, per_page=per_page)
         items = payload.get("pokemons", [])
         total = payload.get("total", total or 0)
+        # Respeita o teto do servidor: ele pode devolver um per_page menor
+        per_page = int(payload.get("per_page") or per_page)
         if total and per_page:
             total_pages = total_pages or int(math.ceil(total / per_page))
         all_items.extend(items)
+        if on_page is not None and items:
+            on_page(items)
 
         if total_pages:
             print(f"Pokémons: página {page}/{total_pages} (acumulados: {len(all_items)}/{total})")
@@ -65,8 +103,36 @@ def extract_pokemons(client: JwtApiClient, *, per_page: int = 50) -> pd.DataFram
     return df
 
 
-def extract_combats(client: JwtApiClient, *, per_page: int = 50) -> pd.DataFrame:
-    """Extrai combats com feedback de progresso por página."""
+def extract_combats(
+    client: JwtApiClient,
+    *,
+    per_page: int = 50,
+    columnar: bool = True,
+    stream: Optional[bool] = None,
+) -> pd.DataFrame:
+    """Extrai combats com feedback de progresso por página.
+
+    Com `columnar=True` as páginas são decodificadas direto em colunas
+    (`codec.CombatColumns`); se o formato não bater, cai para o caminho
+    genérico com `pd.json_normalize`. Com `stream=True` (padrão quando
+    `per_page >= STREAM_PER_PAGE`) cada resposta é decodificada à medida
+    que chega, em blocos de colunas, e o pico de memória deixa de crescer
+    com o tamanho da página.
+    """
+    if stream is None:
+        stream = per_page >= STREAM_PER_PAGE
+    if stream:
+        try:
+            return _extract_combats_streaming(client, per_page=per_page)
+        except ValueError as e:
+            print(f"Combats: leitura em streaming indisponível ({e}); usando páginas inteiras.")
+
+    if columnar:
+        try:
+            return _extract_combats_columnar(client, per_page=per_page)
+        except ValueError as e:
+            print(f"Combats: decodificação colunar indisponível ({e}); usando caminho genérico.")
+
     page = 1
     all_items: list[dict] = []
     total = None
@@ -75,6 +141,8 @@ def extract_combats(client: JwtApiClient, *, per_page: int = 50) -> pd.DataFrame
         payload = client.list_combats(page=page, per_page=per_page)
         items = payload.get("combats", [])
         total = payload.get("total", total or 0)
+        # Respeita o teto do servidor: ele pode devolver um per_page menor
+        per_page = int(payload.get("per_page") or per_page)
         if total and per_page:
             total_pages = total_pages or int(math.ceil(total / per_page))
         all_items.extend(items)
@@ -95,17 +163,84 @@ def extract_combats(client: JwtApiClient, *, per_page: int = 50) -> pd.DataFrame
     return df
 
 
+def _extract_combats_columnar(client: JwtApiClient, *, per_page: int = 50) -> pd.DataFrame:
+    page = 1
+    columns = codec.CombatColumns()
+    total = None
+    total_pages = None
+    while True:
+        payload = client.list_combats_columns(page=page, per_page=per_page)
+        items = payload["combats"]
+        total = payload.get("total", total or 0)
+        per_page = int(payload.get("per_page") or per_page)
+        if total and per_page:
+            total_pages = total_pages or int(math.ceil(total / per_page))
+        columns.extend(items)
+
+        if total_pages:
+            print(f"Combats: página {page}/{total_pages} (acumulados: {len(columns)}/{total})")
+        else:
+            print(f"Combats: página {page} (acumulados: {len(columns)})")
+
+        if not len(items) or (page * per_page >= total):
+            break
+        page += 1
+        time.sleep(0.2)
+
+    return pd.DataFrame(columns.to_dict()) if len(columns) else pd.DataFrame()
+
+
+def _extract_combats_streaming(client: JwtApiClient, *, per_page: int) -> pd.DataFrame:
+    page = 1
+    columns = codec.CombatColumns()
+    total = None
+    total_pages = None
+    while True:
+        stream = client.list_combats_stream(page=page, per_page=per_page)
+        n_items = 0
+        for chunk in stream.columns():
+            columns.extend(chunk)
+            n_items += len(chunk)
+        total = stream.meta.get("total") or total or n_items
+        per_page = int(stream.meta.get("per_page") or per_page)
+        if total and per_page:
+            total_pages = total_pages or int(math.ceil(total / per_page))
+
+        if total_pages:
+            print(f"Combats: página {page}/{total_pages} (acumulados: {len(columns)}/{total}, streaming)")
+        else:
+            print(f"Combats: página {page} (acumulados: {len(columns)}, streaming)")
+
+        if not n_items or (page * per_page >= total):
+            break
+        page += 1
+        time.sleep(0.2)
+
+    return pd.DataFrame(columns.to_dict()) if len(columns) else pd.DataFrame()
+
+
 def extract_pokemon_attributes(
     client: JwtApiClient,
     ids: TIterable[Any],
     *,
     sleep: float = 0.2,
+    total: Optional[int] = None,
 ) -> pd.DataFrame:
-    """Extrai atributos com progresso textual (itens concluídos / total)."""
-    ids_list = list(ids)
-    total = len(ids_list)
+    """Extrai atributos com progresso textual (itens concluídos / total).
+
+    `ids` pode ser um iterável de tamanho desconhecido (ex.: um `Channel`
+    alimentado pela extração de pokémons); ids repetidos são ignorados.
+    """
+    if total is None and hasattr(ids, "__len__"):
+        total = len(ids)
     records: list[dict] = []
-    for i, pid in enumerate(ids_list, start=1):
+    seen: set = set()
+    i = 0
+    for pid in ids:
+        if pid in seen:
+            continue
+        seen.add(pid)
+        i += 1
         try:
             data = client.get_pokemon_attributes(pid)
         except Exception:
@@ -118,6 +253,8 @@ def extract_pokemon_attributes(
             if i == total or i % max(1, total // 20) == 0:
                 pct = (i / total) * 100
                 print(f"Atributos: {i}/{total} ({pct:.0f}%)")
+        elif i % 50 == 0:
+            print(f"Atributos: {i}")
         time.sleep(sleep)
     return pd.json_normalize(records) if records else pd.DataFrame()
 
@@ -210,12 +347,165 @@ def transform_combats(
 
 def save_csv(df: pd.DataFrame, path: Path) -> Path:
     path.parent.mkdir(parents=True, exist_ok=True)
+    # O arquivo pode ser um hardlink de outro snapshot: nunca escrever por cima
+    path.unlink(missing_ok=True)
     # Delimitador ; e BOM UTF-8 para compatibilidade com Excel PT-BR
     df.to_csv(path, index=False, sep=';', encoding='utf-8-sig')
     return path
 
 
-def run(per_page: int = 50) -> None:
+def save_outputs(
+    tables: Dict[str, pd.DataFrame],
+    data_dir: Path,
+    *,
+    previous_dir: Optional[Path] = None,
+) -> tuple[List[Path], DataManifest]:
+    """Grava os CSVs, os stores binários e o manifesto; reaproveita o que não mudou.
+
+    `previous_dir` é a versão anterior (o próprio `data_dir` ou o snapshot
+    publicado). Tabelas com o mesmo hash de conteúdo ficam como estão (mesmo
+    diretório) ou são ligadas por hardlink; os stores de combates só são
+    recodificados se pokémons ou combates mudaram.
+    """
+    _ensure_dir(data_dir)
+    manifest = build_manifest(tables)
+    previous = read_manifest(previous_dir) if previous_dir is not None else None
+    changed = manifest.changed(previous)
+    same_dir = previous_dir is not None and Path(previous_dir).resolve() == data_dir.resolve()
+
+    paths = []
+    for name, df in tables.items():
+        path = data_dir / TABLE_FILES[name]
+        if name in changed:
+            save_csv(df, path)
+        elif not same_dir:
+            link_or_copy(Path(previous_dir) / TABLE_FILES[name], path)
+        paths.append(path)
+    stamp_files(manifest, data_dir)
+
+    # Colunas inteiras para leitura via np.memmap pelo dashboard, e a forma
+    # compactada (confrontos distintos + contagem) para as métricas
+    reuse_stores = (
+        previous is not None
+        and manifest.key("pokemons", "combats") == previous.key("pokemons", "combats")
+        and all(store_version_dir(previous_dir, compact=c) is not None for c in (False, True))
+    )
+    if reuse_stores:
+        for compact in (False, True):
+            if same_dir:
+                paths.append(store_version_dir(data_dir, compact=compact))
+            else:
+                paths.append(reuse_combat_store(previous_dir, data_dir, compact=compact))
+    else:
+        df_pokemons, df_combats = tables["pokemons"], tables["combats"]
+        codes = encode_combats(df_combats, df_pokemons["name"] if "name" in df_pokemons.columns else None)
+        paths.append(write_combat_store(df_combats, df_pokemons, data_dir, codes=codes))
+        paths.append(write_combat_store(df_combats, df_pokemons, data_dir, codes=codes, compact=True))
+    paths.append(write_manifest(manifest, data_dir))
+
+    if previous is None:
+        print(f"Manifesto: versão {manifest.version[:12]} (sem versão anterior para comparar)")
+    elif not changed:
+        print(f"Manifesto: dados idênticos à versão anterior ({manifest.version[:12]}); nada regravado")
+    else:
+        detail = ", ".join(f"{t} ({'tudo' if cols == ['*'] else ', '.join(cols)})" for t, cols in changed.items())
+        print(f"Manifesto: versão {manifest.version[:12]}; alterado: {detail}")
+    return paths, manifest
+
+
+def build_etl_graph(
+    config,
+    data_dir: Path,
+    *,
+    pokemons_per_page: int,
+    combats_per_page: int,
+    attr_sleep: float = 0.15,
+    on_error: str = "quarantine",
+    previous_dir: Optional[Path] = None,
+) -> StageGraph:
+    """Etapas do ETL e suas dependências.
+
+    pokemons --(ids)--> attributes ─┐
+        └──> transform_pokemons ────┼──> validate ──> save
+    combats ──> transform_combats ──┘
+
+    Cada extração usa o seu próprio cliente (sessão HTTP) para rodar em
+    paralelo com segurança. `on_error` define o que `validate` faz com
+    linhas reprovadas (ver `src.etl.validation`). `previous_dir` é a versão
+    anterior dos dados, comparada pelo manifesto em `save`.
+    """
+    ids = Channel("pokemon_ids", maxsize=ID_QUEUE_SIZE)
+    graph = StageGraph()
+
+    def pokemons(_):
+        print(f"Extraindo pokémons (per_page={pokemons_per_page})...")
+        df = extract_pokemons(
+            JwtApiClient(config),
+            per_page=pokemons_per_page,
+            on_page=lambda items: ids.put_many([it["id"] for it in items if isinstance(it, dict) and "id" in it]),
+        )
+        print("Pokémons:", len(df))
+        return df
+
+    def attributes(_):
+        print("Extraindo atributos dos pokémons (à medida que as páginas chegam)...")
+        df = extract_pokemon_attributes(JwtApiClient(config), ids, sleep=attr_sleep)
+        print("Atributos:", len(df))
+        return df
+
+    def combats(_):
+        print(f"Extraindo combats (todas as páginas, per_page={combats_per_page})...")
+        df = extract_combats(JwtApiClient(config), per_page=combats_per_page)
+        print("Combats:", len(df))
+        return df
+
+    def validate(r):
+        clean, quarantine, report = validate_tables(
+            r["transform_pokemons"], r["transform_combats"], r["attributes"], on_error=on_error
+        )
+        print(report.format())
+        return clean, quarantine, report
+
+    def save(r):
+        clean, quarantine, report = r["validate"]
+        df_pokemons, df_combats, df_attrs = clean["pokemons"], clean["combats"], clean["attributes"]
+        if "id" in df_attrs.columns:
+            df_attrs = df_attrs.sort_values("id", kind="stable", ignore_index=True)
+        tables = {"pokemons": df_pokemons, "combats": df_combats, "attributes": df_attrs}
+        paths, _ = save_outputs(tables, data_dir, previous_dir=previous_dir)
+        paths.extend(save_quality_outputs(report, quarantine, data_dir))
+        return paths
+
+    graph.add("pokemons", pokemons, produces=ids)
+    graph.add("attributes", attributes, consumes=ids)
+    graph.add("combats", combats)
+    graph.add("transform_pokemons", lambda r: transform_pokemons(r["pokemons"]), deps=["pokemons"])
+    graph.add(
+        "transform_combats",
+        lambda r: transform_combats(r["combats"], r["transform_pokemons"], JwtApiClient(config)),
+        deps=["combats", "transform_pokemons"],
+    )
+    graph.add("validate", validate, deps=["transform_pokemons", "transform_combats", "attributes"])
+    graph.add("save", save, deps=["validate"])
+    return graph
+
+
+def run(
+    per_page: int | None = None,
+    *,
+    retune: bool = False,
+    output_dir: Path | None = None,
+    on_error: str = "quarantine",
+) -> Path:
+    """Executa o ETL completo e retorna o diretório onde os arquivos foram salvos.
+
+    Com `per_page=None` o tamanho de página de cada recurso é autoajustado
+    (ver `src.etl.paging`) e reaproveitado entre execuções; `retune=True`
+    força uma nova sondagem. `output_dir` (padrão: `data/`) é usado pelo
+    agendador para gravar cada execução num snapshot novo. Com
+    `on_error="fail"` a validação interrompe o ETL em vez de separar as
+    linhas reprovadas em `quarantine/`.
+    """
     config = load_config()
     client = JwtApiClient(config)
 
@@ -224,36 +514,30 @@ def run(per_page: int = 50) -> None:
     health = client.health()
     print("/health:", health)
 
-    # Extrações
-    print(f"Extraindo pokémons (per_page={per_page})...")
-    df_pokemons = extract_pokemons(client, per_page=per_page)
-    print("Pokémons:", len(df_pokemons))
-
-    print("Extraindo combats (todas as páginas)...")
-    df_combats = extract_combats(client, per_page=per_page)
-    print("Combats:", len(df_combats))
-
-    # Transformações
-    df_pokemons = transform_pokemons(df_pokemons)
-    print("Extraindo atributos dos pokémons...")
-    df_attrs = extract_pokemon_attributes(client, df_pokemons["id"].tolist(), sleep=0.15)
-    print("Atributos:", len(df_attrs))
-
-    df_combats = transform_combats(df_combats, df_pokemons, client)
-
-    # Persistência em CSV
-    data_dir = config.data_dir
-    _ensure_dir(data_dir)
+    # Tamanho de página por recurso (fixo ou autoajustado)
+    pokemons_per_page = per_page or autotune_per_page(client, "pokemons", config.data_dir, refresh=retune)
+    combats_per_page = per_page or autotune_per_page(client, "combats", config.data_dir, refresh=retune)
+
+    data_dir = Path(output_dir) if output_dir is not None else config.data_dir
+    # Versão anterior para o manifesto: o próprio destino ou o snapshot publicado
+    previous_dir = data_dir if (data_dir / MANIFEST_FILE).exists() else resolve_data_dir(config.data_dir)
+    graph = build_etl_graph(
+        config,
+        data_dir,
+        pokemons_per_page=pokemons_per_page,
+        combats_per_page=combats_per_page,
+        on_error=on_error,
+        previous_dir=previous_dir,
+    )
+    report = graph.run()
 
-    pokemons_csv = save_csv(df_pokemons, data_dir / "pokemons.csv")
-    combats_csv = save_csv(df_combats, data_dir / "combats.csv")
-    attrs_csv = save_csv(df_attrs, data_dir / "pokemon_attributes.csv")
     print("Arquivos gerados:")
-    print("-", pokemons_csv)
-    print("-", combats_csv)
-    print("-", attrs_csv)
+    for path in report.results["save"]:
+        print("-", path)
+    print(report.format())
+    return data_dir
 
 
 if __name__ == "__main__":
-    # Validação inicial com per_page=50; depois você pode aumentar conforme necessário.
-    run(per_page=50)
+    # per_page autoajustado por recurso; passe um inteiro para fixar o tamanho.
+    run()
@@ -0,0 +1,124 @@
+"""Agendador do ETL em segundo plano.
+
+Roda `src.etl.pipeline.run` periodicamente numa thread de fundo; cada
+execução grava num snapshot novo (ver `src.etl.snapshots`) e só é
+publicada quando termina sem erro. Falhas não derrubam o agendador: o
+snapshot parcial é descartado e a versão anterior continua valendo.
+
+Uso::
+
+    python -m src.etl.scheduler --interval 3600      # a cada hora
+    python -m src.etl.scheduler --once               # uma execução e sai
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.etl.snapshots import discard_snapshot, new_snapshot_dir, prune_snapshots, publish_snapshot
+
+
+# Função que grava um snapshot completo em `output_dir`
+RunFn = Callable[[Path], object]
+
+
+def _pipeline_run(output_dir: Path) -> object:
+    from src.etl.pipeline import run
+
+    return run(output_dir=output_dir)
+
+
+class EtlScheduler:
+    """Executa o ETL a cada `interval` segundos numa thread daemon.
+
+    `run_fn` recebe o diretório do snapshot em construção (padrão: o ETL
+    completo). `keep` é o nº de versões mantidas em disco.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path | str,
+        interval: float = 3600.0,
+        *,
+        keep: int = 3,
+        run_fn: Optional[RunFn] = None,
+    ):
+        self.data_dir = Path(data_dir)
+        self.interval = float(interval)
+        self.keep = keep
+        self.run_fn = run_fn or _pipeline_run
+        self.last_published: Optional[Path] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Optional[Path]:
+        """Uma execução completa; retorna o snapshot publicado (ou `None` se falhar)."""
+        with self._lock:
+            work = new_snapshot_dir(self.data_dir)
+            try:
+                self.run_fn(work)
+                published = publish_snapshot(self.data_dir, work)
+            except Exception:
+                discard_snapshot(work)
+                self.last_error = traceback.format_exc()
+                print("ETL falhou; mantendo a versão anterior.\n" + self.last_error)
+                return None
+            prune_snapshots(self.data_dir, keep=self.keep)
+            self.last_published = published
+            self.last_error = None
+            print("Snapshot publicado:", published)
+            return published
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.run_once()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self) -> "EtlScheduler":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="etl-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Pede a parada; uma execução em andamento termina antes."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+
+def main(argv: Optional[list] = None) -> None:
+    from src.config import load_config
+
+    parser = argparse.ArgumentParser(description="Agenda o ETL gravando snapshots versionados.")
+    parser.add_argument("--interval", type=float, default=3600.0, help="segundos entre execuções")
+    parser.add_argument("--keep", type=int, default=3, help="versões mantidas em disco")
+    parser.add_argument("--once", action="store_true", help="roda uma vez e sai")
+    args = parser.parse_args(argv)
+
+    scheduler = EtlScheduler(load_config().data_dir, args.interval, keep=args.keep)
+    if args.once:
+        raise SystemExit(0 if scheduler.run_once() is not None else 1)
+    scheduler.start()
+    try:
+        while scheduler.running:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
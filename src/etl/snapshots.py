@@ -0,0 +1,102 @@
+"""Snapshots versionados dos dados gerados pelo ETL.
+
+Cada execução grava em um diretório novo, `data/snapshots/<versão>/`, e só
+no final publica a versão trocando o arquivo `data/snapshots/CURRENT`
+(escrita em arquivo temporário + `os.replace`, atômica). Quem lê nunca vê
+um snapshot pela metade: ou enxerga a versão anterior inteira, ou a nova.
+
+Sem nenhum snapshot publicado, os leitores usam os CSVs direto em `data/`
+(layout antigo, gerado por `python -m src.etl.pipeline`).
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+TMP_SUFFIX = ".tmp"
+
+
+def snapshots_root(data_dir: Path | str) -> Path:
+    return Path(data_dir) / SNAPSHOTS_DIR
+
+
+def new_snapshot_dir(data_dir: Path | str) -> Path:
+    """Cria o diretório de trabalho de uma nova versão (nome com data/hora UTC, em microssegundos)."""
+    root = snapshots_root(data_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    # Nome crescente com o tempo (ordenação = ordem de criação), em UTC
+    now = time.time_ns()
+    version = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now // 1_000_000_000)) + f".{now % 1_000_000_000 // 1000:06d}Z"
+    n = 0
+    while True:
+        name = version if n == 0 else f"{version}-{n}"
+        path = root / f"{name}{TMP_SUFFIX}"
+        if not path.exists() and not (root / name).exists():
+            path.mkdir()
+            return path
+        n += 1
+
+
+def publish_snapshot(data_dir: Path | str, work_dir: Path | str) -> Path:
+    """Renomeia o diretório de trabalho para a versão final e aponta CURRENT para ele."""
+    work_dir = Path(work_dir)
+    final = work_dir.with_name(work_dir.name[: -len(TMP_SUFFIX)] if work_dir.name.endswith(TMP_SUFFIX) else work_dir.name)
+    if final != work_dir:
+        os.replace(work_dir, final)
+    root = snapshots_root(data_dir)
+    fd, tmp = tempfile.mkstemp(dir=root, prefix=f"{CURRENT_FILE}.", suffix=TMP_SUFFIX)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(final.name + "\n")
+        os.replace(tmp, root / CURRENT_FILE)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return final
+
+
+def discard_snapshot(work_dir: Path | str) -> None:
+    """Remove um diretório de trabalho de uma execução que falhou."""
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def current_snapshot(data_dir: Path | str) -> Optional[Path]:
+    """Diretório da versão publicada, ou `None` se não houver nenhuma."""
+    root = snapshots_root(data_dir)
+    try:
+        name = (root / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    path = root / name
+    return path if name and path.is_dir() else None
+
+
+def resolve_data_dir(data_dir: Path | str) -> Path:
+    """Versão publicada, com fallback para o próprio `data_dir` (layout antigo)."""
+    return current_snapshot(data_dir) or Path(data_dir)
+
+
+def list_snapshots(data_dir: Path | str) -> List[Path]:
+    """Versões publicadas, da mais antiga para a mais recente."""
+    root = snapshots_root(data_dir)
+    if not root.exists():
+        return []
+    return sorted(p for p in root.iterdir() if p.is_dir() and not p.name.endswith(TMP_SUFFIX))
+
+
+def prune_snapshots(data_dir: Path | str, keep: int = 3) -> List[Path]:
+    """Apaga as versões mais antigas, mantendo `keep` e sempre a atual."""
+    current = current_snapshot(data_dir)
+    versions = [p for p in list_snapshots(data_dir) if p != current]
+    removed = versions[: max(0, len(versions) - max(keep - 1, 0))]
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+    return removed
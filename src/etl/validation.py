@@ -0,0 +1,335 @@
+"""Validação de qualidade dos dados tratados pelo ETL.
+
+Roda depois do `transform_*` e antes de gravar: esquema (colunas
+obrigatórias), integridade referencial (nomes dos combates x pokémons, ids
+dos atributos x pokémons) e faixas de valores (atributos, geração,
+tipos). Tudo é feito sobre arrays: cada coluna de nomes dos combates é
+fatorada uma vez (`pd.factorize`) e as regras viram comparações entre
+códigos inteiros, então 10M de combates custam poucos segundos.
+
+Cada regra tem uma severidade:
+
+- `error`: a linha é separada em quarentena (padrão) ou o ETL falha
+  (`on_error="fail"`);
+- `warning`: a linha é mantida e só aparece no relatório (ex.: o ID 63,
+  que a API de pokémons não devolve e fica como id cru nos combates).
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.encoding import COMBAT_COLUMNS
+from src.analysis.type_stats import OFFICIAL_TYPES_EN, split_types
+
+
+ON_ERROR = ("quarantine", "fail")
+
+POKEMON_COLUMNS = ("id", "name")
+ATTRIBUTE_COLUMNS = ("id", "name")
+
+# Faixas válidas (inclusive) dos atributos numéricos
+STAT_RANGES: Dict[str, Tuple[float, float]] = {
+    "hp": (1, 255),
+    "attack": (1, 255),
+    "defense": (1, 255),
+    "sp_attack": (1, 255),
+    "sp_defense": (1, 255),
+    "speed": (1, 255),
+}
+GENERATION_RANGE = (1, 9)
+
+QUARANTINE_DIR = "quarantine"
+REPORT_FILE = "quality_report.json"
+
+# Nº de valores de exemplo guardados por regra
+MAX_EXAMPLES = 5
+
+
+@dataclass
+class CheckResult:
+    table: str
+    check: str
+    severity: str  # "error" | "warning"
+    n_rows: int
+    examples: List[str] = field(default_factory=list)
+
+
+@dataclass
+class QualityReport:
+    rows: Dict[str, int] = field(default_factory=dict)
+    checks: List[CheckResult] = field(default_factory=list)
+    quarantined: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def errors(self) -> List[CheckResult]:
+        return [c for c in self.checks if c.severity == "error" and c.n_rows]
+
+    @property
+    def warnings(self) -> List[CheckResult]:
+        return [c for c in self.checks if c.severity == "warning" and c.n_rows]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def format(self) -> str:
+        """Resumo em texto: só as regras que encontraram linhas."""
+        lines = [
+            "Qualidade dos dados: "
+            + ", ".join(f"{t}={n}" for t, n in self.rows.items())
+            + f" ({self.elapsed:.2f}s)"
+        ]
+        flagged = [c for c in self.checks if c.n_rows]
+        if not flagged:
+            lines.append("Nenhum problema encontrado.")
+        for c in flagged:
+            sample = f" ex.: {', '.join(c.examples)}" if c.examples else ""
+            lines.append(f"- [{c.severity}] {c.table}.{c.check}: {c.n_rows} linha(s){sample}")
+        if any(self.quarantined.values()):
+            lines.append(
+                "Quarentena: " + ", ".join(f"{t}={n}" for t, n in self.quarantined.items() if n)
+            )
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "rows": self.rows,
+            "quarantined": self.quarantined,
+            "elapsed": round(self.elapsed, 3),
+            "checks": [asdict(c) for c in self.checks],
+        }
+
+
+class DataQualityError(ValueError):
+    """Dados reprovados na validação (`on_error="fail"` ou esquema inválido)."""
+
+    def __init__(self, report: QualityReport, message: str = "Dados reprovados na validação."):
+        super().__init__(f"{message}\n{report.format()}")
+        self.report = report
+
+
+class _Checks:
+    """Acumula as máscaras de uma tabela e os resultados para o relatório."""
+
+    def __init__(self, table: str, df: pd.DataFrame, report: QualityReport):
+        self.table = table
+        self.df = df
+        self.report = report
+        self.bad = np.zeros(len(df), dtype=bool)
+        self.reasons: List[Tuple[str, np.ndarray]] = []
+
+    def add(self, check: str, mask: np.ndarray, severity: str = "error", show: Sequence[str] = ()) -> None:
+        mask = np.asarray(mask, dtype=bool)
+        n = int(mask.sum())
+        examples: List[str] = []
+        if n:
+            cols = [c for c in show if c in self.df.columns]
+            rows = self.df.iloc[np.flatnonzero(mask)[:MAX_EXAMPLES]][cols] if cols else pd.DataFrame()
+            examples = ["/".join(str(v) for v in row) for row in rows.itertuples(index=False)]
+        self.report.checks.append(CheckResult(self.table, check, severity, n, examples))
+        if severity == "error" and n:
+            self.bad |= mask
+            self.reasons.append((check, mask))
+
+    def require(self, columns: Sequence[str]) -> bool:
+        """Falso quando não há o que validar (tabela vazia) ou faltam colunas (erro de esquema)."""
+        if self.df.empty:
+            return False
+        missing = [c for c in columns if c not in self.df.columns]
+        if missing:
+            self.report.checks.append(CheckResult(self.table, "schema", "error", len(self.df), missing))
+            return False
+        return True
+
+    def quarantine(self) -> pd.DataFrame:
+        """Linhas com erro e a coluna `_checks` com as regras violadas."""
+        rows = np.flatnonzero(self.bad)
+        labels = np.full(len(rows), "", dtype=object)
+        for check, mask in self.reasons:
+            hit = mask[rows]
+            labels[hit] = np.where(labels[hit] == "", check, labels[hit] + ";" + check)
+        out = self.df.iloc[rows].copy()
+        out["_checks"] = labels
+        return out
+
+
+def _blank(s: pd.Series) -> np.ndarray:
+    return (s.isna() | s.astype(str).str.strip().eq("")).to_numpy()
+
+
+def _numeric(s: pd.Series) -> pd.Series:
+    return pd.to_numeric(s, errors="coerce")
+
+
+def _factorize_columns(df: pd.DataFrame, columns: Sequence[str]):
+    """Códigos inteiros comuns às colunas (-1 = ausente) e os valores distintos.
+
+    Fatora cada coluna no seu próprio dtype (sem converter para `object`) e
+    alinha os códigos pelos valores distintos, que são poucos.
+    """
+    parts = [pd.factorize(df[col]) for col in columns]
+    uniques = parts[0][1]
+    for _, u in parts[1:]:
+        uniques = uniques.append(u)
+    uniques = pd.Index(uniques.unique())
+    codes = []
+    for local, u in parts:
+        remap = np.append(uniques.get_indexer(u), -1)
+        codes.append(remap[local])
+    return (*codes, uniques)
+
+
+def check_pokemons(pokemons: pd.DataFrame, report: QualityReport) -> _Checks:
+    c = _Checks("pokemons", pokemons, report)
+    if not c.require(POKEMON_COLUMNS):
+        return c
+    ids = _numeric(pokemons["id"])
+    c.add("id_missing", ids.isna().to_numpy(), show=("id", "name"))
+    c.add("name_missing", _blank(pokemons["name"]), show=("id",))
+    # Primeira ocorrência fica; as repetidas vão para a quarentena
+    c.add("id_duplicated", (ids.duplicated() & ids.notna()).to_numpy(), show=("id", "name"))
+    c.add("name_duplicated", pokemons["name"].duplicated(keep=False).to_numpy(), "warning", show=("id", "name"))
+    return c
+
+
+def check_combats(combats: pd.DataFrame, known_names: pd.Series, report: QualityReport) -> _Checks:
+    c = _Checks("combats", combats, report)
+    if not c.require(COMBAT_COLUMNS):
+        return c
+    first, second, winner, uniques = _factorize_columns(combats, COMBAT_COLUMNS)
+
+    missing = (first < 0) | (second < 0) | (winner < 0)
+    c.add("value_missing", missing, show=COMBAT_COLUMNS)
+    # Nome conhecido por código distinto; -1 (ausente) cai na última posição
+    known = np.append(uniques.isin(known_names.dropna().astype(str)), False)
+    unmapped = ~missing & ~(known[first] & known[second] & known[winner])
+    c.add("name_unmapped", unmapped, "warning", show=COMBAT_COLUMNS)
+    c.add("same_fighter", ~missing & (first == second), show=COMBAT_COLUMNS)
+    c.add("winner_not_fighter", ~missing & (winner != first) & (winner != second), show=COMBAT_COLUMNS)
+    if "count" in combats.columns:
+        counts = _numeric(combats["count"])
+        c.add("count_invalid", (counts.isna() | (counts < 1)).to_numpy(), show=(*COMBAT_COLUMNS, "count"))
+    return c
+
+
+def check_attributes(attrs: pd.DataFrame, pokemons: pd.DataFrame, report: QualityReport) -> _Checks:
+    c = _Checks("attributes", attrs, report)
+    if not c.require(ATTRIBUTE_COLUMNS):
+        return c
+    ids = _numeric(attrs["id"])
+    c.add("id_missing", ids.isna().to_numpy(), show=("name",))
+    c.add("id_duplicated", (ids.duplicated() & ids.notna()).to_numpy(), show=("id", "name"))
+
+    if {"id", "name"}.issubset(pokemons.columns):
+        ref = pokemons.assign(id=_numeric(pokemons["id"])).dropna(subset=["id"]).drop_duplicates("id")
+        ref_name = ref.set_index("id")["name"]
+        pos = ref_name.index.get_indexer(ids)
+        c.add("id_unknown", ids.notna().to_numpy() & (pos < 0), "warning", show=("id", "name"))
+        hit = pos >= 0
+        ref_names = np.where(hit, ref_name.to_numpy(dtype=object)[np.where(hit, pos, 0)], None)
+        mismatch = hit & (attrs["name"].astype(str).to_numpy() != ref_names.astype(str))
+        c.add("name_mismatch", mismatch, "warning", show=("id", "name"))
+
+    for col, (lo, hi) in STAT_RANGES.items():
+        if col not in attrs.columns:
+            continue
+        vals = _numeric(attrs[col])
+        c.add(f"{col}_missing", vals.isna().to_numpy(), "warning", show=("id", "name"))
+        c.add(f"{col}_out_of_range", ((vals < lo) | (vals > hi)).to_numpy(), show=("id", "name", col))
+
+    if "generation" in attrs.columns:
+        gen = _numeric(attrs["generation"])
+        lo, hi = GENERATION_RANGE
+        bad_gen = attrs["generation"].notna() & (gen.isna() | (gen < lo) | (gen > hi) | (gen % 1 != 0))
+        c.add("generation_invalid", bad_gen.to_numpy(), "warning", show=("id", "name", "generation"))
+
+    if "types" in attrs.columns:
+        # As células de tipos se repetem muito: normaliza só os valores distintos
+        cells = attrs["types"]
+        local, _ = pd.factorize(cells.map(lambda v: v if isinstance(v, str) else repr(v)))
+        _, first = np.unique(local, return_index=True)
+        parts = [split_types(cells.iloc[i]) for i in first]
+        official = set(OFFICIAL_TYPES_EN)
+        empty = np.array([not p for p in parts], dtype=bool)
+        unknown = np.array([any(t not in official for t in p) for p in parts], dtype=bool)
+        c.add("types_missing", empty[local], "warning", show=("id", "name"))
+        c.add("types_unknown", unknown[local], "warning", show=("id", "name", "types"))
+    return c
+
+
+def validate_tables(
+    pokemons: pd.DataFrame,
+    combats: pd.DataFrame,
+    attrs: Optional[pd.DataFrame] = None,
+    *,
+    on_error: str = "quarantine",
+) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame], QualityReport]:
+    """Valida as três tabelas tratadas.
+
+    Retorna `(limpas, quarentena, relatório)`, com as chaves `pokemons`,
+    `combats` e `attributes`. Esquema inválido sempre gera
+    `DataQualityError`; demais erros vão para a quarentena ou, com
+    `on_error="fail"`, também levantam `DataQualityError`.
+    """
+    if on_error not in ON_ERROR:
+        raise ValueError(f"on_error inválido: {on_error!r} (use {', '.join(ON_ERROR)})")
+    start = time.perf_counter()
+    report = QualityReport()
+    tables = {"pokemons": pokemons, "combats": combats}
+    if attrs is not None:
+        tables["attributes"] = attrs
+    report.rows = {name: len(df) for name, df in tables.items()}
+
+    checks = [check_pokemons(pokemons, report)]
+    known = pokemons["name"] if "name" in pokemons.columns else pd.Series([], dtype=object)
+    checks.append(check_combats(combats, known, report))
+    if attrs is not None:
+        checks.append(check_attributes(attrs, pokemons, report))
+    report.elapsed = time.perf_counter() - start
+
+    if any(r.check == "schema" for r in report.errors):
+        raise DataQualityError(report, "Esquema inválido: colunas obrigatórias ausentes.")
+    if on_error == "fail" and not report.ok:
+        raise DataQualityError(report)
+
+    clean = {c.table: c.df.loc[~c.bad].reset_index(drop=True) if c.bad.any() else c.df for c in checks}
+    quarantine = {c.table: c.quarantine() for c in checks if c.bad.any()}
+    report.quarantined = {c.table: int(c.bad.sum()) for c in checks}
+    return clean, quarantine, report
+
+
+def save_quality_outputs(
+    report: QualityReport,
+    quarantine: Dict[str, pd.DataFrame],
+    data_dir: Path | str,
+) -> List[Path]:
+    """Grava `quality_report.json` e `quarantine/<tabela>.csv` (só tabelas com linhas).
+
+    A quarentena de uma tabela sem linhas rejeitadas nesta execução é
+    apagada, para não sobrar o arquivo de uma execução anterior ao lado de
+    um relatório que diz 0.
+    """
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    report_path = data_dir / REPORT_FILE
+    report_path.write_text(json.dumps(report.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+    paths = [report_path]
+    qdir = data_dir / QUARANTINE_DIR
+    for table, df in quarantine.items():
+        qdir.mkdir(exist_ok=True)
+        path = qdir / f"{table}.csv"
+        df.to_csv(path, index=False, sep=";", encoding="utf-8-sig")
+        paths.append(path)
+    for table in set(report.quarantined) - set(quarantine):
+        (qdir / f"{table}.csv").unlink(missing_ok=True)
+    return paths
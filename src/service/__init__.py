@@ -0,0 +1 @@
+"""Serviço HTTP somente leitura com as métricas, para outros consumidores."""
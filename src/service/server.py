@@ -0,0 +1,420 @@
+"""Serviço HTTP local (somente leitura) com as métricas dos combates.
+
+Alternativa a raspar o dashboard ou rodar o ETL só para obter taxas de
+vitória. Usa apenas a biblioteca padrão (`http.server`) e as funções de
+`src.analysis`, sem Streamlit:
+
+- os dados são carregados uma vez (snapshot publicado ou `data/`) e as
+  tabelas ficam pré-calculadas (`MetricsData`); um recarregador em segundo
+  plano troca tudo quando os CSVs mudam;
+- cada resposta (corpo já serializado + ETag) fica num cache LRU limitado,
+  chaveado por versão dos dados, rota, parâmetros e formato;
+- `ETag` com `If-None-Match` (304) e `Cache-Control: max-age`;
+- JSON (padrão) ou Arrow IPC (`?format=arrow` ou
+  `Accept: application/vnd.apache.arrow.stream`, exige `pyarrow`).
+
+Rotas::
+
+    GET /health
+    GET /v1/winrate?min_battles=1&limit=100
+    GET /v1/participations?limit=100
+    GET /v1/types
+    GET /v1/h2h?top_n=20            (matriz vitórias linha x coluna)
+    GET /v1/h2h?a=Pikachu&b=Mewtwo  (um par)
+    GET /v1/top?attribute=attack&k=10&generation=1&type=Fire
+
+Uso::
+
+    python -m src.service.server --port 8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import threading
+import time
+import traceback
+from dataclasses import dataclass, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.cache import ArtifactCache, fingerprint
+from src.analysis.encoding import CombatCodes, encode_combats
+from src.analysis.manifest import read_manifest
+from src.analysis.metrics import ensure_overall, load_data, participations_from_codes, winrate_from_codes
+from src.analysis.store import open_combat_store
+from src.analysis.type_stats import build_type_stats, split_types
+from src.etl.snapshots import resolve_data_dir
+
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_AGE = 60
+DEFAULT_CACHE_ENTRIES = 2048
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+JSON_MIME = "application/json; charset=utf-8"
+
+SOURCE_FILES = ("pokemons.csv", "combats.csv", "pokemon_attributes.csv")
+
+
+class BadRequest(ValueError):
+    """Parâmetro inválido (400)."""
+
+
+class NotFound(KeyError):
+    """Rota ou pokémon inexistente (404)."""
+
+
+def data_version(data_dir: Path | str, signature: Optional[tuple] = None) -> str:
+    """Versão de conteúdo do manifesto do ETL; sem ele, hash da assinatura dos CSVs."""
+    manifest = read_manifest(data_dir)
+    if manifest is not None:
+        return manifest.version[:16]
+    return fingerprint(signature if signature is not None else source_signature(data_dir))[:16]
+
+
+def source_signature(data_dir: Path | str) -> tuple:
+    """(diretório, (arquivo, mtime, tamanho)...) dos CSVs: muda quando os dados mudam."""
+    data_dir = Path(data_dir)
+    sig = [str(data_dir)]
+    for name in SOURCE_FILES:
+        path = data_dir / name
+        if path.exists():
+            stat = path.stat()
+            sig.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sig)
+
+
+@dataclass
+class MetricsData:
+    """Tabelas pré-calculadas de uma versão dos dados."""
+
+    version: str
+    data_dir: Path
+    winrate: pd.DataFrame
+    participations: pd.DataFrame
+    types: pd.DataFrame
+    names: pd.Index            # nomes na ordem dos códigos
+    pair_wins: np.ndarray      # n x n: vitórias da linha sobre a coluna
+    by_participation: np.ndarray  # códigos em ordem decrescente de participações
+    attrs: pd.DataFrame        # atributos + overall + wins/total/win_rate
+    type_lists: pd.Series      # tipos de cada linha de `attrs`
+    loaded_at: float
+
+    @classmethod
+    def load(cls, data_dir: Path | str) -> "MetricsData":
+        data_dir = Path(data_dir)
+        signature = source_signature(data_dir)
+        # Com o store memmap, o combats.csv não é lido
+        codes = open_combat_store(data_dir, compact=True)
+        pokemons, combats, attrs = load_data(data_dir, combats=codes is None)
+        if codes is None:
+            codes = _encode(combats, pokemons)
+
+        winrate = winrate_from_codes(codes)
+        participations = participations_from_codes(codes)
+        n = codes.n_pokemon
+        pair = codes.winner.astype(np.int64) * n + codes.loser
+        pair_wins = np.bincount(pair, weights=codes.count, minlength=n * n).reshape(n, n).astype(np.int64)
+        by_participation = np.argsort(-codes.participations(), kind="stable")
+
+        if attrs is not None and not attrs.empty:
+            attrs = ensure_overall(attrs)
+            types = build_type_stats(pokemons, codes, attrs).aggregates
+            perf = winrate.set_index("name")[["wins", "total", "win_rate"]]
+            attrs = attrs.join(perf, on="name")
+            attrs[["wins", "total"]] = attrs[["wins", "total"]].astype("Int64")
+            type_lists = attrs["types"].map(split_types)
+        else:
+            attrs = pd.DataFrame()
+            types = pd.DataFrame()
+            type_lists = pd.Series([], dtype=object)
+
+        return cls(
+            version=data_version(data_dir, signature),
+            data_dir=data_dir,
+            winrate=winrate,
+            participations=participations,
+            types=types,
+            names=pd.Index(codes.names),
+            pair_wins=pair_wins,
+            by_participation=by_participation,
+            attrs=attrs,
+            type_lists=type_lists,
+            loaded_at=time.time(),
+        )
+
+    # --- consultas (sempre sobre as estruturas prontas) ---
+
+    def q_winrate(self, params: Dict[str, str]) -> pd.DataFrame:
+        min_battles = _int(params, "min_battles", 1, lo=0)
+        limit = _int(params, "limit", 0, lo=0)
+        out = self.winrate[self.winrate["total"] >= min_battles]
+        return out.head(limit) if limit else out
+
+    def q_participations(self, params: Dict[str, str]) -> pd.DataFrame:
+        limit = _int(params, "limit", 0, lo=0)
+        return self.participations.head(limit) if limit else self.participations
+
+    def q_types(self, params: Dict[str, str]) -> pd.DataFrame:
+        return self.types
+
+    def q_h2h(self, params: Dict[str, str]) -> pd.DataFrame:
+        if "a" in params or "b" in params:
+            a, b = params.get("a", ""), params.get("b", "")
+            i, j = self.names.get_indexer([a, b])
+            if i < 0 or j < 0:
+                raise NotFound(f"Pokémon sem combates: {a if i < 0 else b!r}")
+            wins_a, wins_b = int(self.pair_wins[i, j]), int(self.pair_wins[j, i])
+            return pd.DataFrame([{"a": a, "b": b, "wins_a": wins_a, "wins_b": wins_b, "total": wins_a + wins_b}])
+        top_n = _int(params, "top_n", 20, lo=1, hi=500)
+        top = np.sort(self.by_participation[:top_n])
+        order = top[np.argsort(self.names[top].astype(str), kind="stable")]
+        labels = self.names[order]
+        matrix = self.pair_wins[np.ix_(order, order)].copy()
+        np.fill_diagonal(matrix, 0)
+        out = pd.DataFrame(matrix, columns=labels)
+        out.insert(0, "winner", labels)
+        return out
+
+    def q_top(self, params: Dict[str, str]) -> pd.DataFrame:
+        if self.attrs.empty:
+            return self.attrs
+        attribute = params.get("attribute", "overall")
+        numeric = self.attrs.select_dtypes(include="number").columns
+        if attribute not in numeric:
+            raise BadRequest(f"attribute inválido: {attribute!r} (use {', '.join(map(str, numeric))})")
+        k = _int(params, "k", 10, lo=1, hi=1000)
+        keep = np.ones(len(self.attrs), dtype=bool)
+        if "generation" in params:
+            gen = _int(params, "generation", 0)
+            keep &= pd.to_numeric(self.attrs.get("generation"), errors="coerce").eq(gen).to_numpy()
+        if "type" in params:
+            wanted = params["type"]
+            keep &= self.type_lists.map(lambda ts: wanted in ts).to_numpy(dtype=bool)
+        out = self.attrs.loc[keep].nlargest(k, attribute)
+        cols = [c for c in ("id", "name", "types", "generation", attribute, "overall", "wins", "total", "win_rate") if c in out.columns]
+        return out[list(dict.fromkeys(cols))].reset_index(drop=True)
+
+
+def _encode(combats: pd.DataFrame, pokemons: pd.DataFrame) -> CombatCodes:
+    return encode_combats(combats, pokemons["name"] if "name" in pokemons.columns else None).compact()
+
+
+def _int(params: Dict[str, str], name: str, default: int, *, lo: Optional[int] = None, hi: Optional[int] = None) -> int:
+    raw = params.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise BadRequest(f"{name} deve ser inteiro: {raw!r}") from None
+    if (lo is not None and value < lo) or (hi is not None and value > hi):
+        raise BadRequest(f"{name} fora da faixa [{lo}, {hi}]: {value}")
+    return value
+
+
+ROUTES: Dict[str, Callable[[MetricsData, Dict[str, str]], pd.DataFrame]] = {
+    "/v1/winrate": MetricsData.q_winrate,
+    "/v1/participations": MetricsData.q_participations,
+    "/v1/types": MetricsData.q_types,
+    "/v1/h2h": MetricsData.q_h2h,
+    "/v1/top": MetricsData.q_top,
+}
+
+
+def to_json(df: pd.DataFrame) -> bytes:
+    return df.to_json(orient="records", force_ascii=False).encode("utf-8")
+
+
+def to_arrow(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+class MetricsService:
+    """Dados pré-calculados + cache de respostas + recarga quando os dados mudam."""
+
+    def __init__(
+        self,
+        data_dir: Path | str,
+        *,
+        max_age: int = DEFAULT_MAX_AGE,
+        cache_entries: int = DEFAULT_CACHE_ENTRIES,
+        reload_interval: float = 30.0,
+    ):
+        self.root = Path(data_dir)
+        self.max_age = max_age
+        self.reload_interval = reload_interval
+        self.cache = ArtifactCache("http", cache_dir=None, max_entries=cache_entries)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._signature = source_signature(resolve_data_dir(self.root))
+        self.data = MetricsData.load(resolve_data_dir(self.root))
+
+    def reload_if_changed(self) -> bool:
+        """Recarrega se o snapshot atual (ou os CSVs) mudou; a troca é uma atribuição.
+
+        Um snapshot novo com o mesmo conteúdo (mesma versão no manifesto) só
+        troca o diretório: tabelas, respostas em cache e ETags continuam valendo.
+        """
+        target = resolve_data_dir(self.root)
+        signature = source_signature(target)
+        if signature == self._signature:
+            return False
+        if data_version(target, signature) == self.data.version:
+            with self._lock:
+                self.data = replace(self.data, data_dir=target)
+                self._signature = signature
+            return False
+        data = MetricsData.load(target)
+        with self._lock:
+            self.data, self._signature = data, signature
+            self.cache.clear_memory()
+        return True
+
+    def start_reloader(self) -> None:
+        def loop() -> None:
+            while not self._stop.wait(self.reload_interval):
+                try:
+                    if self.reload_if_changed():
+                        print("Dados recarregados:", self.data.data_dir)
+                except Exception:
+                    print("Falha ao recarregar; mantendo a versão anterior.\n" + traceback.format_exc())
+
+        threading.Thread(target=loop, name="metrics-reloader", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def respond(self, path: str, params: Dict[str, str], fmt: str) -> Tuple[bytes, str, str]:
+        """(corpo, content-type, etag) da rota, do cache quando possível."""
+        handler = ROUTES.get(path)
+        if handler is None:
+            raise NotFound(f"Rota inexistente: {path}")
+        data = self.data
+        key = f"{data.version}|{path}|{sorted(params.items())}|{fmt}"
+        with self._lock:
+            hit = self.cache.get(key)
+        if hit is not None:
+            return hit
+        df = handler(data, params)
+        body = to_arrow(df) if fmt == "arrow" else to_json(df)
+        entry = (body, ARROW_MIME if fmt == "arrow" else JSON_MIME, f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"')
+        with self._lock:
+            self.cache.put(key, entry)
+        return entry
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: várias requisições por conexão
+    disable_nagle_algorithm = True  # cabeçalho e corpo saem sem esperar o ACK
+    service: MetricsService
+    verbose = False
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        if url.path == "/health":
+            data = self.service.data
+            body = json.dumps({"status": "ok", "version": data.version, "loaded_at": data.loaded_at}).encode()
+            self._send(200, body, JSON_MIME, cache=False)
+            return
+
+        fmt = params.pop("format", "")
+        if not fmt:
+            fmt = "arrow" if ARROW_MIME in self.headers.get("Accept", "") else "json"
+        try:
+            if fmt not in ("json", "arrow"):
+                raise BadRequest(f"format inválido: {fmt!r} (use json ou arrow)")
+            body, mime, etag = self.service.respond(url.path, params, fmt)
+        except BadRequest as e:
+            self._error(400, str(e))
+            return
+        except NotFound as e:
+            self._error(404, e.args[0] if e.args else "não encontrado")
+            return
+        except ImportError:
+            self._error(406, "Formato arrow indisponível: instale pyarrow.")
+            return
+        except Exception:
+            self._error(500, "Erro interno.")
+            traceback.print_exc()
+            return
+
+        if etag in self.headers.get("If-None-Match", ""):
+            self._send(304, b"", mime, etag=etag)
+        else:
+            self._send(200, body, mime, etag=etag)
+
+    def _send(self, status: int, body: bytes, mime: str, *, etag: Optional[str] = None, cache: bool = True) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", mime)
+        self.send_header("Content-Length", str(len(body)) if status != 304 else "0")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"public, max-age={self.service.max_age}" if cache else "no-cache")
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, json.dumps({"error": message}, ensure_ascii=False).encode("utf-8"), JSON_MIME, cache=False)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(service: MetricsService, host: str = "127.0.0.1", port: int = DEFAULT_PORT, *, verbose: bool = False) -> ThreadingHTTPServer:
+    handler = type("BoundMetricsHandler", (MetricsHandler,), {"service": service, "verbose": verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[list] = None) -> None:
+    from src.config import load_config
+
+    parser = argparse.ArgumentParser(description="Serviço HTTP somente leitura com as métricas dos combates.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-age", type=int, default=DEFAULT_MAX_AGE, help="Cache-Control max-age (s)")
+    parser.add_argument("--cache-entries", type=int, default=DEFAULT_CACHE_ENTRIES, help="respostas guardadas")
+    parser.add_argument("--reload-interval", type=float, default=30.0, help="segundos entre checagens dos dados")
+    parser.add_argument("--verbose", action="store_true", help="log de cada requisição")
+    args = parser.parse_args(argv)
+
+    service = MetricsService(
+        load_config().data_dir,
+        max_age=args.max_age,
+        cache_entries=args.cache_entries,
+        reload_interval=args.reload_interval,
+    )
+    service.start_reloader()
+    server = make_server(service, args.host, args.port, verbose=args.verbose)
+    print(f"Servindo métricas de {service.data.data_dir} em http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,210 @@
 """Página: Atributos e Desempenho.
 
-Inclui: Mapa de calor (médias por tipo), Radar (comparar tipos) e
-dispersão Atributo x Taxa de Vitória.
+Inclui: Mapa de calor (médias por tipo), Radar (comparar tipos),
+dispersão Atributo x Taxa de Vitória, painel de correlações por recorte e
+busca de pokémons parecidos (vizinhos mais próximos pelos atributos).
+As figuras vêm de funções de módulo, usadas também pelo pré-aquecimento
+(`warm_tasks`).
 """
 
+import numpy as np
 import plotly.express as px
 import streamlit as st
 
+from src.ui.render_cache import cached_figure
 from src.ui.utils import (
-    load_all,
     OFFICIAL_TYPES_EN,
     TYPE_COLORS_EN,
-    parse_types as _parse_types,
-    ensure_overall as _ensure_overall,
+    get_similarity_index,
+    get_winrate_with_attrs,
 )
-from src.analysis.metrics import build_winrate_with_attrs
+from src.analysis.correlations import correlate_with_target, grouped_correlations
+
+
+STATS = ["hp", "attack", "defense", "sp_attack", "sp_defense", "speed"]
+CORR_METHODS = {"Pearson": "pearson", "Spearman": "spearman"}
+CORR_SLICES = ("Todos", "Geração", "Tipo principal")
+DISTANCES = {"Euclidiana": "euclidean", "Cosseno": "cosine"}
+DEFAULT_REFERENCE = "Garchomp"
+DEFAULT_NEIGHBOURS = 10
+
+
+def heatmap_figure(wr_attrs):
+    def build_heatmap():
+        means = wr_attrs.groupby("primary_type_en")[STATS].mean().reindex(OFFICIAL_TYPES_EN)
+        fig_hm = px.imshow(
+            means,
+            labels=dict(x="Atributo", y="Tipo", color="Média"),
+            x=STATS,
+            y=OFFICIAL_TYPES_EN,
+            color_continuous_scale="YlGnBu",
+            aspect="auto",
+        )
+        fig_hm.update_layout(height=500, transition_duration=500)
+        return fig_hm
+
+    return cached_figure("attributes/heatmap", {}, build_heatmap)
+
+
+def radar_figure(wr_attrs, chosen):
+    def build_radar():
+        means = wr_attrs.groupby("primary_type_en")[STATS].mean()
+        tidy = (
+            means.loc[means.index.intersection(chosen)]
+            .reset_index()
+            .melt(id_vars="primary_type_en", var_name="Atributo", value_name="Valor")
+            .rename(columns={"primary_type_en": "Tipo"})
+        )
+        fig_radar = px.line_polar(
+            tidy,
+            r="Valor",
+            theta="Atributo",
+            color="Tipo",
+            line_close=True,
+            color_discrete_map=TYPE_COLORS_EN,
+        )
+        fig_radar.update_traces(fill="toself", opacity=0.6)
+        fig_radar.update_layout(transition_duration=500, showlegend=True, polar=dict(radialaxis=dict(visible=True)))
+        return fig_radar
+
+    return cached_figure("attributes/radar", {"types": chosen}, build_radar)
+
+
+def scatter_figure(wr_attrs, chosen_attr: str):
+    def build_scatter():
+        df = wr_attrs.dropna(subset=[chosen_attr]).copy()
+        df["win_rate_pct"] = df["win_rate"] * 100
+        fig_scatter = px.scatter(
+            df,
+            x=chosen_attr,
+            y="win_rate_pct",
+            color="primary_type_en",
+            color_discrete_map=TYPE_COLORS_EN,
+            hover_data=["name", chosen_attr, "win_rate_pct"],
+            title=f"{chosen_attr.capitalize()} x Taxa de Vitória (%)",
+        )
+        fig_scatter.update_layout(xaxis_title=chosen_attr.capitalize(), yaxis_title="Taxa de Vitória (%)", transition_duration=500)
+        return fig_scatter
+
+    return cached_figure("attributes/scatter", {"attr": chosen_attr}, build_scatter)
+
+
+def correlation_cols(wr_attrs) -> list:
+    return STATS + (["overall"] if "overall" in wr_attrs.columns else []) + ["win_rate"]
+
+
+def correlation_table(wr_attrs, slice_label: str):
+    corr_cols = correlation_cols(wr_attrs)
+    if slice_label == "Todos":
+        corr = correlate_with_target(wr_attrs, "win_rate", corr_cols)
+        corr["grupo"] = "Todos"
+        return corr
+    by = "generation" if slice_label == "Geração" else "primary_type_en"
+    return grouped_correlations(wr_attrs, by, "win_rate", corr_cols).rename(columns={by: "grupo"})
+
+
+def correlation_figure(wr_attrs, corr, method_label: str, slice_label: str):
+    method = CORR_METHODS[method_label]
+
+    def build_corr():
+        grid = corr.pivot(index="grupo", columns="attribute", values=method).reindex(columns=correlation_cols(wr_attrs)[:-1])
+        fig_corr = px.imshow(
+            grid,
+            labels=dict(x="Atributo", y=slice_label, color=method_label),
+            color_continuous_scale="RdBu",
+            zmin=-1,
+            zmax=1,
+            text_auto=".2f",
+            aspect="auto",
+        )
+        fig_corr.update_layout(height=max(250, 40 * len(grid) + 120), transition_duration=500)
+        return fig_corr
+
+    return cached_figure("attributes/correlations", {"method": method, "slice": slice_label}, build_corr)
+
+
+def similar_figure(near, ref: str, params: dict):
+    def build_near():
+        fig_near = px.bar(
+            near.assign(win_rate_pct=near["win_rate"] * 100),
+            x="name",
+            y="distance",
+            color="win_rate_pct",
+            color_continuous_scale="RdYlGn",
+            hover_data=["types", "generation", "overall", "total"],
+            title=f"Mais parecidos com {ref}",
+        )
+        fig_near.update_layout(
+            xaxis_title="Pokémon",
+            yaxis_title="Distância",
+            coloraxis_colorbar_title="Vitória (%)",
+            xaxis_tickangle=-45,
+            transition_duration=500,
+        )
+        return fig_near
+
+    return cached_figure("attributes/similar", params, build_near)
+
+
+def warm_tasks():
+    """Mapa de calor, radar padrão, dispersão por atributo, correlações (método x recorte) e vizinhos padrão."""
+    wr_attrs = get_winrate_with_attrs(min_battles=5)
+    if wr_attrs.empty:
+        return []
+    tasks = []
+    if wr_attrs["primary_type_en"].notna().any():
+        tasks.append(("attributes/heatmap", lambda: heatmap_figure(wr_attrs)))
+        tasks.append(("attributes/radar", lambda: radar_figure(wr_attrs, OFFICIAL_TYPES_EN[:2])))
+    for attr in STATS + (["overall"] if "overall" in wr_attrs.columns else []):
+        tasks.append((f"attributes/scatter/{attr}", lambda a=attr: scatter_figure(wr_attrs, a)))
+    for slice_label in CORR_SLICES:
+        for method_label in CORR_METHODS:
+            def warm_corr(s=slice_label, m=method_label):
+                corr = correlation_table(wr_attrs, s)
+                return None if corr.empty else correlation_figure(wr_attrs, corr, m, s)
+
+            tasks.append((f"attributes/correlations/{method_label}/{slice_label}", warm_corr))
+
+    def warm_similar():
+        index = get_similarity_index()
+        if index is None or len(index) == 0:
+            return None
+        names = sorted(index.names.tolist())
+        ref = DEFAULT_REFERENCE if DEFAULT_REFERENCE in names else names[0]
+        near = index.query(ref, k=DEFAULT_NEIGHBOURS)
+        params = {"ref": ref, "k": DEFAULT_NEIGHBOURS, "types": [], "gens": [], "metric": "Euclidiana"}
+        return similar_figure(near, ref, params)
+
+    tasks.append(("attributes/similar", warm_similar))
+    return tasks
 
 
 def render() -> None:
     st.header("Atributos e Desempenho")
-    pokemons, combats, attrs = load_all()
-    if attrs is None or getattr(attrs, "empty", True):
+    wr_attrs = get_winrate_with_attrs(min_battles=5)
+    if len(wr_attrs.columns) == 0:
         st.info("Arquivo de atributos não encontrado. Rode o ETL para gerar 'data/pokemon_attributes.csv'.")
         return
-    attrs = _ensure_overall(attrs)
-
-    wr_attrs = build_winrate_with_attrs(combats, pokemons, attrs, min_battles=5)
     if wr_attrs.empty:
         st.warning("Não foi possível unir atributos com taxa de vitória.")
         return
 
-    # Garantir nome e tipo principal
-    if "name" not in wr_attrs.columns:
-        wr_attrs["name"] = wr_attrs.get("name_x", wr_attrs.get("name_y"))
-    stats = ["hp", "attack", "defense", "sp_attack", "sp_defense", "speed"]
-    if "types" in wr_attrs.columns:
-        wr_attrs["primary_type_en"] = wr_attrs["types"].apply(lambda s: next((x for x in _parse_types(s) if x in OFFICIAL_TYPES_EN), None))
-    else:
-        wr_attrs["primary_type_en"] = None
+    tabs = st.tabs(
+        ["Mapa de Calor (médias)", "Radar (comparar tipos)", "Atributo x Taxa de Vitória", "Correlações", "Pokémons Parecidos"]
+    )
 
-    tabs = st.tabs(["Mapa de Calor (médias)", "Radar (comparar tipos)", "Atributo x Taxa de Vitória"])
+    has_types = wr_attrs["primary_type_en"].notna().any()
 
     # 1) Mapa de calor
     with tabs[0]:
-        tmp = wr_attrs.dropna(subset=["primary_type_en"]).copy()
-        if tmp.empty:
+        if not has_types:
             st.info("Sem dados de tipos para montar o mapa de calor.")
         else:
-            means = tmp.groupby("primary_type_en")[stats].mean().reindex(OFFICIAL_TYPES_EN)
-            fig_hm = px.imshow(
-                means,
-                labels=dict(x="Atributo", y="Tipo", color="Média"),
-                x=stats,
-                y=OFFICIAL_TYPES_EN,
-                color_continuous_scale="YlGnBu",
-                aspect="auto",
-            )
-            fig_hm.update_layout(height=500, transition_duration=500)
-            st.plotly_chart(fig_hm, use_container_width=True)
+            st.plotly_chart(heatmap_figure(wr_attrs), use_container_width=True)
 
     # 2) Radar
     with tabs[1]:
-        tmp = wr_attrs.dropna(subset=["primary_type_en"]).copy()
-        if tmp.empty:
+        if not has_types:
             st.info("Sem dados de tipos para montar o radar.")
         else:
             options = OFFICIAL_TYPES_EN
@@ -70,42 +212,54 @@ def render() -> None:
             if not chosen:
                 st.info("Selecione ao menos um tipo.")
             else:
-                means = tmp.groupby("primary_type_en")[stats].mean()
-                tidy = (
-                    means.loc[means.index.intersection(chosen)]
-                    .reset_index()
-                    .melt(id_vars="primary_type_en", var_name="Atributo", value_name="Valor")
-                    .rename(columns={"primary_type_en": "Tipo"})
-                )
-                fig_radar = px.line_polar(
-                    tidy,
-                    r="Valor",
-                    theta="Atributo",
-                    color="Tipo",
-                    line_close=True,
-                    color_discrete_map=TYPE_COLORS_EN,
-                )
-                fig_radar.update_traces(fill="toself", opacity=0.6)
-                fig_radar.update_layout(transition_duration=500, showlegend=True, polar=dict(radialaxis=dict(visible=True)))
-                st.plotly_chart(fig_radar, use_container_width=True)
+                st.plotly_chart(radar_figure(wr_attrs, chosen), use_container_width=True)
 
     # 3) Dispersão atributo x taxa de vitória
     with tabs[2]:
-        attr_options = stats + (["overall"] if "overall" in wr_attrs.columns else [])
+        attr_options = STATS + (["overall"] if "overall" in wr_attrs.columns else [])
         chosen_attr = st.selectbox("Escolha o atributo", options=attr_options, index=min(6, len(attr_options) - 1))
-        df = wr_attrs.dropna(subset=[chosen_attr]).copy()
-        if df.empty:
+        if wr_attrs[chosen_attr].isna().all():
             st.info("Sem valores para o atributo selecionado.")
         else:
-            df["win_rate_pct"] = df["win_rate"] * 100
-            fig_scatter = px.scatter(
-                df,
-                x=chosen_attr,
-                y="win_rate_pct",
-                color="primary_type_en",
-                color_discrete_map=TYPE_COLORS_EN,
-                hover_data=["name", chosen_attr, "win_rate_pct"],
-                title=f"{chosen_attr.capitalize()} x Taxa de Vitória (%)",
-            )
-            fig_scatter.update_layout(xaxis_title=chosen_attr.capitalize(), yaxis_title="Taxa de Vitória (%)", transition_duration=500)
-            st.plotly_chart(fig_scatter, use_container_width=True)
+            st.plotly_chart(scatter_figure(wr_attrs, chosen_attr), use_container_width=True)
+
+    # 4) Correlações (Pearson/Spearman) com a taxa de vitória, por recorte
+    with tabs[3]:
+        method_label = st.radio("Método", options=list(CORR_METHODS), horizontal=True)
+        slice_label = st.selectbox("Recorte", options=list(CORR_SLICES))
+        corr = correlation_table(wr_attrs, slice_label)
+        if corr.empty:
+            st.info("Sem dados suficientes para calcular correlações.")
+        else:
+            st.plotly_chart(correlation_figure(wr_attrs, corr, method_label, slice_label), use_container_width=True)
+            st.dataframe(corr.drop(columns=["grupo"]) if slice_label == "Todos" else corr, use_container_width=True, hide_index=True)
+
+    # 5) Vizinhos mais próximos pelos atributos (z-score de cada um)
+    with tabs[4]:
+        index = get_similarity_index()
+        if index is None or len(index) == 0:
+            st.info("Sem atributos suficientes para montar o índice de similaridade.")
+            return
+        names = sorted(index.names.tolist())
+        default = names.index(DEFAULT_REFERENCE) if DEFAULT_REFERENCE in names else 0
+        ref = st.selectbox("Pokémon de referência", options=names, index=default)
+        c1, c2, c3 = st.columns(3)
+        k = c1.slider("Vizinhos", min_value=3, max_value=30, value=DEFAULT_NEIGHBOURS)
+        types_filter = c2.multiselect("Filtrar por tipo", options=index.types)
+        gens = sorted(int(g) for g in set(index.generation[~np.isnan(index.generation)].tolist()))
+        gens_filter = c3.multiselect("Filtrar por geração", options=gens)
+        metric_label = st.radio("Distância", options=list(DISTANCES), horizontal=True)
+
+        near = index.query(
+            ref,
+            k=k,
+            types=types_filter or None,
+            generations=gens_filter or None,
+            metric=DISTANCES[metric_label],
+        )
+        if near.empty:
+            st.info("Nenhum pokémon atende aos filtros.")
+        else:
+            params = {"ref": ref, "k": k, "types": types_filter, "gens": gens_filter, "metric": metric_label}
+            st.plotly_chart(similar_figure(near, ref, params), use_container_width=True)
+            st.dataframe(near, use_container_width=True, hide_index=True)
@@ -0,0 +1,121 @@
+"""Página: Recortes por Geração e Tipo.
+
+Filtros de geração, lendário e tipos sobre o cubo pré-agregado
+(`src.analysis.cube`): cada recorte é a soma das células selecionadas,
+sem varrer combates nem atributos. A figura do agrupamento sem filtros é
+pré-aquecida (`warm_tasks`: uma por dimensão).
+"""
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from src.analysis.cube import NO_TYPE
+from src.ui.render_cache import cached_figure
+from src.ui.utils import TYPE_COLORS_EN, analytics_mode, get_stats_cube
+
+
+GROUP_BY = {
+    "Geração": "generation",
+    "Lendário": "legendary",
+    "Tipo principal": "primary_type",
+    "Tipo secundário": "secondary_type",
+}
+METRICS = {
+    "Taxa de vitória (%)": "win_rate",
+    "Batalhas": "battles",
+    "Pokémons": "n_pokemon",
+    "Overall médio": "mean_overall",
+    "HP médio": "mean_hp",
+    "Ataque médio": "mean_attack",
+    "Defesa média": "mean_defense",
+    "Velocidade média": "mean_speed",
+}
+LEGENDARY = {"Todos": None, "Só lendários": True, "Sem lendários": False}
+
+
+def _filters(generation, legendary_label, primary, secondary, any_type) -> dict:
+    """Widgets -> filtros do cubo (lista vazia = sem filtro)."""
+    return {
+        "generation": list(generation) or None,
+        "legendary": LEGENDARY[legendary_label],
+        "primary_type": list(primary) or None,
+        "secondary_type": list(secondary) or None,
+        "any_type": list(any_type) or None,
+    }
+
+
+def rollup_figure(cube, by_label: str, metric_label: str, filters: dict):
+    by, metric = GROUP_BY[by_label], METRICS[metric_label]
+    params = {"by": by, "metric": metric, **{k: v for k, v in filters.items() if v is not None}}
+
+    def build_fig():
+        table = cube.rollup(by, **filters)
+        table[by] = table[by].map(lambda v: ("Sim" if v else "Não") if by == "legendary" else str(v))
+        if metric == "win_rate":
+            table[metric] = (table[metric] * 100).round(2)
+        color = by if by in ("primary_type", "secondary_type") else None
+        fig = px.bar(
+            table,
+            x=by,
+            y=metric,
+            color=color,
+            color_discrete_map={**TYPE_COLORS_EN, NO_TYPE: "#BBBBBB"},
+            text=metric,
+            title=f"{metric_label} por {by_label.lower()}",
+        )
+        fig.update_layout(xaxis_title=by_label, yaxis_title=metric_label, showlegend=False, transition_duration=500)
+        return fig
+
+    return cached_figure("cube/rollup", params, build_fig)
+
+
+def warm_tasks():
+    """Agrupamento por cada dimensão, sem filtros, na métrica padrão."""
+    cube = get_stats_cube()
+    if cube is None:
+        return []
+    metric = next(iter(METRICS))
+    filters = _filters([], "Todos", [], [], [])
+    return [
+        (f"cube/rollup/{by}", lambda b=label: rollup_figure(cube, b, metric, filters))
+        for label, by in GROUP_BY.items()
+    ]
+
+
+def render() -> None:
+    st.header("Recortes por Geração e Tipo")
+    if analytics_mode() == "approx":
+        st.info("Recortes indisponíveis no modo aproximado (sem combates codificados).")
+        return
+    cube = get_stats_cube()
+    if cube is None:
+        st.info("Arquivo de atributos não encontrado. Rode o ETL para gerar 'data/pokemon_attributes.csv'.")
+        return
+
+    c1, c2, c3 = st.columns(3)
+    generation = c1.multiselect("Gerações", options=cube.generations.tolist())
+    legendary_label = c2.radio("Lendários", options=list(LEGENDARY), horizontal=True)
+    any_type = c3.multiselect("Tem o tipo (qualquer posição)", options=cube.primary_types)
+    c4, c5 = st.columns(2)
+    primary = c4.multiselect("Tipo principal", options=cube.primary_types)
+    secondary = c5.multiselect("Tipo secundário", options=cube.secondary_types)
+    filters = _filters(generation, legendary_label, primary, secondary, any_type)
+
+    totals = cube.totals(**filters)
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Pokémons", f"{int(totals['n_pokemon'])}")
+    m2.metric("Batalhas", f"{int(totals['battles']):,}".replace(",", "."))
+    m3.metric("Taxa de vitória", "—" if pd.isna(totals["win_rate"]) else f"{totals['win_rate']:.1%}")
+    m4.metric("Overall médio", "—" if pd.isna(totals.get("mean_overall")) else f"{totals['mean_overall']:.1f}")
+    if totals["n_pokemon"] == 0:
+        st.warning("Nenhum pokémon neste recorte.")
+        return
+
+    g1, g2 = st.columns(2)
+    by_label = g1.selectbox("Agrupar por", options=list(GROUP_BY), index=2)
+    metric_label = g2.selectbox("Métrica", options=list(METRICS))
+    st.plotly_chart(rollup_figure(cube, by_label, metric_label, filters), use_container_width=True)
+    st.dataframe(cube.rollup(GROUP_BY[by_label], **filters), use_container_width=True, hide_index=True)
+    if cube.n_excluded:
+        st.caption(f"{cube.n_excluded} pokémon(s) sem geração ou tipo principal reconhecido ficam fora do cubo.")
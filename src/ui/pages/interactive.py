@@ -1,74 +1,139 @@
 """Página: Análises Interativas de Atributos.
 
 Top 10 por atributo e por geração, com botão para baixar CSV da geração.
+Tabelas e figuras vêm de funções de módulo, usadas também pelo
+pré-aquecimento (`warm_tasks`: gerações x atributos).
 """
 
+import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-from src.ui.utils import (
-    load_all,
-    TYPE_COLORS_EN,
-    parse_types as _parse_types,
-    ensure_overall as _ensure_overall,
-)
+from src.ui.render_cache import cached_figure, cached_styler
+from src.ui.utils import TYPE_COLORS_EN, get_attributes
+
+
+ID_CELL = "width: 60px; font-size: 0.9rem;"
+STATS = ["hp", "attack", "defense", "sp_attack", "sp_defense", "speed"]
+
+
+def _id_styles(df: pd.DataFrame) -> pd.DataFrame:
+    """CSS por célula: coluna id mais estreita."""
+    css = pd.DataFrame("", index=df.index, columns=df.columns)
+    css["id"] = ID_CELL
+    return css
+
+
+def attr_options(attrs_df: pd.DataFrame) -> list:
+    return STATS + ["overall"] if "overall" in attrs_df.columns else list(STATS)
+
+
+def generations(attrs_df: pd.DataFrame) -> list:
+    return sorted(attrs_df["generation"].dropna().unique().tolist())
+
+
+def top10_table(attrs_df: pd.DataFrame, chosen_attr: str):
+    cols_needed = ["id", "name", "primary_type", chosen_attr]
+
+    def build_top10():
+        top10 = (
+            attrs_df[cols_needed]
+            .dropna(subset=[chosen_attr])
+            .sort_values(by=chosen_attr, ascending=False)
+            .head(10)
+        )
+        if "overall" in attrs_df.columns and chosen_attr != "overall":
+            extra = attrs_df[["id", "overall"]]
+            top10 = top10.merge(extra, on="id", how="left")
+        return top10, _id_styles(top10)
+
+    return cached_styler("interactive/top10", {"attr": chosen_attr}, build_top10)
+
+
+def top10_figure(top10: pd.DataFrame, chosen_attr: str):
+    def build_fig():
+        fig = px.bar(
+            top10,
+            y="name",
+            x=chosen_attr,
+            color="primary_type",
+            orientation="h",
+            title=f"Top 10 {chosen_attr}",
+            color_discrete_map=TYPE_COLORS_EN,
+        )
+        fig.update_layout(yaxis_title="Pokémon", xaxis_title=chosen_attr.capitalize())
+        return fig
+
+    return cached_figure("interactive/top10", {"attr": chosen_attr}, build_fig)
+
+
+def top10_gen_table(attrs_df: pd.DataFrame, gen, chosen_attr2: str):
+    def build_top10g():
+        subset = attrs_df[attrs_df["generation"] == gen]
+        top10g = (
+            subset[["id", "name", "primary_type", chosen_attr2]]
+            .dropna(subset=[chosen_attr2])
+            .sort_values(by=chosen_attr2, ascending=False)
+            .head(10)
+        )
+        return top10g, _id_styles(top10g)
+
+    return cached_styler("interactive/top10_gen", {"gen": gen, "attr": chosen_attr2}, build_top10g)
+
+
+def top10_gen_figure(top10g: pd.DataFrame, gen, chosen_attr2: str):
+    def build_fig2():
+        fig2 = px.bar(
+            top10g,
+            y="name",
+            x=chosen_attr2,
+            color="primary_type",
+            orientation="h",
+            title=f"Top 10 {chosen_attr2} - Geração {gen}",
+            color_discrete_map=TYPE_COLORS_EN,
+        )
+        fig2.update_layout(yaxis_title="Pokémon", xaxis_title=chosen_attr2.capitalize())
+        return fig2
+
+    return cached_figure("interactive/top10_gen", {"gen": gen, "attr": chosen_attr2}, build_fig2)
+
+
+def warm_tasks():
+    """Top 10 de cada atributo e de cada geração x atributo (tabela + figura)."""
+    attrs_df = get_attributes()
+    if attrs_df is None or attrs_df.empty:
+        return []
+    tasks = []
+    for attr in attr_options(attrs_df):
+        tasks.append((f"interactive/top10/{attr}", lambda a=attr: top10_figure(top10_table(attrs_df, a).data, a)))
+    if "generation" in attrs_df.columns:
+        for gen in generations(attrs_df):
+            for attr in attr_options(attrs_df):
+                tasks.append((
+                    f"interactive/top10_gen/{gen}/{attr}",
+                    lambda g=gen, a=attr: top10_gen_figure(top10_gen_table(attrs_df, g, a).data, g, a),
+                ))
+    return tasks
 
 
 def render() -> None:
     st.header("Análises Interativas de Atributos")
-    _, _, attrs = load_all()
-    if attrs is None or attrs.empty:
+    attrs_df = get_attributes()
+    if attrs_df is None or attrs_df.empty:
         st.info("Arquivo de atributos não encontrado. Rode o ETL para gerar 'data/pokemon_attributes.csv'.")
         return
 
-    attrs_df = _ensure_overall(attrs).copy()
-    attrs_df["primary_type"] = attrs_df["types"].apply(_parse_types).apply(lambda lst: lst[0] if lst else None)
-    attr_options = [
-        "hp",
-        "attack",
-        "defense",
-        "sp_attack",
-        "sp_defense",
-        "speed",
-        "overall",
-    ] if "overall" in attrs_df.columns else [
-        "hp",
-        "attack",
-        "defense",
-        "sp_attack",
-        "sp_defense",
-        "speed",
-    ]
-
+    options = attr_options(attrs_df)
     tab1, tab2 = st.tabs(["Top 10 Atributos", "Análise por Geração"])
 
     with tab1:
         st.subheader("Top 10 por Atributo")
-        chosen_attr = st.selectbox("Escolha o atributo", options=attr_options, index=min(6, len(attr_options) - 1))
+        chosen_attr = st.selectbox("Escolha o atributo", options=options, index=min(6, len(options) - 1))
         cols_needed = ["id", "name", "primary_type", chosen_attr]
         if all(c in attrs_df.columns for c in cols_needed):
-            top10 = (
-                attrs_df[cols_needed]
-                .dropna(subset=[chosen_attr])
-                .sort_values(by=chosen_attr, ascending=False)
-                .head(10)
-            )
-            if "overall" in attrs_df.columns and chosen_attr != "overall":
-                extra = attrs_df[["id", "overall"]]
-                top10 = top10.merge(extra, on="id", how="left")
-            styler_top = top10.style.set_properties(subset=["id"], **{"width": "60px", "font-size": "0.9rem"})
+            styler_top = top10_table(attrs_df, chosen_attr)
             st.dataframe(styler_top, use_container_width=True, hide_index=True)
-            fig = px.bar(
-                top10,
-                y="name",
-                x=chosen_attr,
-                color="primary_type",
-                orientation="h",
-                title=f"Top 10 {chosen_attr}",
-                color_discrete_map=TYPE_COLORS_EN,
-            )
-            fig.update_layout(yaxis_title="Pokémon", xaxis_title=chosen_attr.capitalize())
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(top10_figure(styler_top.data, chosen_attr), use_container_width=True)
         else:
             missing = [c for c in cols_needed if c not in attrs_df.columns]
             st.warning(f"Colunas ausentes nos atributos: {missing}")
@@ -78,9 +143,8 @@ def render() -> None:
         if "generation" not in attrs_df.columns:
             st.warning("Coluna 'generation' ausente nos atributos.")
         else:
-            gens = sorted([g for g in attrs_df["generation"].dropna().unique().tolist()])
-            gen = st.selectbox("Escolha a geração", options=gens)
-            chosen_attr2 = st.selectbox("Escolha o atributo", options=attr_options, index=min(6, len(attr_options) - 1), key="attr_gen")
+            gen = st.selectbox("Escolha a geração", options=generations(attrs_df))
+            chosen_attr2 = st.selectbox("Escolha o atributo", options=options, index=min(6, len(options) - 1), key="attr_gen")
             cols_needed2 = ["id", "name", "primary_type", "generation", chosen_attr2]
             if all(c in attrs_df.columns for c in cols_needed2):
                 subset = attrs_df[attrs_df["generation"] == gen]
@@ -91,26 +155,9 @@ def render() -> None:
                     file_name=f"geracao_{gen}.csv",
                     mime="text/csv",
                 )
-                top10g = (
-                    subset[["id", "name", "primary_type", chosen_attr2]]
-                    .dropna(subset=[chosen_attr2])
-                    .sort_values(by=chosen_attr2, ascending=False)
-                    .head(10)
-                )
-                styler_topg = top10g.style.set_properties(subset=["id"], **{"width": "60px", "font-size": "0.9rem"})
+                styler_topg = top10_gen_table(attrs_df, gen, chosen_attr2)
                 st.dataframe(styler_topg, use_container_width=True, hide_index=True)
-                fig2 = px.bar(
-                    top10g,
-                    y="name",
-                    x=chosen_attr2,
-                    color="primary_type",
-                    orientation="h",
-                    title=f"Top 10 {chosen_attr2} - Geração {gen}",
-                    color_discrete_map=TYPE_COLORS_EN,
-                )
-                fig2.update_layout(yaxis_title="Pokémon", xaxis_title=chosen_attr2.capitalize())
-                st.plotly_chart(fig2, use_container_width=True)
+                st.plotly_chart(top10_gen_figure(styler_topg.data, gen, chosen_attr2), use_container_width=True)
             else:
                 missing2 = [c for c in cols_needed2 if c not in attrs_df.columns]
                 st.warning(f"Colunas ausentes nos atributos: {missing2}")
-
@@ -0,0 +1,103 @@
+"""Página: Previsão de Confronto (A x B).
+
+Probabilidade de A vencer B pelo modelo de `src.analysis.predictor`,
+inclusive para pares que nunca lutaram. A resposta é lida da matriz de
+todos os pares, calculada uma vez por versão dos dados.
+"""
+
+import numpy as np
+import plotly.express as px
+import streamlit as st
+
+from src.ui.render_cache import cached_figure
+from src.ui.utils import get_combat_counts, get_matchup_model
+
+
+FEATURE_LABELS = {
+    "hp": "HP",
+    "attack": "Ataque",
+    "defense": "Defesa",
+    "sp_attack": "Ataque Esp.",
+    "sp_defense": "Defesa Esp.",
+    "speed": "Velocidade",
+    "legendary": "Lendário",
+    "type_matchup": "Tipo x tipo",
+}
+
+
+def _history(a: str, b: str) -> tuple[int, int]:
+    """Vitórias de A sobre B e de B sobre A nos combates registrados."""
+    codes = get_combat_counts()
+    names = list(codes.names)
+    if a not in names or b not in names:
+        return 0, 0
+    ia, ib = names.index(a), names.index(b)
+    weights = codes.count if codes.count is not None else np.ones(len(codes), dtype=np.int64)
+    pair = ((codes.first == ia) & (codes.second == ib)) | ((codes.first == ib) & (codes.second == ia))
+    return int(weights[pair & (codes.winner == ia)].sum()), int(weights[pair & (codes.winner == ib)].sum())
+
+
+def render() -> None:
+    st.header("Previsão de Confronto")
+    model = get_matchup_model()
+    if model is None:
+        st.info("Sem atributos ou combates suficientes para treinar o modelo.")
+        return
+
+    names = sorted(model.names.tolist())
+    col1, col2 = st.columns(2)
+    with col1:
+        a = st.selectbox("Pokémon A", options=names, index=names.index("Pikachu") if "Pikachu" in names else 0)
+    with col2:
+        b = st.selectbox("Pokémon B", options=names, index=names.index("Mewtwo") if "Mewtwo" in names else min(1, len(names) - 1))
+
+    if a == b:
+        st.info("Escolha dois pokémons diferentes.")
+        return
+
+    p = model.probability(a, b)
+    wins_a, wins_b = _history(a, b)
+    m1, m2, m3 = st.columns(3)
+    m1.metric(f"P({a} vence)", f"{p:.1%}")
+    m2.metric(f"P({b} vence)", f"{1 - p:.1%}")
+    m3.metric("Histórico (A x B)", f"{wins_a} x {wins_b}" if wins_a + wins_b else "nunca lutaram")
+    n_train = f"{model.n_train:,}".replace(",", ".")
+    caption = f"Regressão logística sobre diferenças de atributos e tipos ({n_train} combates)"
+    if not np.isnan(model.accuracy):  # NaN quando não deu para separar um holdout com as duas classes
+        caption += f"; acurácia de {model.accuracy:.1%} em combates fora do treino"
+    st.caption(caption + ".")
+
+    def build_explain():
+        contrib = model.explain(a, b).head(10)
+        contrib["label"] = contrib["feature"].map(
+            lambda f: FEATURE_LABELS.get(f, f.removeprefix("type_") if f.startswith("type_") else f)
+        )
+        contrib["favorece"] = np.where(contrib["contribution"] >= 0, a, b)
+        fig = px.bar(
+            contrib.iloc[::-1],
+            x="contribution",
+            y="label",
+            color="favorece",
+            orientation="h",
+            title="O que pesa no confronto (contribuição ao logit)",
+        )
+        fig.update_layout(xaxis_title="Contribuição (logit)", yaxis_title="", transition_duration=500)
+        return fig
+
+    st.plotly_chart(cached_figure("matchup/explain", {"a": a, "b": b}, build_explain), use_container_width=True)
+
+    best, worst = st.columns(2)
+    with best:
+        st.subheader(f"Melhores confrontos de {a}")
+        st.dataframe(
+            model.best_matchups(a, 10).rename(columns={"opponent": "Adversário", "win_prob": "P(vitória)"}),
+            use_container_width=True,
+            hide_index=True,
+        )
+    with worst:
+        st.subheader(f"Piores confrontos de {a}")
+        st.dataframe(
+            model.best_matchups(a, 10, worst=True).rename(columns={"opponent": "Adversário", "win_prob": "P(vitória)"}),
+            use_container_width=True,
+            hide_index=True,
+        )
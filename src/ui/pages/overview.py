@@ -1,48 +1,143 @@
 """Página: Visão Geral.
 
-Mostra amostras de Pokémons e Combates, com destaque ao vencedor e
-botões para baixar CSVs completos.
+Mostra a amostra de Pokémons e um navegador de combates paginado no
+servidor, com filtros por pokémon, adversário e resultado sobre o índice
+invertido (`src.analysis.combat_index`): só a página visível é
+materializada e estilizada. Os CSVs completos são lidos do disco apenas
+quando o botão de download é clicado. No modo aproximado (logs grandes) a
+amostra de combates vem do reservatório dos sketches. As tabelas
+estilizadas ficam no cache de renderização (`src.ui.render_cache`).
 """
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from src.ui.utils import load_all
+from src.ui.render_cache import cached_styler
+from src.ui.utils import (
+    active_data_dir,
+    analytics_mode,
+    approx_caption,
+    get_combat_index,
+    get_combat_sketches,
+    load_pokemons,
+)
+
+
+ID_CELL = "width: 60px; font-size: 0.9rem;"
+WINNER_CELL = "background-color: #d4edda; color: #0f5132; font-weight: 700;"
+WINNER_TEXT = "color: #0f5132; font-weight: 700;"
+ALL = "(todos)"
+OUTCOMES = {"Todos": "all", "Vitórias": "wins", "Derrotas": "losses"}
+PAGE_SIZES = [20, 50, 100]
+
+
+def highlight_winner(sample_c: pd.DataFrame) -> pd.DataFrame:
+    """CSS por célula (vetorizado): destaca quem venceu e a coluna `winner`."""
+    css = pd.DataFrame("", index=sample_c.index, columns=sample_c.columns)
+    if "winner" not in sample_c.columns:
+        return css
+    for col in ("first_pokemon", "second_pokemon"):
+        if col in css.columns:
+            css[col] = np.where(sample_c[col].eq(sample_c["winner"]), WINNER_CELL, "")
+    css["winner"] = WINNER_TEXT
+    return css
+
+
+def _pokemon_sample(pokemons: pd.DataFrame):
+    base_cols = [c for c in pokemons.columns if c in ("id", "name", "generation")]
+    sample_p = pokemons[base_cols].head(20).copy()
+    # Estilo: coluna id menor
+    css = pd.DataFrame("", index=sample_p.index, columns=sample_p.columns)
+    if "id" in css.columns:
+        css["id"] = ID_CELL
+    return sample_p, css
+
+
+def _combat_sample(combats: pd.DataFrame):
+    disp_cols = [c for c in combats.columns if c in ("first_pokemon", "second_pokemon", "winner")]
+    sample_c = combats[disp_cols].head(20).copy()
+    return sample_c, highlight_winner(sample_c)
+
+
+def _combat_browser(index) -> None:
+    """Combates paginados e filtrados pelo índice (contagens sem varrer o log)."""
+    counts = np.diff(index.offsets).reshape(-1, 2).sum(axis=1)
+    names = sorted(index.codes.names[counts > 0].tolist())
+    c1, c2, c3, c4 = st.columns([3, 3, 2, 1])
+    pokemon = c1.selectbox("Pokémon", options=[ALL] + names)
+    selected = pokemon != ALL
+    opponent = c2.selectbox("Adversário", options=[ALL] + names, disabled=not selected)
+    outcome_label = c3.radio("Resultado", options=list(OUTCOMES), horizontal=True, disabled=not selected)
+    page_size = c4.selectbox("Por página", options=PAGE_SIZES)
+
+    filters = {
+        "pokemon": pokemon if selected else None,
+        "outcome": OUTCOMES[outcome_label] if selected else "all",
+        "opponent": opponent if selected and opponent != ALL else None,
+    }
+    total = index.count(**filters)
+    n_pages = max(1, -(-total // page_size))
+    # Chave por filtro: trocar o filtro volta para a página 1
+    page = st.number_input(
+        f"Página (de {n_pages})", min_value=1, max_value=n_pages, value=1, step=1,
+        key=f"combat_page/{filters['pokemon']}/{filters['opponent']}/{filters['outcome']}/{page_size}",
+    )
+    result = index.page(**filters, page=int(page) - 1, page_size=page_size)
+
+    start = result.page * page_size
+    summary = f"Combates {min(start + 1, total)}–{start + len(result.frame)} de {total}"
+    if selected and filters["opponent"] is None:
+        summary += f" | {pokemon}: {index.count(pokemon, 'wins')} vitórias, {index.count(pokemon, 'losses')} derrotas"
+    st.caption(summary)
+    if result.frame.empty:
+        st.info("Nenhum combate com esses filtros.")
+        return
+    params = {**filters, "page": result.page, "size": page_size}
+    styled = cached_styler("overview/browser", params, lambda: (result.frame, highlight_winner(result.frame)))
+    st.dataframe(styled, use_container_width=True, hide_index=True)
+    if selected:
+        st.download_button(
+            "Baixar combates filtrados (CSV)",
+            data=lambda: index.frame(index.positions(**filters)).to_csv(index=False, sep=";", encoding="utf-8-sig"),
+            file_name=f"combates_{pokemon}.csv",
+            mime="text/csv",
+        )
 
 
 def render() -> None:
     st.title("Visão Geral")
-    pokemons, combats, _ = load_all()
-    st.write(f"Pokémons: {len(pokemons)} | Combates: {len(combats)}")
+    approx = analytics_mode() == "approx"
+    if approx:
+        sketches = get_combat_sketches()
+        pokemons, combats = load_pokemons(), sketches.sample()
+        st.write(
+            f"Pokémons: {len(pokemons)} | Combates: {sketches.n_combats} | "
+            f"Confrontos distintos (aprox.): {sketches.distinct_matchups()}"
+        )
+        st.caption(approx_caption())
+    else:
+        pokemons, index = load_pokemons(), get_combat_index()
+        st.write(f"Pokémons: {len(pokemons)} | Combates: {len(index.codes)}")
+    data_dir = active_data_dir()
 
     st.subheader("Amostra de Pokémons")
     if not pokemons.empty:
-        base_cols = [c for c in pokemons.columns if c in ("id", "name", "generation")]
-        sample_p = pokemons[base_cols].head(20).copy()
-        # Estilo: coluna id menor
-        styler = sample_p.style.set_properties(subset=["id"], **{"width": "60px", "font-size": "0.9rem"})
+        styler = cached_styler("overview/pokemons", {"approx": approx}, lambda: _pokemon_sample(pokemons))
         st.dataframe(styler, use_container_width=True, hide_index=True)
-        csv_p = pokemons.to_csv(index=False, sep=';', encoding='utf-8-sig')
-        st.download_button("Baixar Pokémons (CSV)", data=csv_p, file_name="pokemons.csv", mime="text/csv")
-
-    st.subheader("Amostra de Combates")
-    if not combats.empty:
-        disp_cols = [c for c in combats.columns if c in ("first_pokemon", "second_pokemon", "winner")]
-        sample_c = combats[disp_cols].head(20).copy()
-
-        def highlight_winner(row: pd.Series) -> list[str]:
-            s = [""] * len(row)
-            cols = list(sample_c.columns)
-            fp, sp, w = row.get("first_pokemon"), row.get("second_pokemon"), row.get("winner")
-            if fp == w:
-                s[cols.index("first_pokemon")] = "background-color: #d4edda; color: #0f5132; font-weight: 700;"
-            if sp == w:
-                s[cols.index("second_pokemon")] = "background-color: #d4edda; color: #0f5132; font-weight: 700;"
-            s[cols.index("winner")] = "color: #0f5132; font-weight: 700;"
-            return s
-
-        styled_c = sample_c.style.apply(highlight_winner, axis=1)
-        st.dataframe(styled_c, use_container_width=True, hide_index=True)
-        csv_c = combats.to_csv(index=False, sep=';', encoding='utf-8-sig')
-        st.download_button("Baixar Combates (CSV)", data=csv_c, file_name="combats.csv", mime="text/csv")
+        # Os CSVs do ETL já estão no formato do download: lidos só no clique
+        path_p = data_dir / "pokemons.csv"
+        st.download_button("Baixar Pokémons (CSV)", data=path_p.read_bytes, file_name="pokemons.csv", mime="text/csv")
+
+    if approx:
+        st.subheader("Amostra de Combates")
+        if not combats.empty:
+            styled_c = cached_styler("overview/combats", {"approx": approx}, lambda: _combat_sample(combats))
+            st.dataframe(styled_c, use_container_width=True, hide_index=True)
+        return
+
+    st.subheader("Combates")
+    _combat_browser(index)
+    path_c = data_dir / "combats.csv"
+    st.download_button("Baixar Combates (CSV)", data=path_c.read_bytes, file_name="combats.csv", mime="text/csv")
 
@@ -1,34 +1,47 @@
 """Página: Nº de Participações em Combates.
 
-Mostra ranking de Pokémons com mais/menos participações e tabela.
+Mostra ranking de Pokémons com mais/menos participações e tabela. No modo
+aproximado só há o top-K do Space-Saving, então o ranking de menos
+participações não é oferecido.
 """
 
 import streamlit as st
 import plotly.express as px
 
-from src.ui.utils import load_all
-from src.analysis.metrics import compute_participations
+from src.ui.render_cache import cached_figure
+from src.ui.utils import analytics_mode, approx_caption, get_participations
 
 
 def render() -> None:
     st.header("Nº de Participações em Combates")
-    _, combats, _ = load_all()
-    part = compute_participations(combats)
-    modo = st.selectbox("Visualizar", ["Mais participações", "Menos participações"], index=0)
+    part = get_participations()
+    caption = approx_caption()
+    if caption:
+        st.caption(caption)
+    if analytics_mode() == "approx":
+        # O sketch só guarda os mais frequentes: os últimos dele não são os que menos lutaram
+        modo = "Mais participações"
+        st.caption("Ranking de menos participações indisponível no modo aproximado (só o top-K é monitorado).")
+    else:
+        modo = st.selectbox("Visualizar", ["Mais participações", "Menos participações"], index=0)
     qtd = st.sidebar.number_input("Quantidade exibida", min_value=5, max_value=100, value=20, step=5)
     df_show = part.sort_values("participations", ascending=(modo == "Menos participações")).head(qtd)
 
-    fig = px.bar(
-        df_show,
-        x="name",
-        y="participations",
-        title="Nº de Participações em Combates",
-        color="participations",
-        color_continuous_scale="Blues",
-        text='participations',
-    )
-    fig.update_traces(textposition='outside')
-    fig.update_layout(xaxis_title="Pokémon", yaxis_title="Participações", xaxis_tickangle=-45, transition_duration=500)
+    def build():
+        fig = px.bar(
+            df_show,
+            x="name",
+            y="participations",
+            title="Nº de Participações em Combates",
+            color="participations",
+            color_continuous_scale="Blues",
+            text='participations',
+        )
+        fig.update_traces(textposition='outside')
+        fig.update_layout(xaxis_title="Pokémon", yaxis_title="Participações", xaxis_tickangle=-45, transition_duration=500)
+        return fig
+
+    fig = cached_figure("participations", {"modo": modo, "qtd": qtd}, build)
     st.plotly_chart(fig, use_container_width=True)
 
     tbl = df_show.rename(columns={"name": "Nome", "participations": "Participações"})
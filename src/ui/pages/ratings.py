@@ -0,0 +1,66 @@
+"""Página: Ranking de Força (Elo / Bradley-Terry).
+
+Ranking que considera a força dos adversários, ao contrário da taxa de
+vitória bruta, com comparação entre as duas métricas.
+"""
+
+import plotly.express as px
+import streamlit as st
+
+from src.ui.render_cache import cached_figure
+from src.ui.utils import get_ratings
+
+
+def render() -> None:
+    st.header("Ranking de Força (Elo / Bradley-Terry)")
+    ratings = get_ratings()
+    if ratings.empty:
+        st.info("Sem combates para calcular ratings.")
+        return
+
+    metric_label = st.radio("Rating", options=["Bradley-Terry", "Elo"], horizontal=True)
+    metric = "bt_rating" if metric_label == "Bradley-Terry" else "elo"
+    min_games = st.sidebar.number_input("Mínimo de combates", min_value=0, max_value=500, value=10, step=5)
+    qtd = st.sidebar.number_input("Quantidade exibida", min_value=5, max_value=100, value=20, step=5)
+
+    board = ratings[ratings["games"] >= min_games].sort_values(metric, ascending=False, ignore_index=True)
+    board["win_rate"] = (board["wins"] / board["games"]).round(4)
+    top = board.head(qtd)
+
+    def build_top():
+        fig = px.bar(
+            top,
+            x="name",
+            y=metric,
+            hover_data=["elo", "bt_rating", "wins", "losses", "games"],
+            title=f"Top {qtd} por {metric_label}",
+        )
+        fig.update_layout(xaxis_title="Pokémon", yaxis_title=metric_label, xaxis_tickangle=-45, transition_duration=500)
+        lo = float(top[metric].min()) if not top.empty else 0.0
+        fig.update_yaxes(range=[lo - 50, None])
+        return fig
+
+    def build_cmp():
+        fig_cmp = px.scatter(
+            board,
+            x="win_rate",
+            y=metric,
+            hover_data=["name", "games"],
+            title=f"Taxa de Vitória x {metric_label}",
+        )
+        fig_cmp.update_layout(xaxis_title="Taxa de Vitória", yaxis_title=metric_label, transition_duration=500)
+        return fig_cmp
+
+    st.plotly_chart(cached_figure("ratings/top", {"metric": metric, "min_games": min_games, "qtd": qtd}, build_top), use_container_width=True)
+    st.plotly_chart(cached_figure("ratings/scatter", {"metric": metric, "min_games": min_games}, build_cmp), use_container_width=True)
+
+    tbl = top.rename(columns={
+        "name": "Nome",
+        "elo": "Elo",
+        "bt_rating": "Bradley-Terry",
+        "wins": "Vitórias",
+        "losses": "Derrotas",
+        "games": "Combates",
+        "win_rate": "Taxa de Vitória",
+    }).drop(columns=["bt_strength"])
+    st.dataframe(tbl, use_container_width=True, hide_index=True)
@@ -0,0 +1,79 @@
+"""Página: Simulador de Torneios.
+
+Estima com Monte Carlo qual time de seis vence um torneio (mata-mata ou
+pontos corridos) com mais frequência.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from src.analysis.simulation import (
+    TEAM_SIZE,
+    sample_teams,
+    simulate_bracket,
+    simulate_round_robin,
+    team_win_matrix,
+)
+from src.ui.utils import get_combat_codes, get_ratings, get_win_probabilities
+
+
+def render() -> None:
+    st.header("Simulador de Torneios")
+    codes = get_combat_codes()
+    ratings = get_ratings()
+    if len(codes) == 0 or ratings.empty:
+        st.info("Sem combates para estimar probabilidades.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        method_label = st.radio("Probabilidades", options=["Confronto direto + prior", "Modelo de ratings"])
+        formato = st.radio("Formato", options=["Mata-mata", "Pontos corridos"])
+    with col2:
+        n_teams = st.selectbox("Nº de times", options=[4, 8, 16], index=1)
+        pool_size = st.slider("Sortear times entre os N melhores (Bradley-Terry)", min_value=30, max_value=300, value=100, step=10)
+    with col3:
+        n_sims = st.selectbox("Simulações", options=[1_000, 10_000, 100_000], index=1, format_func=lambda v: f"{v:,}".replace(",", "."))
+        seed = st.number_input("Semente", min_value=0, max_value=10_000, value=42, step=1)
+
+    index = {name: code for code, name in enumerate(codes.names)}
+    ranked = ratings.sort_values("bt_rating", ascending=False)["name"].tolist()
+    meu_time = st.multiselect("Meu time (opcional, 6 pokémons)", options=ranked, max_selections=TEAM_SIZE)
+
+    pool = [index[n] for n in ranked[:pool_size] if n not in meu_time]
+    n_random = n_teams - (1 if len(meu_time) == TEAM_SIZE else 0)
+    try:
+        teams = sample_teams(pool, n_random, seed=int(seed))
+    except ValueError as e:
+        st.warning(str(e))
+        return
+    labels = [f"Time {i + 1}" for i in range(n_random)]
+    if len(meu_time) == TEAM_SIZE:
+        teams = [[index[n] for n in meu_time]] + teams
+        labels = ["Meu time"] + labels
+    elif meu_time:
+        st.caption(f"Selecione {TEAM_SIZE} pokémons para incluir o seu time ({len(meu_time)}/{TEAM_SIZE}).")
+
+    probs = get_win_probabilities("shrinkage" if method_label.startswith("Confronto") else "rating")
+    team_probs = team_win_matrix(probs, np.array(teams))
+    if formato == "Mata-mata":
+        result = simulate_bracket(team_probs, int(n_sims), seed=int(seed), labels=labels)
+    else:
+        result = simulate_round_robin(team_probs, int(n_sims), seed=int(seed), labels=labels)
+
+    result["Títulos (%)"] = (result["title_prob"] * 100).round(2)
+    fig = px.bar(result, x="team", y="Títulos (%)", text="Títulos (%)", title=f"Probabilidade de título ({formato})")
+    fig.update_traces(textposition="outside")
+    fig.update_layout(xaxis_title="Time", yaxis_title="Títulos (%)", transition_duration=500)
+    st.plotly_chart(fig, use_container_width=True)
+
+    members = {label: ", ".join(codes.names[c] for c in team) for label, team in zip(labels, teams)}
+    tbl = pd.DataFrame({
+        "Time": result["team"],
+        "Pokémons": result["team"].map(members),
+        "Títulos": result["titles"],
+        "Títulos (%)": result["Títulos (%)"],
+    })
+    st.dataframe(tbl, use_container_width=True, hide_index=True)
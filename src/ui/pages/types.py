@@ -1,50 +1,29 @@
 """Página: Informações por Tipo.
 
-Gráfico consolidado com os 18 tipos e detalhamento por tipo e métrica.
+Gráfico consolidado com os 18 tipos, matriz de confrontos tipo x tipo e
+detalhamento por tipo e métrica. As figuras são montadas por funções de
+módulo, usadas também pelo pré-aquecimento (`warm_tasks`).
 """
 
 import plotly.express as px
 import streamlit as st
 
+from src.ui.render_cache import cached_figure
 from src.ui.utils import (
-    load_all,
     OFFICIAL_TYPES_EN,
     TYPE_COLORS_EN,
-    parse_types as _parse_types,
-    ensure_overall as _ensure_overall,
+    get_type_matchups,
+    get_type_stats,
 )
-from src.analysis.metrics import compute_winrate
 
 
-def render() -> None:
-    st.header("Informações por Tipo")
-    pokemons, combats, attrs = load_all()
-    if attrs is None or attrs.empty:
-        st.info("Arquivo de atributos não encontrado. Rode o ETL para gerar 'data/pokemon_attributes.csv'.")
-        return
-    attrs = _ensure_overall(attrs)
-
-    wr = compute_winrate(combats, min_battles=1)
-    wr_id = wr.merge(pokemons, on="name", how="left")
-
-    types_df = attrs[["id", "types"]].copy()
-    types_df["types_list"] = types_df["types"].apply(_parse_types)
-    types_exploded = (
-        types_df.explode("types_list")
-        .dropna(subset=["types_list"])  # type: ignore[arg-type]
-        .rename(columns={"types_list": "type_en"})
-    )
-    types_exploded = types_exploded[types_exploded["type_en"].isin(OFFICIAL_TYPES_EN)].copy()
-
-    wr_types = wr_id.merge(types_exploded[["id", "type_en"]], on="id", how="inner")
-    if wr_types.empty:
-        st.warning("Não foi possível calcular taxa por tipo.")
-    else:
-        agg = (
-            wr_types.groupby("type_en", as_index=False)
-            .agg(taxa_vitoria=("win_rate", "mean"))
-            .sort_values("taxa_vitoria", ascending=False)
-        )
+METRICS = {"Vitórias": "wins", "Derrotas": "losses", "Overall": "overall"}
+DEFAULT_COMBOS = 25
+
+
+def winrate_figure(stats):
+    def build_types():
+        agg = stats.aggregates.rename(columns={"type": "type_en", "taxa_media_vitoria": "taxa_vitoria"})
         agg["Taxa de Vitória (%)"] = (agg["taxa_vitoria"] * 100).round(2)
         fig1 = px.bar(
             agg,
@@ -58,21 +37,97 @@ def render() -> None:
         )
         fig1.update_traces(textposition="outside", textfont_size=16)
         fig1.update_layout(xaxis_title="Taxa de Vitória (%)", yaxis_title="Tipo", transition_duration=500)
-        st.plotly_chart(fig1, use_container_width=True)
+        return fig1
 
-    # Detalhe por tipo
+    return cached_figure("types/winrate", {}, build_types)
+
+
+def matchups_figure(matchups, dual: bool, top):
+    def build_matchups():
+        grid = matchups.combo_win_rate(top) if dual else matchups.win_rate
+        fig_mu = px.imshow(
+            (grid * 100).round(1),
+            labels=dict(x="Adversário", y="Tipo", color="Vitórias (%)"),
+            color_continuous_scale="RdYlGn",
+            zmin=0,
+            zmax=100,
+            aspect="auto",
+            text_auto=not dual,
+        )
+        fig_mu.update_layout(height=650 if not dual else 800, transition_duration=500)
+        return fig_mu
+
+    return cached_figure("types/matchups", {"dual": dual, "top": top}, build_matchups)
+
+
+def members_figure(stats, type_en: str, metric_label: str):
+    """Top 30 do tipo na métrica; `None` quando não há dados."""
+    metric = METRICS[metric_label]
+    det = stats.members(type_en, metric)
+    if det.empty:
+        return None
+
+    def build_members():
+        fig2 = px.bar(det.head(30), y="name", x=metric, orientation="h", title=f"{metric_label} do tipo {type_en}")
+        fig2.update_layout(yaxis_title="Pokémon", xaxis_title=metric_label, transition_duration=500)
+        return fig2
+
+    return cached_figure("types/members", {"type": type_en, "metric": metric}, build_members)
+
+
+def warm_tasks():
+    """Todas as combinações dos widgets: 18 tipos x 3 métricas, mais os gráficos fixos."""
+    stats = get_type_stats()
+    if stats is None:
+        return []
+    tasks = []
+    if not stats.aggregates.empty:
+        tasks.append(("types/winrate", lambda: winrate_figure(stats)))
+    matchups = get_type_matchups()
+    if matchups is not None and matchups.wins.sum() > 0:
+        top = min(DEFAULT_COMBOS, len(matchups.combos))
+        tasks.append(("types/matchups", lambda: matchups_figure(matchups, False, None)))
+        tasks.append(("types/matchups/dual", lambda: matchups_figure(matchups, True, top)))
+    for type_en in OFFICIAL_TYPES_EN:
+        for label in METRICS:
+            tasks.append((f"types/members/{type_en}/{label}", lambda t=type_en, m=label: members_figure(stats, t, m)))
+    return tasks
+
+
+def render() -> None:
+    st.header("Informações por Tipo")
+    stats = get_type_stats()
+    if stats is None:
+        st.info("Arquivo de atributos não encontrado. Rode o ETL para gerar 'data/pokemon_attributes.csv'.")
+        return
+
+    if stats.aggregates.empty:
+        st.warning("Não foi possível calcular taxa por tipo.")
+    else:
+        st.plotly_chart(winrate_figure(stats), use_container_width=True)
+
+    # Confrontos tipo x tipo (linha vence coluna)
+    matchups = get_type_matchups()
+    if matchups is not None and matchups.wins.sum() > 0:
+        st.subheader("Confrontos entre Tipos")
+        dual = st.toggle("Combinações de tipos (ex.: Fire/Flying)", value=False)
+        top = None
+        if dual:
+            n_combos = len(matchups.combos)
+            top = st.slider(
+                "Combinações com mais combates",
+                min_value=min(5, n_combos),
+                max_value=min(60, n_combos),
+                value=min(DEFAULT_COMBOS, n_combos),
+            )
+        st.plotly_chart(matchups_figure(matchups, dual, top), use_container_width=True)
+
+    # Detalhe por tipo: só indexa arrays já calculados (sem recalcular nada)
     sel_type_en = st.selectbox("Selecione um tipo", options=OFFICIAL_TYPES_EN)
-    metric_label = st.selectbox("Métrica", options=["Vitórias", "Derrotas", "Overall"], index=0)
-    metric_map = {"Vitórias": "wins", "Derrotas": "losses", "Overall": "overall"}
-    metric = metric_map[metric_label]
-
-    wr_attrs = wr_id.merge(attrs[["id", "types", "overall"]], on="id", how="left")
-    mask = wr_attrs["types"].fillna("").apply(lambda s: sel_type_en in _parse_types(s))
-    det = wr_attrs[mask].copy()
-    if det.empty or metric not in det.columns:
+    metric_label = st.selectbox("Métrica", options=list(METRICS), index=0)
+
+    fig2 = members_figure(stats, sel_type_en, metric_label)
+    if fig2 is None:
         st.info("Sem dados para este tipo/métrica.")
     else:
-        det = det[["name", metric]].sort_values(metric, ascending=False)
-        fig2 = px.bar(det.head(30), y="name", x=metric, orientation="h", title=f"{metric_label} do tipo {sel_type_en}")
-        fig2.update_layout(yaxis_title="Pokémon", xaxis_title=metric_label, transition_duration=500)
         st.plotly_chart(fig2, use_container_width=True)
@@ -1,45 +1,72 @@
 """Página: Taxa de Vitória.
 
 Ranking por taxa de vitória ou por derrotas, com tabela traduzida.
+O ranking pode usar o limite inferior do intervalo de confiança (Wilson ou
+bootstrap), que não premia quem tem poucos combates.
 """
 
 import streamlit as st
 import plotly.express as px
 
-from src.ui.utils import load_all
-from src.analysis.metrics import compute_winrate
+from src.analysis.intervals import add_winrate_intervals
+from src.ui.render_cache import cached_figure
+from src.ui.utils import approx_caption, get_winrate
+
+
+SORT_OPTIONS = {
+    "Taxa de vitória": "win_rate",
+    "Limite inferior (Wilson 95%)": "wilson_lo",
+    "Limite inferior (bootstrap 95%)": "boot_lo",
+}
 
 
 def render() -> None:
     st.header("Taxa de Vitória")
-    _, combats, _ = load_all()
+    caption = approx_caption()
+    if caption:
+        st.caption(caption)
 
     st.markdown("<div style='font-size:1.15rem; font-weight:700; margin-bottom:4px;'>Mostrar quem mais perdeu</div>", unsafe_allow_html=True)
     mostrar_derrotas = st.checkbox("Ativar", value=False)
     qtd = st.sidebar.number_input("Quantidade exibida", min_value=5, max_value=100, value=20, step=5)
+    sort_label = st.sidebar.selectbox("Ordenar por", list(SORT_OPTIONS), index=1)
+    sort_col = SORT_OPTIONS[sort_label]
+
+    def build():
+        wr = add_winrate_intervals(get_winrate(min_battles=1), bootstrap=(sort_col == "boot_lo"))
+        if mostrar_derrotas:
+            data_view = wr.sort_values(["losses", "total"], ascending=[False, False]).head(qtd)
+            chart_title = "Mais Derrotas"
+            y_col = "losses"
+        else:
+            data_view = wr.sort_values([sort_col, "total"], ascending=[False, False]).head(qtd)
+            chart_title = f"Maior Taxa de Vitória ({sort_label.lower()})"
+            y_col = "win_rate"
+
+        # Barras de erro: intervalo do método escolhido (Wilson por padrão)
+        lo_col, hi_col = ("boot_lo", "boot_hi") if sort_col == "boot_lo" else ("wilson_lo", "wilson_hi")
+        data_view = data_view.assign(
+            err_plus=data_view[hi_col] - data_view["win_rate"],
+            err_minus=data_view["win_rate"] - data_view[lo_col],
+        )
+        fig = px.bar(
+            data_view,
+            x="name",
+            y=y_col,
+            error_y=("err_plus" if y_col == "win_rate" else None),
+            error_y_minus=("err_minus" if y_col == "win_rate" else None),
+            hover_data=["wins", "losses", "total", lo_col, hi_col],
+            title=chart_title,
+        )
+        fig.update_layout(
+            xaxis_title="Pokémon",
+            yaxis_title=("Derrotas" if y_col == "losses" else "Taxa de Vitória"),
+            xaxis_tickangle=-45,
+            transition_duration=500,
+        )
+        return fig
 
-    wr = compute_winrate(combats, min_battles=1)
-    if mostrar_derrotas:
-        data_view = wr.sort_values(["losses", "total"], ascending=[False, False]).head(qtd)
-        chart_title = "Mais Derrotas"
-        y_col = "losses"
-    else:
-        data_view = wr.sort_values(["win_rate", "total"], ascending=[False, False]).head(qtd)
-        chart_title = "Maior Taxa de Vitória"
-        y_col = "win_rate"
-
-    fig = px.bar(
-        data_view,
-        x="name",
-        y=y_col,
-        hover_data=["wins", "losses", "total"],
-        title=chart_title,
-    )
-    fig.update_layout(
-        xaxis_title="Pokémon",
-        yaxis_title=("Derrotas" if y_col == "losses" else "Taxa de Vitória"),
-        xaxis_tickangle=-45,
-        transition_duration=500,
-    )
+    params = {"derrotas": mostrar_derrotas, "qtd": qtd, "sort": sort_col}
+    fig = cached_figure("winrate", params, build)
     st.plotly_chart(fig, use_container_width=True)
 
@@ -0,0 +1,130 @@
+"""Cache de saída renderizada das páginas (figuras plotly e tabelas estilizadas).
+
+A cada rerun o Streamlit reexecuta a página inteira: o pandas que prepara
+os dados, a montagem da figura `px.*` (validação do plotly incluída) e as
+funções de estilo dos `Styler`. Aqui guardamos o resultado já serializado,
+chaveado por (página, parâmetros dos widgets, versão dos dados):
+
+- figuras: o JSON da figura; na volta, `go.Figure(..., _validate=False)`
+  reconstrói o objeto em ~1 ms, contra dezenas de ms para montar de novo;
+- tabelas: o DataFrame exibido e a matriz de CSS por célula; o `Styler`
+  é recriado aplicando a matriz pronta.
+
+O cache é do processo (compartilhado entre sessões) e limitado em bytes
+(`RENDER_CACHE_MB`, padrão 64) e em nº de entradas, com descarte LRU.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from src.analysis.cache import fingerprint
+from src.ui.utils import data_signature, data_version
+
+
+DEFAULT_MAX_BYTES = int(os.getenv("RENDER_CACHE_MB", "64")) << 20
+DEFAULT_MAX_ENTRIES = 512
+
+
+class RenderCache:
+    """LRU limitado pela soma dos tamanhos (bytes) e pelo nº de entradas; thread-safe."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return  # maior que o cache inteiro: não guarda
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_cache = RenderCache()
+
+
+def get_render_cache() -> RenderCache:
+    return _cache
+
+
+def render_key(kind: str, page: str, params: Mapping[str, Any], version: Optional[Any] = None) -> str:
+    """Chave (tipo, página, parâmetros, versão dos dados); parâmetros em ordem estável.
+
+    A versão padrão é a do manifesto (conteúdo), para que um snapshot com os
+    mesmos dados reaproveite as figuras; sem manifesto, a assinatura dos CSVs.
+    """
+    version = version if version is not None else (data_version() or data_signature())
+    return fingerprint(kind, page, sorted((str(k), repr(v)) for k, v in params.items()), version)
+
+
+def cached_figure(page: str, params: Mapping[str, Any], build: Callable[[], Any]):
+    """Figura plotly do cache ou construída por `build()` (que inclui o preparo dos dados)."""
+    import plotly.graph_objects as go
+
+    key = render_key("figure", page, params)
+    spec = _cache.get(key)
+    if spec is None:
+        spec = build().to_json()
+        _cache.put(key, spec, len(spec))
+    return go.Figure(json.loads(spec), _validate=False)
+
+
+def cached_styler(
+    page: str,
+    params: Mapping[str, Any],
+    build: Callable[[], Tuple[pd.DataFrame, pd.DataFrame]],
+):
+    """`Styler` a partir de (dados, CSS por célula) guardados no cache.
+
+    `build()` retorna o DataFrame a exibir e um DataFrame de mesmo formato
+    com o CSS de cada célula ("" para nenhum).
+    """
+    key = render_key("styler", page, params)
+    entry = _cache.get(key)
+    if entry is None:
+        data, css = build()
+        entry = (data, css)
+        size = int(data.memory_usage(deep=True).sum() + css.memory_usage(deep=True).sum())
+        _cache.put(key, entry, size)
+    data, css = entry
+    return data.style.apply(lambda _: css, axis=None)
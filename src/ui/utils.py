@@ -6,39 +6,356 @@ de atributos) para as paginas do Streamlit.
 
 from __future__ import annotations
 
-from typing import List
+import os
+import threading
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
 
 import pandas as pd
+import streamlit as st
 
-from src.analysis.metrics import load_data
-
-
-def load_all():
-    """Carrega pokemons, combats e attrs a partir da pasta data/ (CSV)."""
-    return load_data("data")
-
-
-# 18 tipos oficiais (EN) para consistencia
-OFFICIAL_TYPES_EN: List[str] = [
-    "Normal",
-    "Fire",
-    "Water",
-    "Grass",
-    "Flying",
-    "Fighting",
-    "Poison",
-    "Electric",
-    "Ground",
-    "Rock",
-    "Psychic",
-    "Ice",
-    "Bug",
-    "Ghost",
-    "Steel",
-    "Dragon",
-    "Dark",
-    "Fairy",
-]
+from src.analysis.combat_index import CombatIndex, build_combat_index
+from src.analysis.cube import StatsCube, build_stats_cube
+from src.analysis.encoding import CombatCodes, encode_combats
+from src.analysis.metrics import (
+    build_winrate_with_attrs,
+    ensure_overall,
+    iter_combat_chunks,
+    load_data,
+    participations_from_codes,
+    winrate_from_codes,
+)
+from src.analysis.manifest import DataManifest, read_manifest
+from src.analysis.predictor import MatchupModel, fit_matchup_model
+from src.analysis.ratings import compute_ratings
+from src.analysis.similarity import SimilarityIndex, build_similarity_index
+from src.analysis.simulation import win_probability_matrix
+from src.analysis.sketches import CombatSketches, SketchConfig, sketch_combats
+from src.analysis.store import open_combat_store
+from src.etl.snapshots import resolve_data_dir
+from src.analysis.type_stats import (
+    OFFICIAL_TYPES_EN,
+    TypeMatchups,
+    TypeStats,
+    build_type_stats,
+    latest_type_matchups,
+    split_types,
+)
+
+
+DATA_DIR = Path("data")
+
+# Modo "auto" passa a usar sketches quando o CSV de combates passa deste
+# tamanho e não há store binário (data/combats_int) para ler via memmap.
+APPROX_THRESHOLD_BYTES = 1 << 30
+
+
+# Troca a quente de snapshots: o processo serve `dir` até o snapshot mais
+# novo (`warming`) ter os caches aquecidos numa thread de fundo.
+_serving: dict = {"dir": None, "warming": None, "failed": None}
+_serving_lock = threading.Lock()
+# Diretório fixado por thread (pré-aquecimento de uma versão ainda não servida)
+_local = threading.local()
+
+
+@contextmanager
+def using_data_dir(data_dir: Path | str):
+    """Faz `active_data_dir()` devolver `data_dir` nesta thread enquanto durar o bloco."""
+    previous = getattr(_local, "data_dir", None)
+    _local.data_dir = Path(data_dir)
+    try:
+        yield _local.data_dir
+    finally:
+        _local.data_dir = previous
+
+
+def active_data_dir() -> Path:
+    """Diretório de dados servido agora (snapshot atual ou a própria data/).
+
+    Quando o agendador publica um snapshot novo, as sessões continuam na
+    versão anterior (caches quentes) enquanto a nova é aquecida em segundo
+    plano; a troca acontece de uma vez ao final do aquecimento.
+    """
+    pinned = getattr(_local, "data_dir", None)
+    if pinned is not None:
+        return pinned
+    latest = resolve_data_dir(DATA_DIR)
+    with _serving_lock:
+        served = _serving["dir"]
+        if served is None or not served.exists():
+            _serving["dir"] = latest
+            return latest
+        if latest != served and latest not in (_serving["warming"], _serving["failed"]):
+            _serving["warming"] = latest
+            threading.Thread(target=_warm_and_swap, args=(latest,), name="warm-snapshot", daemon=True).start()
+        return served
+
+
+def _warm_and_swap(target: Path) -> None:
+    try:
+        warm_caches(target)
+        from src.ui.warmup import prewarm
+
+        prewarm(target, include_data=False)
+    except Exception:
+        print(f"Falha ao aquecer {target}; mantendo a versão anterior.\n" + traceback.format_exc())
+        with _serving_lock:
+            _serving["warming"], _serving["failed"] = None, target
+        return
+    with _serving_lock:
+        _serving["dir"], _serving["warming"] = target, None
+
+
+def warm_caches(data_dir: Path | str) -> None:
+    """Calcula os artefatos em cache de uma versão dos dados (sem trocar a servida)."""
+    sig = data_signature(data_dir)
+    if analytics_mode(data_dir) == "approx":
+        _combat_sketches(sig)
+        return
+    _combat_codes(sig)
+    _combat_index(sig)
+    _ratings(sig)
+    _type_stats(sig)
+    _type_matchups(sig)
+    _similarity_index(sig)
+    _stats_cube(sig)
+
+
+def _signature_dir(signature: tuple) -> Path:
+    return Path(signature[0])
+
+
+def load_all(data_dir: Path | str | None = None):
+    """Carrega pokemons, combats e attrs da versão servida dos dados (CSV)."""
+    return load_data(data_dir if data_dir is not None else active_data_dir())
+
+
+def load_pokemons() -> pd.DataFrame:
+    """Só `pokemons.csv` (sem ler o log de combates)."""
+    return _pokemons(data_signature())
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _pokemons(signature: tuple) -> pd.DataFrame:
+    return pd.read_csv(_signature_dir(signature) / "pokemons.csv", sep=";", encoding="utf-8-sig")
+
+
+def analytics_mode(data_dir: Path | str | None = None) -> str:
+    """`exact` ou `approx`, conforme a variável ANALYTICS_MODE (exact|approx|auto)."""
+    mode = os.getenv("ANALYTICS_MODE", "auto").strip().lower()
+    if mode in ("exact", "approx"):
+        return mode
+    data_dir = Path(data_dir) if data_dir is not None else active_data_dir()
+    combats_csv = data_dir / "combats.csv"
+    too_big = combats_csv.exists() and combats_csv.stat().st_size > APPROX_THRESHOLD_BYTES
+    return "approx" if too_big and open_combat_store(data_dir) is None else "exact"
+
+
+def data_signature(data_dir: Path | str | None = None) -> tuple:
+    """Assinatura barata (diretório + nome, mtime e tamanho dos CSVs) para chavear caches.
+
+    O 1º elemento é o diretório dos dados: as funções em cache leem dele, e
+    não da versão servida no momento, para poderem aquecer um snapshot novo.
+    """
+    data_dir = Path(data_dir) if data_dir is not None else active_data_dir()
+    sig = [str(data_dir)]
+    for name in ("pokemons.csv", "combats.csv", "pokemon_attributes.csv"):
+        path = data_dir / name
+        if path.exists():
+            stat = path.stat()
+            sig.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sig)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _manifest(signature: tuple) -> DataManifest | None:
+    return read_manifest(_signature_dir(signature))
+
+
+def _data_key(signature: tuple, *tables: str) -> str | None:
+    """Hash de conteúdo (manifesto do ETL) das tabelas de que um artefato depende."""
+    manifest = _manifest(signature)
+    return manifest.key(*tables) if manifest is not None else None
+
+
+def data_version(data_dir: Path | str | None = None) -> str | None:
+    """Versão de conteúdo dos dados, ou `None` sem manifesto válido (dados antigos ou editados à mão).
+
+    Ao contrário de `data_signature`, não muda quando um snapshot novo traz
+    os mesmos dados: serve de chave para o que não depende do diretório.
+    """
+    manifest = _manifest(data_signature(data_dir))
+    return manifest.version if manifest is not None else None
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _type_stats(signature: tuple) -> TypeStats | None:
+    attrs = _attributes(signature)
+    if attrs is None or attrs.empty:
+        return None
+    return build_type_stats(_pokemons(signature), _combat_counts(signature), attrs)
+
+
+def get_type_stats() -> TypeStats | None:
+    """`TypeStats` (matriz pokémon × tipo e agregados) em cache até os CSVs mudarem."""
+    return _type_stats(data_signature())
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _type_matchups(signature: tuple) -> TypeMatchups | None:
+    attrs = _attributes(signature)
+    if attrs is None or attrs.empty:
+        return None
+    return latest_type_matchups(_combat_codes(signature), _pokemons(signature), attrs)
+
+
+def get_type_matchups() -> TypeMatchups | None:
+    """Matriz de confrontos tipo x tipo; combates anexados são somados sem recontar o histórico."""
+    return _type_matchups(data_signature())
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _combat_codes(signature: tuple) -> CombatCodes:
+    codes = open_combat_store(_signature_dir(signature))
+    if codes is not None:
+        return codes
+    pokemons, combats, _ = load_all(_signature_dir(signature))
+    return encode_combats(combats, pokemons["name"])
+
+
+def get_combat_codes() -> CombatCodes:
+    """Combates codificados em inteiros (códigos = posição em pokemons.csv).
+
+    Lê o store memmap de `data/combats_int/` quando disponível (sem parsing);
+    caso contrário, codifica a partir dos CSVs.
+    """
+    return _combat_codes(data_signature())
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _combat_index(signature: tuple) -> CombatIndex:
+    return build_combat_index(_combat_codes(signature))
+
+
+def get_combat_index() -> CombatIndex:
+    """Índice pokémon -> posições no log (CSR) para paginar e filtrar combates."""
+    return _combat_index(data_signature())
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _combat_counts(signature: tuple) -> CombatCodes:
+    codes = open_combat_store(_signature_dir(signature), compact=True)
+    if codes is not None:
+        return codes
+    return _combat_codes(signature).compact()
+
+
+def get_combat_counts() -> CombatCodes:
+    """Combates compactados: confrontos (first, second, winner) distintos e `count`.
+
+    Suficiente para contagens (participações, vitórias, head-to-head); o Elo
+    e a matriz incremental de tipos continuam no log ordenado.
+    """
+    return _combat_counts(data_signature())
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _ratings(signature: tuple) -> pd.DataFrame:
+    return compute_ratings(_combat_codes(signature), version=_data_key(signature, "pokemons", "combats"))
+
+
+def get_ratings() -> pd.DataFrame:
+    """Ratings Elo e Bradley-Terry (também persistidos em data/cache/ratings/)."""
+    return _ratings(data_signature())
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def _attributes(signature: tuple) -> pd.DataFrame | None:
+    path = _signature_dir(signature) / "pokemon_attributes.csv"
+    if not path.exists():
+        return None
+    attrs = ensure_overall(pd.read_csv(path, sep=";", encoding="utf-8-sig"))
+    attrs["primary_type"] = attrs["types"].map(lambda s: next(iter(parse_types(s)), None))
+    return attrs
+
+
+def get_attributes() -> pd.DataFrame | None:
+    """Atributos com `overall` e `primary_type` (sem ler o log de combates), por versão dos dados."""
+    return _attributes(data_signature())
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _winrate_with_attrs(signature: tuple, min_battles: int) -> pd.DataFrame:
+    attrs = _attributes(signature)
+    if attrs is None or attrs.empty:
+        return pd.DataFrame()
+    wr_attrs = build_winrate_with_attrs(_combat_counts(signature), _pokemons(signature), attrs, min_battles=min_battles)
+    if wr_attrs.empty:
+        return wr_attrs
+    # Garantir nome e tipo principal
+    if "name" not in wr_attrs.columns:
+        wr_attrs["name"] = wr_attrs.get("name_x", wr_attrs.get("name_y"))
+    if "types" in wr_attrs.columns:
+        wr_attrs["primary_type_en"] = wr_attrs["types"].apply(
+            lambda s: next((x for x in parse_types(s) if x in OFFICIAL_TYPES_EN), None)
+        )
+    else:
+        wr_attrs["primary_type_en"] = None
+    return wr_attrs
+
+
+def get_winrate_with_attrs(min_battles: int = 5) -> pd.DataFrame:
+    """Taxa de vitória unida aos atributos (com `overall` e `primary_type_en`), por versão dos dados."""
+    return _winrate_with_attrs(data_signature(), min_battles)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _similarity_index(signature: tuple) -> SimilarityIndex | None:
+    attrs = _attributes(signature)
+    if attrs is None or attrs.empty:
+        return None
+    return build_similarity_index(
+        attrs,
+        winrate_from_codes(_combat_counts(signature)),
+        version=_data_key(signature, "pokemons", "combats", "attributes"),
+    )
+
+
+def get_similarity_index() -> SimilarityIndex | None:
+    """Índice de vizinhos por atributos (com taxas de vitória), um por versão dos dados."""
+    return _similarity_index(data_signature())
+
+
+@st.cache_resource(max_entries=2, show_spinner="Treinando o modelo de confrontos...")
+def _matchup_model(signature: tuple) -> MatchupModel | None:
+    attrs = _attributes(signature)
+    if attrs is None or attrs.empty:
+        return None
+    return fit_matchup_model(
+        _combat_counts(signature),
+        attrs,
+        version=_data_key(signature, "pokemons", "combats", "attributes"),
+    )
+
+
+def get_matchup_model() -> MatchupModel | None:
+    """Modelo A x B com a matriz de probabilidades de todos os pares, um por versão dos dados."""
+    return _matchup_model(data_signature())
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _stats_cube(signature: tuple) -> StatsCube | None:
+    return build_stats_cube(
+        _combat_counts(signature),
+        _attributes(signature),
+        version=_data_key(signature, "pokemons", "combats", "attributes"),
+    )
+
+
+def get_stats_cube() -> StatsCube | None:
+    """Cubo geração × lendário × tipo principal × tipo secundário, um por versão dos dados."""
+    return _stats_cube(data_signature())
 
 
 # Paleta fixa por tipo para todos os graficos
@@ -65,32 +382,55 @@ TYPE_COLORS_EN = {
 
 
 def parse_types(val) -> list[str]:
-    if isinstance(val, str):
-        return [s.strip() for s in val.split(",") if s.strip()]
-    if isinstance(val, list):
-        return [str(x) for x in val]
-    return []
-
-
-def ensure_overall(attrs: pd.DataFrame) -> pd.DataFrame:
-    """Garante colunas numericas e calcula overall (inteiro)."""
-    df = attrs.copy()
-    stats = ["hp", "attack", "defense", "sp_attack", "sp_defense", "speed"]
-    for col in stats:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    if "overall" not in df.columns and all(c in df.columns for c in stats):
-        df["overall"] = (
-            df["hp"]
-            + df["attack"]
-            + df["defense"]
-            + df["sp_attack"]
-            + df["sp_defense"]
-            + df["speed"]
-        )
-    if "overall" in df.columns:
-        df["overall"] = pd.to_numeric(df["overall"], errors="coerce").round(0).astype("Int64")
-    if "types" not in df.columns:
-        df["types"] = None
-    return df
+    """Lista de tipos de uma célula ("Grass/Poison", "Normal, Fairy" ou lista)."""
+    return split_types(val)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _win_probabilities(signature: tuple, method: str):
+    codes = _combat_codes(signature)
+    ratings = _ratings(signature).set_index("name")
+    strengths = ratings["bt_strength"].reindex(codes.names).fillna(0.0).to_numpy()
+    return win_probability_matrix(codes, method=method, strengths=strengths)
+
+
+def get_win_probabilities(method: str = "shrinkage"):
+    """Matriz P(i vence j) por código de pokémon (ver `src.analysis.simulation`)."""
+    return _win_probabilities(data_signature(), method)
+
+
+@st.cache_resource(max_entries=2, show_spinner="Processando combates em blocos...")
+def _combat_sketches(signature: tuple) -> CombatSketches:
+    return sketch_combats(iter_combat_chunks(_signature_dir(signature)), SketchConfig())
+
+
+def get_combat_sketches() -> CombatSketches:
+    """Sketches (Count-Min, Space-Saving, HyperLogLog, reservatório) do log de combates."""
+    return _combat_sketches(data_signature())
+
+
+def get_participations() -> pd.DataFrame:
+    """Participações exatas (combates codificados) ou aproximadas (top-K via sketches)."""
+    if analytics_mode() == "approx":
+        return get_combat_sketches().participations()
+    return participations_from_codes(get_combat_counts())
+
+
+def get_winrate(min_battles: int = 1) -> pd.DataFrame:
+    """Taxa de vitória exata ou aproximada, com as colunas de `compute_winrate`."""
+    if analytics_mode() == "approx":
+        return get_combat_sketches().winrate(min_battles)
+    return winrate_from_codes(get_combat_counts(), min_battles=min_battles)
+
 
+def approx_caption() -> str | None:
+    """Texto com os limites de erro quando o modo aproximado está ativo."""
+    if analytics_mode() != "approx":
+        return None
+    sk = get_combat_sketches()
+    b = sk.error_bounds()
+    n_combats = f"{sk.n_combats:,}".replace(",", ".")
+    return (
+        f"Modo aproximado: {n_combats} combates em sketches; contagens superestimam no máximo "
+        f"{b['count_abs_error']:.0f} com {b['count_confidence']:.1%} de confiança (top {sk.config.top_k})."
+    )
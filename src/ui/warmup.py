@@ -0,0 +1,164 @@
+"""Pré-aquecimento das páginas do dashboard.
+
+Na primeira visita a cada combinação de widgets a página paga o pandas e a
+montagem da figura plotly; só a partir da segunda o cache de renderização
+(`src.ui.render_cache`) responde. Aqui todas as combinações das páginas
+com widgets (`types`, `interactive`, `attributes`, `cube`) são calculadas de
+antemão num pool de threads:
+
+- na primeira sessão aberta no servidor (`ensure_warm`, chamado pelo
+  `streamlit_app`: o Streamlit não tem gancho de subida; as sessões que
+  chegam durante o aquecimento veem o progresso na barra lateral);
+- quando o agendador publica um snapshot novo, antes da troca a quente
+  (`src.ui.utils._warm_and_swap`), com a versão nova fixada na thread por
+  `using_data_dir` — assim as chaves de cache já nascem com a versão certa.
+
+Cada página expõe `warm_tasks()`: lista de (rótulo, função) que montam as
+figuras/tabelas pelas mesmas funções usadas no `render()`. O cache de
+renderização é do processo: o aquecimento só vale dentro do servidor.
+
+No modo aproximado (`analytics_mode() == "approx"`) as páginas de
+`EXACT_PAGES` ficam de fora: as tarefas delas leem o `combats.csv`
+inteiro, justamente o que o modo aproximado evita.
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from src.ui.utils import active_data_dir, analytics_mode, using_data_dir, warm_caches
+
+
+# Módulos em src/ui/pages com `warm_tasks()`
+WARM_PAGES = ("types", "interactive", "attributes", "cube")
+# Páginas que precisam dos combates completos (fora no modo aproximado)
+EXACT_PAGES = ("types", "attributes", "cube")
+DEFAULT_WORKERS = int(os.getenv("WARMUP_WORKERS", "4"))
+
+
+@dataclass
+class WarmupProgress:
+    data_dir: str
+    total: int = 0
+    done: int = 0
+    failed: List[str] = field(default_factory=list)
+    current: str = ""
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self.finished is None
+
+    @property
+    def fraction(self) -> float:
+        return self.done / self.total if self.total else (0.0 if self.running else 1.0)
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def format(self) -> str:
+        msg = f"{self.done}/{self.total} combinações em {self.seconds:.1f}s"
+        return msg + (f" ({len(self.failed)} com erro)" if self.failed else "")
+
+
+_status: dict = {"progress": None, "started": False}
+_status_lock = threading.Lock()
+
+
+def warmup_status() -> Optional[WarmupProgress]:
+    """Progresso do último pré-aquecimento do processo (ou `None`)."""
+    return _status["progress"]
+
+
+def collect_tasks(pages=WARM_PAGES) -> List[tuple]:
+    """(rótulo, função) de todas as páginas; chamar com o diretório de dados já fixado."""
+    if analytics_mode() == "approx":
+        pages = [name for name in pages if name not in EXACT_PAGES]
+    tasks = []
+    for name in pages:
+        tasks.extend(importlib.import_module(f"src.ui.pages.{name}").warm_tasks())
+    return tasks
+
+
+def prewarm(
+    data_dir: Path | str | None = None,
+    *,
+    max_workers: int = DEFAULT_WORKERS,
+    include_data: bool = True,
+    on_progress: Optional[Callable[[WarmupProgress], None]] = None,
+) -> WarmupProgress:
+    """Aquece dados (`warm_caches`) e todas as combinações das páginas de `data_dir`.
+
+    Falhas de uma combinação não interrompem as demais: ficam em
+    `progress.failed` e a página monta a figura na visita, como antes.
+    """
+    data_dir = Path(data_dir) if data_dir is not None else active_data_dir()
+    progress = WarmupProgress(str(data_dir))
+    with _status_lock:
+        _status["progress"] = progress
+    lock = threading.Lock()
+    step = 0
+
+    def report(label: str, ok: bool) -> None:
+        nonlocal step
+        with lock:
+            progress.done += 1
+            progress.current = label
+            if not ok:
+                progress.failed.append(label)
+            # Uma linha a cada ~10% no log do servidor
+            if progress.done * 10 // max(progress.total, 1) > step or progress.done == progress.total:
+                step = progress.done * 10 // max(progress.total, 1)
+                print(f"Pré-aquecimento de {data_dir}: {progress.format()}", flush=True)
+        if on_progress is not None:
+            on_progress(progress)
+
+    def run(label: str, fn: Callable) -> None:
+        with using_data_dir(data_dir):
+            try:
+                fn()
+            except Exception:
+                print(f"Falha ao pré-aquecer {label}:\n" + traceback.format_exc())
+                report(label, False)
+                return
+        report(label, True)
+
+    with using_data_dir(data_dir):
+        if include_data:
+            warm_caches(data_dir)
+        tasks = collect_tasks()
+    progress.total = len(tasks)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup") as pool:
+        for future in as_completed([pool.submit(run, label, fn) for label, fn in tasks]):
+            future.result()
+    progress.finished = time.perf_counter()
+    if on_progress is not None:
+        on_progress(progress)
+    return progress
+
+
+def ensure_warm() -> Optional[WarmupProgress]:
+    """Dispara (uma vez por processo, na primeira sessão) o pré-aquecimento em segundo plano."""
+    with _status_lock:
+        if not _status["started"]:
+            _status["started"] = True
+            threading.Thread(target=_prewarm_safely, name="warmup", daemon=True).start()
+    return _status["progress"]
+
+
+def _prewarm_safely() -> None:
+    try:
+        prewarm()
+    except Exception:
+        print("Falha no pré-aquecimento do dashboard:\n" + traceback.format_exc())
+
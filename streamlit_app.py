@@ -1,42 +1,49 @@
 """Aplicativo Streamlit principal: roteador de páginas.
 
 Este arquivo apenas configura a navegação e delega a renderização para
-os módulos em `src/ui/pages/*`.
+os módulos em `src/ui/pages/*`. Os módulos das páginas (e com eles
+plotly, modelos etc.) só são importados quando a página é aberta; veja
+`benchmarks/startup_importtime.py` para medir o custo de inicialização.
+Na primeira sessão aberta no processo, `src.ui.warmup` pré-aquece em segundo
+plano todas as combinações das páginas com widgets.
 """
 
+import importlib
+
 import streamlit as st
 
-from src.ui.pages import overview, participations, winrate, types, attributes, interactive
+
+# Rótulo no menu -> módulo em src/ui/pages
+PAGES = {
+    "Visão Geral": "overview",
+    "Participações": "participations",
+    "Taxa de Vitória": "winrate",
+    "Ranking de Força": "ratings",
+    "Simulador de Torneios": "simulation",
+    "Previsão de Confronto": "matchup",
+    "Informações por Tipo": "types",
+    "Atributos e Desempenho": "attributes",
+    "Análises Interativas de Atributos": "interactive",
+    "Recortes por Geração e Tipo": "cube",
+}
+
+
+def load_page(label: str):
+    """Importa (uma vez por processo) o módulo da página escolhida."""
+    return importlib.import_module(f"src.ui.pages.{PAGES[label]}")
 
 
 def main() -> None:
     st.set_page_config(page_title="Pokemon Battles", layout="wide")
     st.sidebar.title("Navegação")
-    page = st.sidebar.selectbox(
-        "Ir para",
-        [
-            "Visão Geral",
-            "Participações",
-            "Taxa de Vitória",
-            "Informações por Tipo",
-            "Atributos e Desempenho",
-            "Análises Interativas de Atributos",
-        ],
-    )
-    if page == "Visão Geral":
-        overview.render()
-    elif page == "Participações":
-        participations.render()
-    elif page == "Taxa de Vitória":
-        winrate.render()
-    elif page == "Informações por Tipo":
-        types.render()
-    elif page == "Atributos e Desempenho":
-        attributes.render()
-    else:
-        interactive.render()
+    page = st.sidebar.selectbox("Ir para", list(PAGES))
+    from src.ui.warmup import ensure_warm
+
+    progress = ensure_warm()
+    if progress is not None and progress.running:
+        st.sidebar.progress(progress.fraction, text=f"Pré-aquecendo páginas: {progress.format()}")
+    load_page(page).render()
 
 
 if __name__ == "__main__":
     main()
-